@@ -0,0 +1,46 @@
+"""
+快取設定：由 CACHE_URL 產生 CACHES 的一個項目
+
+- locmem://：每個行程各自一份（預設，只適合開發 / 單一行程）
+- file:///路徑：同一台主機的多個行程共用
+- redis://host:6379/0、rediss://...：多台主機 / 多個 worker 共用（Django 內建 RedisCache，需安裝 redis）
+
+分析快取的版本號、讀寫分離的「寫入後改讀主庫」都靠快取在 worker 之間同步，
+多個 worker 時必須使用共用的快取（見 store/checks.py 的 store.E003）
+"""
+import importlib.util
+from urllib.parse import urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+
+LOCAL_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def redis_available() -> bool:
+    return importlib.util.find_spec("redis") is not None
+
+
+def cache_config(url) -> dict:
+    """
+    由連線字串產生 CACHES 的一個項目
+    """
+    parts = urlsplit(url)
+    if parts.scheme == "locmem":
+        return {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": parts.netloc}
+    if parts.scheme == "file":
+        if not parts.path:
+            raise ImproperlyConfigured("file:// 快取需要目錄路徑，例如 file:///var/tmp/django_cache")
+        return {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": parts.path}
+    if parts.scheme in ("redis", "rediss"):
+        if not redis_available():
+            raise ImproperlyConfigured("redis:// 快取需要安裝 redis")
+        return {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": url}
+    raise ImproperlyConfigured(f"不支援的 CACHE_URL：{url!r}（locmem://、file:///路徑、redis://）")
+
+
+def is_shared(config) -> bool:
+    """同一個快取能否被其他行程看到"""
+    return config["BACKEND"] not in LOCAL_BACKENDS
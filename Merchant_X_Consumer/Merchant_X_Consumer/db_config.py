@@ -0,0 +1,47 @@
+"""
+資料庫連線設定：連線重用、健康檢查與（選用的）psycopg3 連線池
+
+- 預設開啟持久連線（CONN_MAX_AGE），每個 gunicorn worker 重用同一條連線，
+  不必每個請求都重新與 PostgreSQL 建立連線（TCP + 認證需要數毫秒）
+- CONN_HEALTH_CHECKS：重用前先確認連線仍可用，資料庫重啟或連線被中斷後不會讓請求失敗
+- DB_POOL=1 時改用 Django 內建的 psycopg3 連線池（需要 Django 5.1 以上、安裝 psycopg[pool]，只支援 PostgreSQL）；
+  連線池與持久連線不能同時使用，因此 CONN_MAX_AGE 會被設為 0
+"""
+import importlib.util
+
+import dj_database_url
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+POSTGRES_ENGINES = {"django.db.backends.postgresql", "django.contrib.gis.db.backends.postgis"}
+
+
+def pool_available() -> bool:
+    return importlib.util.find_spec("psycopg_pool") is not None
+
+
+def database_config(
+    url, *, conn_max_age=60, health_checks=True, pool=False, pool_min_size=2, pool_max_size=10, pool_timeout=10,
+) -> dict:
+    """
+    由連線字串產生 DATABASES 的一個項目
+    """
+    config = dj_database_url.parse(url, conn_max_age=conn_max_age, conn_health_checks=health_checks)
+    if not pool:
+        return config
+
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured("DB_POOL 需要 Django 5.1 以上（OPTIONS['pool']）")
+    if config["ENGINE"] not in POSTGRES_ENGINES:
+        raise ImproperlyConfigured("DB_POOL 只支援 PostgreSQL")
+    if not pool_available():
+        raise ImproperlyConfigured("DB_POOL 需要安裝 psycopg[pool]（psycopg3）")
+
+    config["CONN_MAX_AGE"] = 0
+    config["CONN_HEALTH_CHECKS"] = False # 連線池借出前會自行檢查
+    config.setdefault("OPTIONS", {})["pool"] = {
+        "min_size": pool_min_size,
+        "max_size": pool_max_size,
+        "timeout": pool_timeout,
+    }
+    return config
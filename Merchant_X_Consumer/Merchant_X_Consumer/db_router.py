@@ -0,0 +1,130 @@
+"""
+讀寫分離：讀取較重的 API（商家分析、商品 / 商店列表、訂單紀錄）改由 replica 回答
+
+- replica 由環境變數 DATABASE_REPLICA_URLS 設定（逗號分隔），別名為 replica_0、replica_1 ...；
+  沒有設定 replica 時，所有查詢照舊走 default
+- 只有套用 ReplicaReadMixin 的 view、且是 GET / HEAD / OPTIONS 才會讀 replica；
+  寫入、交易中的查詢、select_for_update 一律在 primary（default）
+- read-your-writes：使用者寫入成功後 REPLICA_PIN_SECONDS 秒內，他的讀取固定走 primary，
+  不會因為 replica 延遲而看不到剛建立的訂單（ReplicaPinMiddleware）
+  固定標記存在 REPLICA_PIN_CACHE_ALIAS 快取：寫入與之後的讀取常由不同 worker / 主機處理，
+  快取必須共用（CACHE_URL=redis://...，正式環境由 store.E003 檢查）
+
+本機以兩個 SQLite 檔模擬：
+
+    DATABASE_URL=sqlite:///primary.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replica_aliases() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def replica_reads_enabled() -> bool:
+    """目前的請求是否允許讀 replica（不論是否真的有設定 replica）"""
+    return _replica_reads.get()
+
+
+@contextmanager
+def replica_reads():
+    """在 view 以外（例如管理指令）讀 replica"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# read-your-writes
+# ---------------------------------------------------------------------------
+
+def _pin_key(user_id):
+    return f"db:pin-primary:{user_id}"
+
+
+def _pin_cache():
+    return caches[getattr(settings, "REPLICA_PIN_CACHE_ALIAS", "default")]
+
+
+def pin_to_primary(user):
+    _pin_cache().set(_pin_key(user.pk), True, getattr(settings, "REPLICA_PIN_SECONDS", 5))
+
+
+def is_pinned(user) -> bool:
+    return bool(user and user.is_authenticated and _pin_cache().get(_pin_key(user.pk)))
+
+
+class ReplicaPinMiddleware:
+    """
+    成功的寫入請求（非 GET / HEAD / OPTIONS、狀態碼 < 400）之後，把該使用者固定在 primary 一小段時間
+    JWT 由 DRF 在 view 中驗證，DRF 會把使用者寫回 request.user，因此在回應後檢查
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            replica_aliases()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and getattr(request, "user", None) is not None
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    DRF view mixin：安全方法的請求在 replica 上讀取（使用者未被固定在 primary 時）
+    驗證在 initial() 中完成，之後才決定是否讀 replica；finalize_response() 一定會被呼叫，在那裡還原
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not replica_aliases():
+            return # 沒有 replica 時不必查固定標記
+        if request.method in SAFE_METHODS and not is_pinned(request.user):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        replicas = replica_aliases()
+        if not replicas:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None # 交易中的讀取必須看得到同一個交易的寫入
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # primary 與 replica 是同一份資料
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,174 @@
+"""
+請求層級的效能量測：DB 查詢數、DB 時間、view 時間、serializer 時間、render（輸出 JSON / CSV）時間、總時間
+
+- 以 Server-Timing 標頭回傳（瀏覽器 DevTools 的 Timing 分頁可直接看到）
+- 每個請求輸出一行 JSON log（logger: "instrumentation"）
+- INSTRUMENTATION_ENABLED 為 False 時中介軟體不會被載入（MiddlewareNotUsed），沒有任何額外成本
+- INSTRUMENTATION_SAMPLE_RATE 控制量測比例（0~1），未抽中的請求直接放行
+
+不替換 DRF 的類別：
+- view：從進入中介軟體到開始 render，包含 serializer 時間
+- serializer：serializer 繼承 SerializerTimingMixin，最外層 to_representation 的時間（含期間的查詢）；
+  目前請求的 RequestMetrics 放在 ContextVar，沒有量測中的請求時 mixin 只多一次 ContextVar 讀取
+- render：process_template_response 到 post-render callback，DRF 的 renderer 把 response.data 轉成 JSON / CSV
+- 串流回應（StreamingHttpResponse）的內容在中介軟體返回之後才產生：
+  包裝 streaming_content，串流期間的查詢與產生內容的時間（stream_ms）也會計入，log 在串流結束時才輸出；
+  標頭已先送出，Server-Timing 只含 view 階段。FileResponse 不包裝（保留 wsgi.file_wrapper）
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse
+
+logger = logging.getLogger("instrumentation")
+
+_current_metrics = ContextVar("instrumentation_metrics", default=None)
+
+
+@dataclass
+class RequestMetrics:
+    db_queries: int = 0
+    db_ms: float = 0.0
+    view_ms: float = 0.0
+    serializer_ms: float = 0.0
+    render_ms: float = 0.0
+    stream_ms: float = 0.0
+    started: float = 0.0
+    render_started: float = None
+    serializing: bool = False
+
+
+def _record_query(metrics, execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_ms += (time.perf_counter() - started) * 1000
+
+
+def _recording_queries(metrics):
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(partial(_record_query, metrics)))
+    return stack
+
+
+class SerializerTimingMixin:
+    """
+    把 to_representation 的時間計入目前請求的 serializer 時間；巢狀的 serializer 只計最外層，不重複計算
+    """
+
+    def to_representation(self, instance):
+        metrics = _current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_ms += (time.perf_counter() - started) * 1000
+            metrics.serializing = False
+
+
+def server_timing(metrics, total_ms):
+    return ", ".join([
+        f'db;dur={metrics.db_ms:.2f};desc="{metrics.db_queries} queries"',
+        f"view;dur={metrics.view_ms:.2f}",
+        f"serialize;dur={metrics.serializer_ms:.2f}",
+        f"render;dur={metrics.render_ms:.2f}",
+        f"total;dur={total_ms:.2f}",
+    ])
+
+
+class RequestInstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "INSTRUMENTATION_SAMPLE_RATE", 1.0)
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(started=time.perf_counter())
+        request._instrumentation = metrics
+        token = _current_metrics.set(metrics)
+        try:
+            with _recording_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        total_ms = (time.perf_counter() - metrics.started) * 1000
+        if metrics.render_started is None:
+            metrics.view_ms = total_ms
+
+        timing = server_timing(metrics, total_ms)
+        if response.has_header("Server-Timing"):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response["Server-Timing"] = timing
+
+        if response.streaming and not isinstance(response, FileResponse) and not response.is_async:
+            response.streaming_content = self.timed_stream(request, response, metrics, response.streaming_content)
+        else:
+            self.log(request, response, metrics, total_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, "_instrumentation", None)
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+            metrics.view_ms = (metrics.render_started - metrics.started) * 1000
+            response.add_post_render_callback(partial(self.rendered, metrics))
+        return response
+
+    @staticmethod
+    def rendered(metrics, response):
+        metrics.render_ms = (time.perf_counter() - metrics.render_started) * 1000
+
+    def timed_stream(self, request, response, metrics, content):
+        content = iter(content)
+        try:
+            with _recording_queries(metrics):
+                while True:
+                    chunk_started = time.perf_counter()
+                    token = _current_metrics.set(metrics)
+                    try:
+                        chunk = next(content)
+                    except StopIteration:
+                        break
+                    finally:
+                        _current_metrics.reset(token)
+                        metrics.stream_ms += (time.perf_counter() - chunk_started) * 1000
+                    yield chunk
+        finally:
+            self.log(request, response, metrics, (time.perf_counter() - metrics.started) * 1000)
+
+    def log(self, request, response, metrics, total_ms):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        match = request.resolver_match
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 2),
+            "db_ms": round(metrics.db_ms, 2),
+            "db_queries": metrics.db_queries,
+            "view_ms": round(metrics.view_ms, 2),
+            "serializer_ms": round(metrics.serializer_ms, 2),
+            "render_ms": round(metrics.render_ms, 2),
+            "stream_ms": round(metrics.stream_ms, 2),
+        }, ensure_ascii=False))
@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
-import dj_database_url
+
+from Merchant_X_Consumer.cache_config import cache_config
+from Merchant_X_Consumer.db_config import database_config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,12 +53,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "Merchant_X_Consumer.instrumentation.RequestInstrumentationMiddleware", # 請求效能量測（預設關閉）
     "corsheaders.middleware.CorsMiddleware", # 允許跨域請求的中介軟體
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     # "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "Merchant_X_Consumer.db_router.ReplicaPinMiddleware", # 寫入後短時間內固定讀 primary
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -85,16 +89,40 @@ WSGI_APPLICATION = "Merchant_X_Consumer.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# 連線重用（見 Merchant_X_Consumer/db_config.py）
+DATABASE_CONNECTION = {
+    "conn_max_age": int(os.environ.get("DB_CONN_MAX_AGE", 60)), # 秒；0 表示每個請求結束就關閉連線
+    "health_checks": os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True",
+    "pool": os.environ.get("DB_POOL") == "1", # psycopg3 連線池，只支援 PostgreSQL
+    "pool_min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+    "pool_max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+    "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)), # 秒；連線池耗盡時等待的上限
+}
+
 DATABASES = {
     # "default": {
     #     "ENGINE": "django.db.backends.sqlite3",
     #     "NAME": BASE_DIR / "db.sqlite3",
     # }
-    "default": dj_database_url.config(
-        default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"
+    "default": database_config(
+        os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}"), **DATABASE_CONNECTION,
     )
 }
 
+# 唯讀 replica（見 Merchant_X_Consumer/db_router.py）：DATABASE_REPLICA_URLS 以逗號分隔，別名為 replica_0、replica_1 ...
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(","))):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **database_config(url.strip(), **DATABASE_CONNECTION),
+        "TEST": {"MIRROR": "default"}, # 測試時指向 default 的測試資料庫
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["Merchant_X_Consumer.db_router.ReplicaRouter"]
+REPLICA_PIN_SECONDS = 5 # 使用者寫入後，這段時間內的讀取固定走 primary
+REPLICA_PIN_CACHE_ALIAS = "default" # 固定標記存放的快取，必須是所有 worker 共用的快取（見 CACHES）
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -151,6 +179,55 @@ REST_FRAMEWORK = {
      'PAGE_SIZE': 5,
 }
 
+# 訂單編號配發器（見 store/services/order_numbers.py）
+ORDER_NUMBER_ALLOCATOR = "store.services.order_numbers.SnowflakeOrderNumberAllocator"
+# 節點編號 (0~99)：每台主機 / 每個容器必須不同；正式環境（DEBUG=False）沒有設定時 manage.py check / migrate 會失敗
+ORDER_NUMBER_NODE_ID = os.environ.get("ORDER_NUMBER_NODE_ID", "0" if DEBUG else None)
+
+# 快取（見 Merchant_X_Consumer/cache_config.py）：多個 worker / 多台主機必須共用，例如 CACHE_URL=redis://redis:6379/0；
+# 正式環境（DEBUG=False）使用每個行程各自一份的 locmem 時 manage.py check / migrate 會失敗（store.E003）
+CACHES = {
+    "default": cache_config(os.environ.get("CACHE_URL", "locmem://")),
+}
+
+# 商家分析 API 的回應快取（見 store/analytics/services/analytics_cache.py）
+ANALYTICS_CACHE_ALIAS = "default"
+ANALYTICS_CACHE_LIVE_TTL = 60 # 區間包含今天
+ANALYTICS_CACHE_HISTORIC_TTL = 60 * 60 * 24 # 區間已結束，資料只會因舊訂單異動而改變（版本號會處理）
+
+# 區間天數達到此值時，時序 / 熱門商品 / 熟客改用欄式引擎（需安裝 numpy；None 表示停用）
+ANALYTICS_COLUMNAR_MIN_DAYS = None
+
+# 熱門商品 / 熟客的滾動排行榜視窗（天）；「今天往前 N 天」的查詢直接讀排行榜（見 store/analytics/services/leaderboards.py）
+ANALYTICS_LEADERBOARD_WINDOWS = (7, 30, 90)
+
+# 商家匯出工作（見 store/services/exports.py）
+EXPORT_ROOT = Path(os.environ.get("EXPORT_ROOT", BASE_DIR / "exports")) # 匯出檔存放位置
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", 2)) # 背景執行緒數；0 表示在請求中直接執行
+EXPORT_CHUNK_SIZE = 2000 # 每批讀取 / 寫入的列數
+EXPORT_STALE_MINUTES = 15 # running 工作超過這個分鐘數沒有進度，recover_exports 視為中斷並標記失敗
+
+# 庫存保留（見 store/services/inventory.py）：待付款訂單保留庫存的分鐘數，逾期由 release_expired_reservations 指令取消
+STOCK_RESERVATION_MINUTES = 30
+
+# 訂單狀態事件（見 store/services/order_events.py）：consume_events 越過的 id 超過這個秒數仍未出現，視為已回滾的交易
+ORDER_EVENT_GAP_SECONDS = 600
+
+# 請求效能量測（見 Merchant_X_Consumer/instrumentation.py）
+INSTRUMENTATION_ENABLED = os.environ.get("INSTRUMENTATION_ENABLED") == "1"
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get("INSTRUMENTATION_SAMPLE_RATE", 1.0)) # 0~1，量測請求的比例
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "instrumentation": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Merchant X Consumer API',
     'DESCRIPTION': '商家/會員/商品管理系統 API 文件',
@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    LocMemCache 在同一個測試行程中會一直存在，而資料庫 id 會在測試間重複使用，
+    每個測試開始前清空，避免讀到上一個測試留下的快取
+    """
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def export_root(settings, tmp_path_factory):
+    """
+    匯出檔寫到暫存資料夾，不會留在專案目錄
+    """
+    settings.EXPORT_ROOT = tmp_path_factory.mktemp("exports")
+    return settings.EXPORT_ROOT
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchant',
+            name='timezone',
+            field=models.CharField(default='Asia/Taipei', max_length=64),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.db import models
 from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 # Create your models here.
 
 class User(AbstractUser):
@@ -47,9 +48,20 @@ class Merchant(models.Model):
         User, 
         on_delete=models.CASCADE
     ) 
+    timezone = models.CharField(
+        max_length=64,
+        default=settings.TIME_ZONE,
+    ) # 商家所在時區（IANA 名稱），分析報表依此時區切分日期
 
     class Meta:
         db_table = 'merchant' # 指定資料表名稱
 
+    @property
+    def tzinfo(self):
+        try:
+            return ZoneInfo(self.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            return ZoneInfo(settings.TIME_ZONE)
+
     def __str__(self):
         return self.user.username # 回傳物件的名稱
\ No newline at end of file
@@ -24,7 +24,7 @@ class IsOwnerOfStore(BasePermission):
         return (
             request.user.is_authenticated and
             hasattr(request.user, "merchant") and 
-            obj.merchant == request.user.merchant
+            obj.merchant_id == request.user.merchant.id
         )
 
 class IsOwnerOfProduct(BasePermission):
@@ -32,7 +32,7 @@ class IsOwnerOfProduct(BasePermission):
         return (
             request.user.is_authenticated and
             hasattr(request.user, "merchant") and
-            obj.store.merchant == request.user.merchant
+            obj.store.merchant_id == request.user.merchant.id
         )
 
 class IsMember(BasePermission):
@@ -50,7 +50,7 @@ class IsOwnerOfMemberProfile(BasePermission):
         return (
             request.user.is_authenticated and
             hasattr(request.user, "member") and
-            obj.user == request.user
+            obj.user_id == request.user.id
         )
 
 
@@ -60,6 +60,6 @@ class IsOwnerOfOrder(BasePermission):
         return (
             request.user.is_authenticated and
             hasattr(request.user, "member") and
-            obj.member == request.user.member
+            obj.member_id == request.user.member.id
         )
     
\ No newline at end of file
@@ -2,12 +2,13 @@ from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer # 用於JWT驗證
 from django.db import transaction # 用於資料庫交易管理
 from rest_framework import serializers
+from Merchant_X_Consumer.instrumentation import SerializerTimingMixin
 from member.models import User, Member, Merchant
 from store.models import Store,Order, OrderItem
 from store.serializers import OrderSerializer
 from datetime import datetime
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=2) # 密碼不會回傳時露出來，且長度至少為2
 
     class Meta:
@@ -66,7 +67,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
     
     
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     orders = OrderSerializer(many=True, read_only=True) # 取得關聯的訂單列表
     class Meta:
         model = Member
@@ -85,7 +86,7 @@ class MemberSerializer(serializers.ModelSerializer):
 
     
 
-class MerchantSerializer(serializers.ModelSerializer):
+class MerchantSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = Merchant
         fields = [
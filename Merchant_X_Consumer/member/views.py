@@ -1,3 +1,4 @@
+import logging
 # 匯入 member 資料庫
 from django.shortcuts import render, redirect
 from member.models import User, Member 
@@ -20,6 +21,9 @@ from member.permissions import IsMember, IsOwnerOfMemberProfile, IsAdmin
 from rest_framework.exceptions import PermissionDenied
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+
+logger = logging.getLogger(__name__)
+
 # Create your views here.
 
 class RegisterView(generics.CreateAPIView):
@@ -32,7 +36,7 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
     def post(self, request, *args, **kwargs):
-        print("🔥 LOGIN POST HIT 🔥")
+        logger.debug("login attempt: %s", request.data.get('username'))
         return super().post(request, *args, **kwargs)
 
 
@@ -41,11 +45,13 @@ class MemberViewSet(
     mixins.UpdateModelMixin, 
     viewsets.GenericViewSet
 ):
-    queryset = Member.objects.all()
+    queryset = Member.objects.select_related('user').prefetch_related('orders__items__product') # 一次載入會員的訂單與商品，避免 N+1
     serializer_class = MemberSerializer
 
     def get_permissions(self):
         return [IsAuthenticated(), IsOwnerOfMemberProfile()]
     
     def perform_update(self, serializer):
-        serializer.save()
\ No newline at end of file
+        serializer.save()
+        # DRF 更新後會清掉 prefetch 快取，重新以同一個 queryset 取回，回傳時才不會逐筆查訂單
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+商家分析 API 的回應快取
+
+- key：商家 + action + 查詢參數（日期區間、狀態、limit...）+ 商家的版本號
+- 每個商家有兩個版本號：
+  - history：訂單異動影響到今天以前的日期時遞增（例如舊訂單改狀態）
+  - live：訂單異動只影響今天時遞增（例如今天的新訂單）
+  區間在今天以前就結束的查詢只看 history，今天的新訂單不會讓歷史報表失效
+- 已結束的區間 TTL 較長（ANALYTICS_CACHE_HISTORIC_TTL），包含今天的較短（ANALYTICS_CACHE_LIVE_TTL）
+- 「今天」與訂單的日期都以商家時區（Merchant.timezone）計算，與報表切分日期的方式一致
+- 版本號在交易 commit 後才遞增，避免其他請求在 commit 前讀到舊資料又寫回快取
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from member.models import Merchant
+from store.models import OrderItem
+from store.signals import order_created, order_deleted, order_status_changed, orders_status_changed
+
+LIVE = "live"
+HISTORY = "history"
+
+
+def _cache():
+    return caches[getattr(settings, "ANALYTICS_CACHE_ALIAS", "default")]
+
+
+def _version_key(merchant_id, scope):
+    return f"analytics:version:{merchant_id}:{scope}"
+
+
+def _version(cache, merchant_id, scope):
+    key = _version_key(merchant_id, scope)
+    # 版本號被淘汰後不可從 1 重新開始，否則會撞到舊的快取內容，因此以時間當初始值
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def bump_version(merchant_id, scope):
+    cache = _cache()
+    key = _version_key(merchant_id, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def _includes_today(merchant, end):
+    return end is None or end >= timezone.localdate(timezone=merchant.tzinfo)
+
+
+def cache_key(merchant, action, *, start, end, params=None):
+    """
+    查詢參數與版本號組成的 key；區間包含（商家時區的）今天時才會帶入 live 版本號
+    """
+    cache = _cache()
+    versions = [_version(cache, merchant.id, HISTORY)]
+    if _includes_today(merchant, end):
+        versions.append(_version(cache, merchant.id, LIVE))
+
+    raw = json.dumps({
+        "start": str(start),
+        "end": str(end),
+        "params": params or {},
+        "versions": versions,
+    }, sort_keys=True, default=str)
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f"analytics:{merchant.id}:{action}:{digest}"
+
+
+def get_or_build(merchant, action, *, start, end, params=None, build):
+    """
+    有快取就直接回傳，否則呼叫 build() 計算後寫入快取
+    """
+    cache = _cache()
+    key = cache_key(merchant, action, start=start, end=end, params=params)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    data = build()
+    if _includes_today(merchant, end):
+        timeout = getattr(settings, "ANALYTICS_CACHE_LIVE_TTL", 60)
+    else:
+        timeout = getattr(settings, "ANALYTICS_CACHE_HISTORIC_TTL", 60 * 60 * 24)
+    cache.set(key, data, timeout)
+    return data
+
+
+# ---------------------------------------------------------------------------
+# 失效：訂單事件
+# ---------------------------------------------------------------------------
+
+def _invalidate(*orders):
+    # 刪除事件在刪除前送出，商家必須現在就查好
+    created_at = {order.id: order.created_at for order in orders}
+    targets = set()
+    zones = {} # 時區名稱 -> (tzinfo, 該時區的今天)，批次轉換時每個時區只計算一次
+    for merchant_id, tz_name, order_id in (
+        OrderItem.objects.filter(order_id__in=created_at)
+        .values_list("product__store__merchant_id", "product__store__merchant__timezone", "order_id")
+        .distinct()
+    ):
+        if tz_name not in zones:
+            tz = Merchant(timezone=tz_name).tzinfo
+            zones[tz_name] = (tz, timezone.localdate(timezone=tz))
+        tz, today = zones[tz_name]
+        live = timezone.localdate(created_at[order_id], tz) >= today
+        targets.add((merchant_id, LIVE if live else HISTORY))
+    if not targets:
+        return
+
+    def bump():
+        for merchant_id, scope in targets:
+            bump_version(merchant_id, scope)
+
+    transaction.on_commit(bump)
+
+
+@receiver(order_created, dispatch_uid="analytics_cache_order_created")
+def invalidate_on_order_created(sender, order, **kwargs):
+    _invalidate(order)
+
+
+@receiver(order_status_changed, dispatch_uid="analytics_cache_order_status_changed")
+def invalidate_on_order_status_changed(sender, order, old_status, new_status, **kwargs):
+    if old_status != new_status:
+        _invalidate(order)
+
+
+@receiver(order_deleted, dispatch_uid="analytics_cache_order_deleted")
+def invalidate_on_order_deleted(sender, order, **kwargs):
+    _invalidate(order)
+
+
+@receiver(orders_status_changed, dispatch_uid="analytics_cache_orders_status_changed")
+def invalidate_on_orders_status_changed(sender, orders, old_status, new_status, **kwargs):
+    if old_status != new_status and orders:
+        _invalidate(*orders)
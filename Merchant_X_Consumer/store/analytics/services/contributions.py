@@ -0,0 +1,57 @@
+"""
+訂單對各商品的貢獻、彙總列的累加（sales_rollup 與 leaderboards 共用）
+
+- order_contributions：一個查詢取得整批訂單對各商品的數量與金額
+- bulk_increment：以固定查詢數累加多筆彙總列（先確保列存在，再一個 UPDATE ... CASE 累加）
+"""
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, Value, When
+
+from store.models import OrderItem
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def order_contributions(order_ids):
+    """
+    每筆訂單對各商品的貢獻（同商品多個項目已合併），一個查詢取得整批
+    每列：order_id、product_id、merchant_id、revenue、quantity
+    """
+    return list(
+        OrderItem.objects.filter(order_id__in=list(order_ids))
+        .values("order_id", "product_id", merchant_id=F("product__store__merchant_id"))
+        .annotate(
+            # revenue 必須先於 quantity，否則 F("quantity") 會指到彙總後的欄位
+            revenue=Sum(F("price_at_purchase") * F("quantity"), output_field=MONEY),
+            quantity=Sum("quantity"),
+        )
+        .order_by()
+    )
+
+
+def bulk_increment(model, key_field, base, rows):
+    """
+    以固定查詢數累加多筆彙總列：
+    1. bulk_create(ignore_conflicts) 確保每一列都存在
+    2. 一次 UPDATE ... SET x = x + CASE ... 累加所有列
+    rows: {key: (建立時需要的識別欄位, {欄位: 增量})}
+    """
+    model.objects.bulk_create(
+        [model(**base, **identity) for identity, _ in rows.values()],
+        ignore_conflicts=True,
+    )
+
+    fields = next(iter(rows.values()))[1].keys()
+    updates = {}
+    for field in fields:
+        model_field = model._meta.get_field(field)
+        output_field = MONEY if isinstance(model_field, DecimalField) else IntegerField()
+        updates[field] = F(field) + Case(
+            *[
+                When(**{key_field: key}, then=Value(deltas[field], output_field=output_field))
+                for key, (_, deltas) in rows.items()
+            ],
+            default=Value(0, output_field=output_field),
+            output_field=output_field,
+        )
+
+    model.objects.filter(**base, **{f"{key_field}__in": list(rows)}).update(**updates)
@@ -0,0 +1,187 @@
+"""
+商家儀表板：一次請求取得多個指標
+
+只讀取一次該商家在區間內的 OrderItem 明細（單一查詢、分批 iterator），
+在記憶體中同時彙總訂單總覽、時序、熱門商品、熟客，
+結果與 build_order_summary / build_order_timeseries / build_top_products / build_top_customers 相同。
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from member.models import Merchant
+from store.analytics.services.date_ranges import created_between
+from store.analytics.services.order_analytics import OrderSummary, _fill_series
+from store.models import Order, OrderItem
+
+DASHBOARD_METRICS = ("summary", "timeseries", "top_products", "top_customers")
+
+_ROW_FIELDS = (
+    "order_id",
+    "order__status",
+    "order__created_at",
+    "order__member_id",
+    "order__member__user__username",
+    "product_id",
+    "product__name",
+    "quantity",
+    "price_at_purchase",
+)
+
+
+@dataclass
+class _Bucket:
+    orders: set = field(default_factory=set)
+    gmv: Decimal = Decimal("0.00")
+    quantity: int = 0
+    last_created_at: object = None
+
+
+def _bucket(buckets, key):
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = _Bucket()
+    return bucket
+
+
+def _period_of(local, group_by):
+    """
+    商家當地時間所屬期間的起點，格式與 period_keys() 相同
+    """
+    if group_by == "hour":
+        return local.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    day = local.date()
+    if group_by == "week":
+        return day - timedelta(days=day.weekday())
+    if group_by == "month":
+        return day.replace(day=1)
+    if group_by == "quarter":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day
+
+
+def build_dashboard(
+    *,
+    merchant: Merchant,
+    start: date,
+    end: date,
+    metrics: list[str],
+    statuses: list[str] | None = None,
+    group_by: str = "day",
+    product_limit: int = 10,
+    customer_limit: int = 5,
+) -> dict:
+    """
+    回傳 {指標名稱: 資料}，只包含 metrics 中要求的指標
+    statuses 套用在時序、熱門商品、熟客；訂單總覽與單獨 API 相同，統計所有狀態
+    區間、時序與熟客的 last_order_date 都依商家時區切分，與單獨的 API 相同
+    """
+    tz = merchant.tzinfo
+    if statuses is None:
+        statuses = [Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED]
+    status_set = set(statuses)
+
+    qs = OrderItem.objects.filter(
+        product__store__merchant=merchant,
+        **created_between("order__created_at", start, end, tz),
+    )
+    if "summary" not in metrics:
+        qs = qs.filter(order__status__in=statuses)
+
+    by_status = {}
+    by_period = {}
+    by_product = {}
+    by_customer = {}
+    product_names = {}
+    customer_names = {}
+
+    for (order_id, status, created_at, member_id, username,
+         product_id, product_name, quantity, price) in qs.values_list(*_ROW_FIELDS).iterator(chunk_size=2000):
+        amount = price * quantity
+
+        if "summary" in metrics:
+            bucket = _bucket(by_status, status)
+            bucket.orders.add(order_id)
+            bucket.gmv += amount
+
+        if status not in status_set:
+            continue
+
+        if "timeseries" in metrics:
+            bucket = _bucket(by_period, _period_of(timezone.localtime(created_at, tz), group_by))
+            bucket.orders.add(order_id)
+            bucket.gmv += amount
+
+        if "top_products" in metrics:
+            product_names[product_id] = product_name
+            bucket = _bucket(by_product, product_id)
+            bucket.orders.add(order_id)
+            bucket.gmv += amount
+            bucket.quantity += quantity
+
+        if "top_customers" in metrics:
+            customer_names[member_id] = username
+            bucket = _bucket(by_customer, member_id)
+            bucket.orders.add(order_id)
+            bucket.gmv += amount
+            if bucket.last_created_at is None or created_at > bucket.last_created_at:
+                bucket.last_created_at = created_at
+
+    result = {}
+
+    if "summary" in metrics:
+        rows = sorted(by_status.items())
+        order_count = sum(len(bucket.orders) for _, bucket in rows)
+        gmv = sum((bucket.gmv for _, bucket in rows), Decimal("0.00"))
+        result["summary"] = OrderSummary(
+            start=start,
+            end=end,
+            order_count=order_count,
+            gmv=gmv,
+            aov=gmv / order_count if order_count > 0 else Decimal("0.00"),
+            status_breakdown=[
+                {"status": status, "count": len(bucket.orders)} for status, bucket in rows
+            ],
+        )
+
+    if "timeseries" in metrics:
+        result["timeseries"] = _fill_series(
+            [
+                {"period": period, "order_count": len(bucket.orders), "gmv": bucket.gmv}
+                for period, bucket in by_period.items()
+            ],
+            start=start,
+            end=end,
+            group_by=group_by,
+            tz=tz,
+        )
+
+    if "top_products" in metrics:
+        ranked = sorted(by_product.items(), key=lambda item: (-item[1].quantity, item[0]))
+        result["top_products"] = [
+            {
+                "product_id": product_id,
+                "product__name": product_names[product_id],
+                "quantity": bucket.quantity,
+                "revenue": bucket.gmv,
+                "order_count": len(bucket.orders),
+            }
+            for product_id, bucket in ranked[:product_limit]
+        ]
+
+    if "top_customers" in metrics:
+        ranked = sorted(by_customer.items(), key=lambda item: (-item[1].gmv, item[0]))
+        result["top_customers"] = [
+            {
+                "order__member_id": member_id,
+                "order__member__user__username": customer_names[member_id],
+                "total_gmv": bucket.gmv,
+                "order_count": len(bucket.orders),
+                "last_order_date": timezone.localtime(bucket.last_created_at, tz).date(),
+            }
+            for member_id, bucket in ranked[:customer_limit]
+        ]
+
+    return result
@@ -0,0 +1,294 @@
+"""
+商家滾動排行榜：最近 N 天（預設 7 / 30 / 90，ANALYTICS_LEADERBOARD_WINDOWS）的熱門商品與熟客
+
+- 排行榜存在 ProductLeaderboardEntry / CustomerLeaderboardEntry，依排序欄位建索引，
+  取前 N 名只讀 limit 筆，不需要每次對整段明細做分組排序
+- 增量更新：訂單進入「已付款 / 已完成」時累加，離開時（取消、出貨、刪除）扣回；
+  與 sales_rollup 相同，交易內只讀取貢獻，commit 之後才以自己的短交易累加，結帳 / 付款的交易不會鎖住排行榜列；
+  批次轉換狀態以固定數量的查詢套用整批訂單的增量（查詢數與排行榜個數有關，與訂單數無關）
+- 視窗滑動：每天由 rebuild_leaderboards 指令（排程在午夜之後執行）以分組查詢重建，最舊的一天滑出視窗
+- 讀取不會寫入：讀取走從庫，as_of 不是今天（尚未重建）時回傳 None，由 order_analytics 改走 SQL 路徑
+- 只回答「預設狀態、今天往前 N 天」的查詢；其他區間仍走 order_analytics 的 SQL 路徑
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DateTimeField, F, Max, Q, Sum, Value, When
+from django.dispatch import receiver
+from django.utils import timezone
+
+from member.models import Merchant
+from store.analytics.services.contributions import MONEY, bulk_increment, order_contributions
+from store.analytics.services.date_ranges import created_between
+from store.models import (
+    CustomerLeaderboardEntry, LeaderboardState, Order, OrderItem, ProductLeaderboardEntry
+)
+from store.signals import order_created, order_deleted, order_status_changed, orders_status_changed
+
+LEADERBOARD_STATUSES = (Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED)
+
+
+def leaderboard_windows() -> tuple[int, ...]:
+    return tuple(getattr(settings, "ANALYTICS_LEADERBOARD_WINDOWS", (7, 30, 90)))
+
+
+def window_for(start: date | None, end: date | None, statuses) -> int | None:
+    """
+    查詢可以由排行榜回答時回傳視窗天數，否則 None
+    """
+    if start is None or end is None or end != timezone.localdate():
+        return None
+    if set(statuses) != set(LEADERBOARD_STATUSES):
+        return None
+    days = (end - start).days + 1
+    return days if days in leaderboard_windows() else None
+
+
+def _window_start(as_of, window):
+    return as_of - timedelta(days=window - 1)
+
+
+# ---------------------------------------------------------------------------
+# 重建 / 讀取
+# ---------------------------------------------------------------------------
+
+def rebuild_leaderboard(merchant_id, window, as_of: date | None = None):
+    """
+    由 raw 資料重建某商家某視窗的排行榜，並把 as_of 設為 as_of（預設今天）
+    """
+    as_of = as_of or timezone.localdate()
+    items = OrderItem.objects.filter(
+        product__store__merchant_id=merchant_id,
+        order__status__in=LEADERBOARD_STATUSES,
+        **created_between("order__created_at", _window_start(as_of, window), as_of),
+    )
+
+    with transaction.atomic():
+        state, _ = LeaderboardState.objects.get_or_create(
+            merchant_id=merchant_id,
+            window=window,
+            defaults={"as_of": date.min, "rebuilt_at": timezone.now()},
+        )
+        # 同時有多個請求要重建時，只讓第一個做
+        state = LeaderboardState.objects.select_for_update().get(pk=state.pk)
+        if state.as_of == as_of:
+            return
+
+        base = {"merchant_id": merchant_id, "window": window}
+        ProductLeaderboardEntry.objects.filter(**base).delete()
+        CustomerLeaderboardEntry.objects.filter(**base).delete()
+
+        ProductLeaderboardEntry.objects.bulk_create([
+            ProductLeaderboardEntry(**base, **row)
+            for row in items.values("product_id").annotate(
+                # revenue 必須先於 quantity，否則 F("quantity") 會指到彙總後的欄位
+                revenue=Sum(F("price_at_purchase") * F("quantity"), output_field=MONEY),
+                quantity=Sum("quantity"),
+                order_count=Count("order", distinct=True),
+            ).order_by()
+        ], batch_size=1000)
+
+        CustomerLeaderboardEntry.objects.bulk_create([
+            CustomerLeaderboardEntry(**base, **row)
+            for row in items.values(member_id=F("order__member_id")).annotate(
+                total_gmv=Sum(F("price_at_purchase") * F("quantity"), output_field=MONEY),
+                order_count=Count("order", distinct=True),
+                last_order_at=Max("order__created_at"),
+            ).order_by()
+        ], batch_size=1000)
+
+        state.as_of = as_of
+        state.rebuilt_at = timezone.now()
+        state.save(update_fields=["as_of", "rebuilt_at"])
+
+
+def rebuild_leaderboards(*, merchant_ids=None, windows=None, as_of: date | None = None) -> int:
+    """
+    重建所有（或指定）商家、所有（或指定）視窗的排行榜，回傳重建的排行榜數；已是 as_of 的會跳過
+    """
+    as_of = as_of or timezone.localdate()
+    if merchant_ids is None:
+        merchant_ids = Merchant.objects.order_by("id").values_list("id", flat=True)
+    count = 0
+    for merchant_id in merchant_ids:
+        for window in windows or leaderboard_windows():
+            rebuild_leaderboard(merchant_id, window, as_of)
+            count += 1
+    return count
+
+
+def _is_fresh(merchant_id, window):
+    return LeaderboardState.objects.filter(merchant_id=merchant_id, window=window, as_of=timezone.localdate()).exists()
+
+
+def top_products(*, merchant, window, limit):
+    """
+    與 build_top_products 相同格式；排行榜還沒重建到今天時回傳 None
+    """
+    if not _is_fresh(merchant.id, window):
+        return None
+    return list(
+        ProductLeaderboardEntry.objects.filter(merchant=merchant, window=window, order_count__gt=0)
+        .order_by("-quantity", "product_id")
+        .values("product_id", "product__name", "quantity", "revenue", "order_count")[:limit]
+    )
+
+
+def top_customers(*, merchant, window, limit):
+    """
+    與 build_top_customers 相同格式；排行榜還沒重建到今天時回傳 None
+    """
+    if not _is_fresh(merchant.id, window):
+        return None
+    rows = (
+        CustomerLeaderboardEntry.objects.filter(merchant=merchant, window=window, order_count__gt=0)
+        .order_by("-total_gmv", "member_id")
+        .values("member_id", "member__user__username", "total_gmv", "order_count", "last_order_at")[:limit]
+    )
+    return [
+        {
+            "order__member_id": row["member_id"],
+            "order__member__user__username": row["member__user__username"],
+            "total_gmv": row["total_gmv"],
+            "order_count": row["order_count"],
+            "last_order_date": timezone.localdate(row["last_order_at"]),
+        }
+        for row in rows
+    ]
+
+
+# ---------------------------------------------------------------------------
+# 增量更新：訂單事件
+# ---------------------------------------------------------------------------
+
+def _affected_states(order_ids):
+    """
+    今天已建好、且屬於這些訂單商家的排行榜
+    """
+    return list(LeaderboardState.objects.filter(
+        as_of=timezone.localdate(),
+        merchant_id__in=OrderItem.objects.filter(order_id__in=order_ids).values("product__store__merchant_id"),
+    ).order_by("merchant_id", "window"))
+
+
+def _set_last_order_at(base, values, *, only_later):
+    """
+    一個 UPDATE 設定多位會員的 last_order_at；only_later 時只會往後移
+    """
+    whens = []
+    for member_id, at in values.items():
+        condition = Q(member_id=member_id)
+        if only_later:
+            condition &= Q(last_order_at__lt=at) | Q(last_order_at__isnull=True)
+        whens.append(When(condition, then=Value(at, output_field=DateTimeField())))
+    CustomerLeaderboardEntry.objects.filter(**base, member_id__in=list(values)).update(
+        last_order_at=Case(*whens, default=F("last_order_at"), output_field=DateTimeField()),
+    )
+
+
+def _apply_state(state, orders, contributions, sign):
+    """
+    把 orders 的貢獻以 sign（+1 / -1）套用到一個排行榜；
+    查詢數固定（商品、會員各一次 bulk_create + UPDATE，再一個 UPDATE 調整 last_order_at）
+    """
+    window_start = _window_start(state.as_of, state.window)
+    rows = [
+        row for row in contributions
+        if row["merchant_id"] == state.merchant_id
+        and window_start <= timezone.localdate(orders[row["order_id"]].created_at) <= state.as_of
+    ]
+    if not rows:
+        return
+    base = {"merchant_id": state.merchant_id, "window": state.window}
+
+    products = {}
+    customers = {}
+    for row in rows:
+        order = orders[row["order_id"]]
+        order_count, quantity, revenue = products.get(row["product_id"], (0, 0, 0))
+        products[row["product_id"]] = (order_count + 1, quantity + row["quantity"], revenue + row["revenue"])
+        order_ids, gmv = customers.get(order.member_id, (set(), 0))
+        order_ids.add(order.id)
+        customers[order.member_id] = (order_ids, gmv + row["revenue"])
+
+    bulk_increment(ProductLeaderboardEntry, "product_id", base, {
+        product_id: (
+            {"product_id": product_id},
+            {"order_count": sign * order_count, "quantity": sign * quantity, "revenue": sign * revenue},
+        )
+        for product_id, (order_count, quantity, revenue) in products.items()
+    })
+    bulk_increment(CustomerLeaderboardEntry, "member_id", base, {
+        member_id: ({"member_id": member_id}, {"order_count": sign * len(order_ids), "total_gmv": sign * gmv})
+        for member_id, (order_ids, gmv) in customers.items()
+    })
+
+    if sign > 0:
+        _set_last_order_at(base, {
+            member_id: max(orders[order_id].created_at for order_id in order_ids)
+            for member_id, (order_ids, _) in customers.items()
+        }, only_later=True)
+    else:
+        # 扣回時無法由增量得知上一筆訂單時間，一個分組查詢重新取得這些會員的最後訂單
+        last = dict(
+            Order.objects.filter(
+                member_id__in=list(customers),
+                status__in=LEADERBOARD_STATUSES,
+                items__product__store__merchant_id=state.merchant_id,
+                **created_between("created_at", window_start, state.as_of),
+            )
+            .exclude(pk__in=list(orders))
+            .values("member_id")
+            .annotate(last=Max("created_at"))
+            .values_list("member_id", "last")
+            .order_by()
+        )
+        _set_last_order_at(base, {member_id: last.get(member_id) for member_id in customers}, only_later=False)
+
+
+def _apply_after_commit(orders, sign):
+    """
+    在交易內讀取相關的排行榜與 orders 的貢獻（刪除的訂單在 commit 之後就讀不到明細），
+    commit 之後才以自己的短交易累加；失敗只記錄錯誤，差異由下一次 rebuild_leaderboards 修正
+    """
+    orders = {order.id: order for order in orders}
+    states = _affected_states(list(orders))
+    if not states:
+        return
+    contributions = order_contributions(orders)
+
+    def apply():
+        with transaction.atomic(savepoint=False): # commit 之後執行，一定是最外層的交易
+            for state in states:
+                _apply_state(state, orders, contributions, sign)
+
+    transaction.on_commit(apply, robust=True)
+
+
+@receiver(order_created, dispatch_uid="leaderboards_order_created")
+def leaderboards_order_created(sender, order, **kwargs):
+    if order.status in LEADERBOARD_STATUSES:
+        _apply_after_commit([order], 1)
+
+
+@receiver(order_status_changed, dispatch_uid="leaderboards_order_status_changed")
+def leaderboards_order_status_changed(sender, order, old_status, new_status, **kwargs):
+    counted_before = old_status in LEADERBOARD_STATUSES
+    counted_now = new_status in LEADERBOARD_STATUSES
+    if counted_before != counted_now:
+        _apply_after_commit([order], 1 if counted_now else -1)
+
+
+@receiver(order_deleted, dispatch_uid="leaderboards_order_deleted")
+def leaderboards_order_deleted(sender, order, **kwargs):
+    if order.status in LEADERBOARD_STATUSES:
+        _apply_after_commit([order], -1)
+
+
+@receiver(orders_status_changed, dispatch_uid="leaderboards_orders_status_changed")
+def leaderboards_orders_status_changed(sender, orders, old_status, new_status, **kwargs):
+    counted_before = old_status in LEADERBOARD_STATUSES
+    counted_now = new_status in LEADERBOARD_STATUSES
+    if counted_before != counted_now and orders:
+        _apply_after_commit(orders, 1 if counted_now else -1)
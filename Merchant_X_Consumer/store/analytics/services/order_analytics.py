@@ -3,14 +3,30 @@ from decimal import Decimal
 from dataclasses import dataclass
 
 from django.db.models import (
-    Count, Sum, F, ExpressionWrapper, DecimalField, Max
+    Count, Sum, F, DateField, ExpressionWrapper, DecimalField, Max
 )
-from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.db.models.functions import Coalesce, Trunc, TruncDate
+from django.utils import timezone
 
-from store.models import Order, OrderItem
+from store.models import (
+    Order, OrderItem, MerchantDailySales, MerchantDailyProductSales
+)
+from django.conf import settings
+
+from store.analytics.services import leaderboards
+from store.analytics.services.columnar import OrderItemColumns, columnar_available
+from store.analytics.services.date_ranges import created_between
+from store.analytics.services.sales_rollup import rollup_covers
 from member.models import Merchant
 
 
+def _in_rollup_timezone(merchant) -> bool:
+    """
+    彙總表與排行榜以 settings.TIME_ZONE 的日期儲存，只有商家時區相同時才能用來回答依商家時區切分的區間
+    """
+    return merchant.timezone == settings.TIME_ZONE
+
+
 @dataclass(frozen=True)
 class OrderSummary:
     start: date | None
@@ -28,59 +44,56 @@ def build_order_summary(
     end: date | None = None,
 ) -> OrderSummary:
     """
-    計算某個 Merchant 在指定期間內的訂單總覽
+    計算某個 Merchant 在指定期間內的訂單總覽，日期依商家時區切分
+    共兩個查詢：先讀 SalesRollupState 判斷彙總表是否涵蓋區間，再以一個分組查詢讀彙總表或 raw 資料
+    （商家時區不是預設時區時不讀彙總表，只有 raw 的分組查詢）
     """
 
-    # 先找出那些訂單是「該商家」，當作後面OrderItem的範圍限制
-    order_qs = Order.objects.filter(
-        items__product__store__merchant=merchant
+    if _in_rollup_timezone(merchant) and rollup_covers(start):
+        return _order_summary_from_rollup(merchant=merchant, start=start, end=end)
+
+    # 一個分組查詢同時取得各狀態的訂單數與 GMV：
+    # 每筆訂單只有一個狀態，各狀態的 distinct 訂單數加總即為總訂單數
+    rows = list(
+        OrderItem.objects.filter(
+            product__store__merchant=merchant,
+            **created_between("order__created_at", start, end, merchant.tzinfo),
+        )
+        .values(status=F("order__status"))
+        .annotate(
+            count=Count("order", distinct=True),
+            gmv=Sum(F("price_at_purchase") * F("quantity")),
+        )
+        .order_by("status")
     )
 
-    # 時間區間
-    if start:
-        order_qs = order_qs.filter(created_at__date__gte=start)
-    if end:
-        order_qs = order_qs.filter(created_at__date__lte=end)
+    return _summary_from_status_rows(rows, start=start, end=end)
 
-    # 訂單數
-    order_qs = order_qs.distinct()
-    
-    order_count = order_qs.count()
 
-    # 只拿屬於該商家的商品，而且是出現在這些訂單裡的
-    item_qs = OrderItem.objects.filter(
-        product__store__merchant=merchant,
-        order__in=order_qs, # 限制在剛剛那些訂單內
-    )
-    
-    # GMV
-    gmv = item_qs.aggregate(
-        total=Coalesce(
-            Sum(F("price_at_purchase") * F("quantity")),
-            Decimal("0.00")
-        )
-    )["total"]
-
-    # AOV
+def _summary_from_status_rows(rows, *, start, end) -> OrderSummary:
+    """
+    由各狀態的 (count, gmv) 組出訂單總覽（raw 與彙總表共用）
+    """
+    order_count = sum(row["count"] for row in rows)
+    gmv = sum((row["gmv"] for row in rows), Decimal("0.00"))
     aov = gmv / order_count if order_count > 0 else Decimal("0.00")
 
-    # 訂單狀態分佈
-    status_breakdown = list(
-        order_qs.values("status")
-                .annotate(count=Count("id", distinct=True)) # 避免 Order JOIN OrderItem 後被放大(重複計算)
-                .order_by("status")
-    )
-
     return OrderSummary(
         start=start,
         end=end,
         order_count=order_count,
         gmv=gmv,
         aov=aov,
-        status_breakdown=status_breakdown,
+        status_breakdown=[
+            {"status": row["status"], "count": row["count"]} for row in rows
+        ],
     )
 
 
+TIMESERIES_GROUPINGS = ("hour", "day", "week", "month", "quarter")
+HOURLY_MAX_DAYS = 31 # 逐時分組的區間上限（天）
+
+
 def build_order_timeseries(
         *,
         merchant,
@@ -93,35 +106,34 @@ def build_order_timeseries(
     商家訂單時序分析（可選 status 篩選）
     - 訂單數：distinct Order（符合 status、且包含該商家商品）
     - GMV：只加總該商家商品的銷售額（OrderItem）
+    - 分組（hour / day / week / month / quarter）在資料庫中依商家時區切分；週以星期一開始
     """
 
-    # 先取得該商家的訂單資料
-    order_qs = Order.objects.filter(
-        items__product__store__merchant=merchant,
-        created_at__date__gte=start,
-        created_at__date__lte=end,
-    ).distinct()
+    tz = merchant.tzinfo
 
-    if statuses:
-        order_qs = order_qs.filter(status__in=statuses)
-    
-    order_qs = order_qs.distinct()
+    # 彙總表以 settings.TIME_ZONE 的日期儲存，只有商家時區相同、且不是逐時分組時才能使用
+    if group_by != "hour" and _in_rollup_timezone(merchant) and rollup_covers(start):
+        aggregated = _timeseries_rows_from_rollup(
+            merchant=merchant, start=start, end=end, group_by=group_by, statuses=statuses
+        )
+        return _fill_series(aggregated, start=start, end=end, group_by=group_by)
 
-    # 設定時間分組的方式
-    if group_by == "month":
-        trunc = TruncMonth("order__created_at")
-    else:
-        trunc = TruncDate("order__created_at")
+    if group_by != "hour":
+        columns = _columnar_items(merchant=merchant, start=start, end=end, statuses=statuses, tz=tz)
+        if columns is not None:
+            return columns.timeseries(group_by=group_by, statuses=statuses)
 
-    # 用 OrderItem 算 GMV
+    # 明細本身就只屬於該商家、且在區間內；不需要再以 order__in 子查詢限制訂單
     item_qs = OrderItem.objects.filter(
         product__store__merchant=merchant,
-        order__in=order_qs,
+        **created_between("order__created_at", start, end, tz),
     )
+    if statuses:
+        item_qs = item_qs.filter(order__status__in=statuses)
 
     aggregated = (
         item_qs
-        .annotate(period=trunc)
+        .annotate(period=_period_trunc("order__created_at", group_by, tz))
         .values("period")
         .annotate(
             gmv=Coalesce(
@@ -132,30 +144,73 @@ def build_order_timeseries(
         ).order_by("period")
     )
 
-    # 將所有日期資料轉乘dict, 且都為date物件
-    data_map = {
-        row["period"].date() if isinstance(row["period"], datetime) else row["period"]: 
-        row for row in aggregated
-    }
+    return _fill_series(aggregated, start=start, end=end, group_by=group_by, tz=tz)
 
-    series = []
-    current = start
 
-    # 補齊沒有訂單的日期
-    while current <= end:
-        key = current if group_by == "day" else current.replace(day=1)
-        row = data_map.get(key)
+def _period_trunc(field, group_by, tz):
+    """
+    在資料庫中依 tz 切分期間：hour 回傳 datetime，其餘回傳該期間第一天的 date
+    """
+    if group_by == "hour":
+        return Trunc(field, "hour", tzinfo=tz)
+    return Trunc(field, group_by, output_field=DateField(), tzinfo=tz)
+
 
-        series.append({
-            "date": key,
-            "order_count": row["order_count"] if row else 0,
-            "gmv": row["gmv"] if row else Decimal("0.00"),
-        })
+def _columnar_items(*, merchant, start, end, statuses, tz=None):
+    """
+    區間天數達到 ANALYTICS_COLUMNAR_MIN_DAYS 且已安裝 numpy 時，改用欄式引擎（見 columnar.py）
+    """
+    min_days = getattr(settings, "ANALYTICS_COLUMNAR_MIN_DAYS", None)
+    if min_days is None or not columnar_available():
+        return None
+    if (end - start).days + 1 < min_days:
+        return None
+    return OrderItemColumns.load(merchant=merchant, start=start, end=end, statuses=statuses, tzinfo=tz)
 
-        current += timedelta(days=1 if group_by == "day" else 32)
-        if group_by == "month":
-            current = current.replace(day=1)
 
+def period_keys(start: date, end: date, group_by: str) -> list:
+    """
+    區間內所有期間的起點（一次產生，用來補齊沒有訂單的期間）
+    hour 為當地時間的 naive datetime，其餘為 date
+    """
+    if group_by == "hour":
+        first = datetime.combine(start, datetime.min.time())
+        return [first + timedelta(hours=i) for i in range(((end - start).days + 1) * 24)]
+    if group_by == "week":
+        first = start - timedelta(days=start.weekday())
+        return [first + timedelta(weeks=i) for i in range((end - first).days // 7 + 1)]
+    if group_by in ("month", "quarter"):
+        step = 3 if group_by == "quarter" else 1
+        first = start.year * 12 + (start.month - 1) // step * step
+        last = end.year * 12 + end.month - 1
+        return [date(i // 12, i % 12 + 1, 1) for i in range(first, last + 1, step)]
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def period_key(value, group_by, tz=None):
+    """
+    把資料庫回傳的期間值轉成 period_keys() 的格式
+    """
+    if group_by == "hour":
+        return timezone.localtime(value, tz).replace(tzinfo=None) if timezone.is_aware(value) else value
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _fill_series(aggregated, *, start, end, group_by, tz=None):
+    data_map = {period_key(row["period"], group_by, tz): row for row in aggregated}
+    empty = {"order_count": 0, "gmv": Decimal("0.00")}
+
+    series = []
+    for key in period_keys(start, end, group_by):
+        row = data_map.get(key, empty)
+        point = {
+            "date": key.date() if group_by == "hour" else key,
+            "order_count": row["order_count"],
+            "gmv": row["gmv"],
+        }
+        if group_by == "hour":
+            point["hour"] = key.hour
+        series.append(point)
     return series
 
 
@@ -168,17 +223,35 @@ def build_top_products(
     statuses: list[str] | None = None,    
 ):
     """
-    熱門商品分析
+    熱門商品分析，日期依商家時區切分
+    「今天往前 7 / 30 / 90 天」由排行榜回答（見 leaderboards.py；當天還沒重建時同其他區間），其他區間走彙總表或 raw 查詢；
+    商家時區不是預設時區時不使用排行榜與彙總表
     """
 
     if statuses is None:
         statuses = [Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED]
+    tz = merchant.tzinfo
+    in_rollup_timezone = _in_rollup_timezone(merchant)
+
+    window = leaderboards.window_for(start, end, statuses) if in_rollup_timezone else None
+    if window is not None:
+        rows = leaderboards.top_products(merchant=merchant, window=window, limit=limit)
+        if rows is not None:
+            return rows
+
+    if in_rollup_timezone and rollup_covers(start):
+        return _top_products_from_rollup(
+            merchant=merchant, start=start, end=end, limit=limit, statuses=statuses
+        )
+
+    columns = _columnar_items(merchant=merchant, start=start, end=end, statuses=statuses, tz=tz)
+    if columns is not None:
+        return columns.top_products(limit=limit, statuses=statuses)
 
     qs = OrderItem.objects.filter(
         product__store__merchant=merchant,
-        order__created_at__date__gte=start,
-        order__created_at__date__lte=end,
         order__status__in=statuses,
+        **created_between("order__created_at", start, end, tz),
     )
 
     qs = qs.annotate(
@@ -197,7 +270,7 @@ def build_top_products(
             quantity=Coalesce(Sum("quantity"), 0),
             revenue=Coalesce(Sum("revenue_item"), Decimal("0.00")),
             order_count=Count("order", distinct=True),
-        ).order_by("-quantity")[:limit]
+        ).order_by("-quantity", "product_id")[:limit]
     )
 
     return list(aggregated)
@@ -212,17 +285,28 @@ def build_top_customers(
         statuses: list[str] | None = None,
 ):
     """
-    熟客分析
+    熟客分析，日期（含 last_order_date）依商家時區切分
+    「今天往前 7 / 30 / 90 天」由排行榜回答（見 leaderboards.py；當天還沒重建、或商家時區不是預設時區時走 SQL）
     """
     
     if statuses is None:
         statuses = [Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED]
+    tz = merchant.tzinfo
+
+    window = leaderboards.window_for(start, end, statuses) if _in_rollup_timezone(merchant) else None
+    if window is not None:
+        rows = leaderboards.top_customers(merchant=merchant, window=window, limit=limit)
+        if rows is not None:
+            return rows
+
+    columns = _columnar_items(merchant=merchant, start=start, end=end, statuses=statuses, tz=tz)
+    if columns is not None:
+        return columns.top_customers(limit=limit, statuses=statuses)
 
     qs = OrderItem.objects.filter(
         product__store__merchant=merchant,
-        order__created_at__date__gte=start,
-        order__created_at__date__lte=end,
         order__status__in=statuses,
+        **created_between("order__created_at", start, end, tz),
     )
     
     qs = qs.annotate(
@@ -240,11 +324,72 @@ def build_top_customers(
         .annotate(
             total_gmv=Coalesce(Sum("item_gmv"), Decimal("0.00")),
             order_count=Count("order_id", distinct=True),
-            last_order_date=TruncDate(Max("order__created_at")),
-        ).order_by("-total_gmv")[:limit]
+            last_order_date=TruncDate(Max("order__created_at"), tzinfo=tz),
+        ).order_by("-total_gmv", "order__member_id")[:limit]
     )
 
     return list(aggregated)
 
 
+# ---------------------------------------------------------------------------
+# 彙總表讀取路徑（查詢區間被 MerchantDailySales 涵蓋時使用）
+# 熟客分析需要會員維度，彙總表沒有，仍走 raw 查詢
+# ---------------------------------------------------------------------------
+
+def _order_summary_from_rollup(*, merchant, start, end) -> OrderSummary:
+    qs = MerchantDailySales.objects.filter(merchant=merchant)
+    if start:
+        qs = qs.filter(day__gte=start)
+    if end:
+        qs = qs.filter(day__lte=end)
+
+    rows = list(
+        qs.values("status")
+          .annotate(count=Sum("order_count"), gmv=Sum("gmv"))
+          .filter(count__gt=0)
+          .order_by("status")
+    )
+
+    return _summary_from_status_rows(rows, start=start, end=end)
+
+
+def _timeseries_rows_from_rollup(*, merchant, start, end, group_by, statuses):
+    qs = MerchantDailySales.objects.filter(
+        merchant=merchant,
+        day__gte=start,
+        day__lte=end,
+    )
+    if statuses:
+        qs = qs.filter(status__in=statuses)
+
+    period = F("day") if group_by == "day" else Trunc("day", group_by, output_field=DateField())
+
+    return (
+        qs.annotate(period=period)
+          .values("period")
+          .annotate(
+              gmv=Coalesce(Sum("gmv"), Decimal("0.00")),
+              order_count=Coalesce(Sum("order_count"), 0),
+          ).order_by("period")
+    )
+
 
+def _top_products_from_rollup(*, merchant, start, end, limit, statuses):
+    aggregated = (
+        MerchantDailyProductSales.objects.filter(
+            merchant=merchant,
+            day__gte=start,
+            day__lte=end,
+            status__in=statuses,
+        )
+        .values("product_id", "product__name")
+        .annotate(
+            quantity=Coalesce(Sum("quantity"), 0),
+            revenue=Coalesce(Sum("revenue"), Decimal("0.00")),
+            order_count=Coalesce(Sum("order_count"), 0),
+        )
+        .filter(quantity__gt=0)
+        .order_by("-quantity", "product_id")[:limit]
+    )
+
+    return list(aggregated)
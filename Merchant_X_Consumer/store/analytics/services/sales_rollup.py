@@ -0,0 +1,317 @@
+"""
+商家每日銷售彙總表（MerchantDailySales / MerchantDailyProductSales）
+
+- 增量更新：訂閱 store.signals 的訂單事件，在交易內讀取訂單的貢獻，commit 之後才以自己的短交易累加彙總數字；
+  結帳 / 狀態轉換的交易不會鎖住彙總列，同一商家的訂單不必排隊等同一列（交易回滾時不套用）。
+  commit 之後的累加失敗只記錄錯誤、不影響已成立的訂單，差異由 check_sales_rollup / backfill_sales_rollup 修正
+- 回填：backfill_sales_rollup()，由 raw 資料重新計算並標記涵蓋範圍
+- 一致性檢查：check_sales_rollup()，比對彙總表與 raw 資料
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.dispatch import receiver
+from django.utils import timezone
+
+from store.analytics.services.contributions import MONEY, bulk_increment, order_contributions
+from store.analytics.services.date_ranges import created_between
+from store.models import (
+    MerchantDailyProductSales, MerchantDailySales, OrderItem, SalesRollupState
+)
+from store.signals import order_created, order_deleted, order_status_changed, orders_status_changed
+
+CENT = Decimal("0.01")
+
+
+# ---------------------------------------------------------------------------
+# 增量更新
+# ---------------------------------------------------------------------------
+
+def _apply_rows(day, rows, status, sign):
+    """
+    把同一天多筆訂單的貢獻（rows 需含 order_id）累加到彙總表
+    """
+    if not rows:
+        return
+
+    base = {"day": day, "status": status}
+
+    merchants = {}
+    products = {}
+    for row in rows:
+        orders, gmv = merchants.get(row["merchant_id"], (set(), Decimal("0")))
+        orders.add(row["order_id"])
+        merchants[row["merchant_id"]] = (orders, gmv + row["revenue"])
+
+        merchant_id, orders, quantity, revenue = products.get(
+            row["product_id"], (row["merchant_id"], set(), 0, Decimal("0"))
+        )
+        orders.add(row["order_id"])
+        products[row["product_id"]] = (merchant_id, orders, quantity + row["quantity"], revenue + row["revenue"])
+
+    bulk_increment(MerchantDailySales, "merchant_id", base, {
+        merchant_id: (
+            {"merchant_id": merchant_id},
+            {"order_count": sign * len(orders), "gmv": sign * gmv},
+        )
+        for merchant_id, (orders, gmv) in merchants.items()
+    })
+
+    bulk_increment(MerchantDailyProductSales, "product_id", base, {
+        product_id: (
+            {"merchant_id": merchant_id, "product_id": product_id},
+            {
+                "order_count": sign * len(orders),
+                "quantity": sign * quantity,
+                "revenue": sign * revenue,
+            },
+        )
+        for product_id, (merchant_id, orders, quantity, revenue) in products.items()
+    })
+
+
+def _apply_after_commit(changes):
+    """
+    changes: [(day, rows, status, sign)]；目前的交易 commit 之後在一個短交易中依序累加
+    同一天的舊狀態先於新狀態，依狀態轉換的順序上鎖，並行的累加不會互相死結
+    """
+    changes = [change for change in changes if change[1]]
+    if not changes:
+        return
+
+    def apply():
+        with transaction.atomic(savepoint=False): # commit 之後執行，一定是最外層的交易
+            for day, rows, status, sign in changes:
+                _apply_rows(day, rows, status, sign)
+
+    transaction.on_commit(apply, robust=True)
+
+
+@receiver(order_created, dispatch_uid="sales_rollup_order_created")
+def rollup_order_created(sender, order, **kwargs):
+    day = timezone.localdate(order.created_at)
+    _apply_after_commit([(day, order_contributions([order.id]), order.status, 1)])
+
+
+@receiver(order_status_changed, dispatch_uid="sales_rollup_order_status_changed")
+def rollup_order_status_changed(sender, order, old_status, new_status, **kwargs):
+    if old_status == new_status:
+        return
+    day = timezone.localdate(order.created_at)
+    rows = order_contributions([order.id])
+    _apply_after_commit([(day, rows, old_status, -1), (day, rows, new_status, 1)])
+
+
+@receiver(order_deleted, dispatch_uid="sales_rollup_order_deleted")
+def rollup_order_deleted(sender, order, **kwargs):
+    # 刪除前讀取貢獻（OrderItem 仍存在），commit 之後扣除
+    day = timezone.localdate(order.created_at)
+    _apply_after_commit([(day, order_contributions([order.id]), order.status, -1)])
+
+
+@receiver(orders_status_changed, dispatch_uid="sales_rollup_orders_status_changed")
+def rollup_orders_status_changed(sender, orders, old_status, new_status, **kwargs):
+    if old_status == new_status or not orders:
+        return
+    tz = timezone.get_current_timezone() # 只取一次，不必每筆訂單都查 thread-local
+    days = {order.id: timezone.localdate(order.created_at, tz) for order in orders}
+    rows_by_day = {}
+    # 一個查詢取得所有訂單的貢獻，再依訂單日期分組
+    for row in order_contributions(days):
+        rows_by_day.setdefault(days[row["order_id"]], []).append(row)
+
+    changes = []
+    for day, rows in sorted(rows_by_day.items()):
+        changes += [(day, rows, old_status, -1), (day, rows, new_status, 1)]
+    _apply_after_commit(changes)
+
+
+# ---------------------------------------------------------------------------
+# 從 raw 資料計算（回填 / 一致性檢查共用）
+# ---------------------------------------------------------------------------
+
+def _raw_items(*, merchant=None, start=None, end=None):
+    qs = OrderItem.objects.all()
+    if merchant:
+        qs = qs.filter(product__store__merchant=merchant)
+    return qs.filter(**created_between("order__created_at", start, end))
+
+
+def _raw_daily_rows(items):
+    return (
+        items.values(
+            merchant_id=F("product__store__merchant_id"),
+            day=TruncDate("order__created_at"),
+            status=F("order__status"),
+        )
+        .annotate(
+            order_count=Count("order", distinct=True),
+            gmv=Sum(F("price_at_purchase") * F("quantity"), output_field=MONEY),
+        )
+        .order_by()
+    )
+
+
+def _raw_product_rows(items):
+    return (
+        items.values(
+            "product_id",
+            merchant_id=F("product__store__merchant_id"),
+            day=TruncDate("order__created_at"),
+            status=F("order__status"),
+        )
+        .annotate(
+            order_count=Count("order", distinct=True),
+            revenue=Sum(F("price_at_purchase") * F("quantity"), output_field=MONEY),
+            quantity=Sum("quantity"),
+        )
+        .order_by()
+    )
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def backfill_sales_rollup(*, start: date | None = None, batch_size: int = 1000) -> dict:
+    """
+    由 raw 資料重建 start（含）之後的彙總，並更新涵蓋範圍
+    start 為 None 時重建全部歷史
+    """
+    items = _raw_items(start=start)
+    counts = {"daily": 0, "product": 0}
+
+    with transaction.atomic():
+        daily_qs = MerchantDailySales.objects.all()
+        product_qs = MerchantDailyProductSales.objects.all()
+        if start:
+            daily_qs = daily_qs.filter(day__gte=start)
+            product_qs = product_qs.filter(day__gte=start)
+        daily_qs.delete()
+        product_qs.delete()
+
+        for batch in _batched(_raw_daily_rows(items).iterator(chunk_size=batch_size), batch_size):
+            MerchantDailySales.objects.bulk_create([MerchantDailySales(**row) for row in batch])
+            counts["daily"] += len(batch)
+
+        for batch in _batched(_raw_product_rows(items).iterator(chunk_size=batch_size), batch_size):
+            MerchantDailyProductSales.objects.bulk_create(
+                [MerchantDailyProductSales(**row) for row in batch]
+            )
+            counts["product"] += len(batch)
+
+        state = SalesRollupState.objects.select_for_update().first()
+        if state is None:
+            state = SalesRollupState(covered_from=start)
+        elif start is None or (state.covered_from is not None and start < state.covered_from):
+            state.covered_from = start
+        state.backfilled_at = timezone.now()
+        state.save()
+
+    return counts
+
+
+def rollup_covers(start: date | None) -> bool:
+    """
+    查詢區間是否完全落在彙總表的涵蓋範圍內
+    """
+    state = SalesRollupState.objects.first()
+    if state is None:
+        return False
+    if state.covered_from is None:
+        return True
+    return start is not None and start >= state.covered_from
+
+
+# ---------------------------------------------------------------------------
+# 一致性檢查
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class RollupMismatch:
+    table: str
+    key: tuple
+    expected: dict
+    actual: dict
+
+
+def _normalize(values):
+    # 彙總列歸零後與「不存在」視為相同；金額統一到分
+    normalized = {
+        field: value.quantize(CENT) if isinstance(value, Decimal) else value
+        for field, value in values.items()
+    }
+    return normalized if any(normalized.values()) else None
+
+
+def _diff(table, expected_rows, actual_rows, key_fields, value_fields):
+    def index(rows):
+        result = {}
+        for row in rows:
+            values = _normalize({field: row[field] for field in value_fields})
+            if values:
+                result[tuple(row[field] for field in key_fields)] = values
+        return result
+
+    expected = index(expected_rows)
+    actual = index(actual_rows)
+    empty = {field: 0 for field in value_fields}
+
+    return [
+        RollupMismatch(
+            table=table,
+            key=key,
+            expected=expected.get(key, empty),
+            actual=actual.get(key, empty),
+        )
+        for key in sorted(expected.keys() | actual.keys(), key=str)
+        if expected.get(key) != actual.get(key)
+    ]
+
+
+def check_sales_rollup(
+    *,
+    merchant=None,
+    start: date | None = None,
+    end: date | None = None,
+) -> list[RollupMismatch]:
+    """
+    比對彙總表與 raw OrderItem / Order，回傳所有不一致的列
+    """
+    items = _raw_items(merchant=merchant, start=start, end=end)
+
+    daily_qs = MerchantDailySales.objects.all()
+    product_qs = MerchantDailyProductSales.objects.all()
+    if merchant:
+        daily_qs = daily_qs.filter(merchant=merchant)
+        product_qs = product_qs.filter(merchant=merchant)
+    if start:
+        daily_qs = daily_qs.filter(day__gte=start)
+        product_qs = product_qs.filter(day__gte=start)
+    if end:
+        daily_qs = daily_qs.filter(day__lte=end)
+        product_qs = product_qs.filter(day__lte=end)
+
+    daily_keys = ("merchant_id", "day", "status")
+    product_keys = ("merchant_id", "day", "status", "product_id")
+
+    return _diff(
+        "daily",
+        _raw_daily_rows(items),
+        daily_qs.values(*daily_keys, "order_count", "gmv"),
+        daily_keys,
+        ("order_count", "gmv"),
+    ) + _diff(
+        "product",
+        _raw_product_rows(items),
+        product_qs.values(*product_keys, "order_count", "quantity", "revenue"),
+        product_keys,
+        ("order_count", "quantity", "revenue"),
+    )
@@ -0,0 +1,162 @@
+import pytest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from store.analytics.services import analytics_cache
+from store.analytics.services.analytics_cache import HISTORY, LIVE
+from store.serializers import OrderCreateSerializer
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+def create_order(member, product, quantity=1):
+    serializer = OrderCreateSerializer(data={
+        "receiver_name": "王小明",
+        "receiver_phone": "0912345678",
+        "address": "高雄市",
+        "items": [{"product": product.id, "quantity": quantity}],
+    })
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(member=member)
+
+
+def paid_gmv(client, start, end):
+    series = client.get(
+        f"/store/merchant/analytics/timeseries/?start={start}&end={end}"
+    ).data["series"]
+    return sum(Decimal(point["gmv"]) for point in series)
+
+
+def summary(client, start, end):
+    return client.get(
+        f"/store/merchant/analytics/order_summary/?start={start}&end={end}"
+    ).data
+
+
+@pytest.fixture
+def merchant_client():
+    merchant = MerchantFactory()
+    client = APIClient()
+    client.force_authenticate(user=merchant.user)
+    return merchant, client
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cached_summary_is_served_without_queries(merchant_client, django_assert_num_queries):
+    merchant, client = merchant_client
+    today = timezone.localdate()
+
+    first = summary(client, today - timedelta(days=7), today)
+
+    with django_assert_num_queries(1):  # 只剩查商家
+        second = summary(client, today - timedelta(days=7), today)
+
+    assert first == second
+
+
+@pytest.mark.django_db(transaction=True)
+def test_new_order_invalidates_live_range_only(merchant_client):
+    """
+    今天的新訂單只讓包含今天的區間失效，已結束的區間維持快取
+    """
+    merchant, client = merchant_client
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("100.00"), stock=10)
+    today = timezone.localdate()
+    last_week = (today - timedelta(days=14), today - timedelta(days=7))
+
+    old = OrderFactory(member=member, set_created_at=timezone.now() - timedelta(days=10))
+    OrderItemFactory(order=old, product=product)
+
+    assert summary(client, today - timedelta(days=30), today)["order_count"] == 1
+    assert summary(client, *last_week)["order_count"] == 1
+
+    create_order(member, product)
+
+    assert summary(client, today - timedelta(days=30), today)["order_count"] == 2
+    assert summary(client, *last_week)["order_count"] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_old_order_status_change_invalidates_historic_range(merchant_client):
+    merchant, client = merchant_client
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("100.00"), stock=10)
+    today = timezone.localdate()
+    last_week = (today - timedelta(days=14), today - timedelta(days=7))
+
+    old = OrderFactory(member=member, set_created_at=timezone.now() - timedelta(days=10))
+    OrderItemFactory(order=old, product=product)
+    assert paid_gmv(client, *last_week) == 0  # 預設只計 paid / completed
+
+    client_member = APIClient()
+    client_member.force_authenticate(user=member.user)
+    res = client_member.post(f"/store/orders/{old.id}/pay/", {}, format="json")
+    assert res.status_code == 200
+
+    assert paid_gmv(client, *last_week) == Decimal("100.00")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_other_merchant_orders_do_not_invalidate(merchant_client):
+    merchant, client = merchant_client
+    other_product = ProductFactory(store=MerchantFactory().store, stock=10)
+    today = timezone.localdate()
+
+    summary(client, today - timedelta(days=7), today)
+    create_order(MemberFactory(), other_product)
+
+    with CaptureQueriesContext(connection) as queries:
+        summary(client, today - timedelta(days=7), today)
+    assert len(queries) == 1  # 仍是快取，只查商家
+
+
+# 2026-03-02 08:00 UTC：台北（伺服器）已是 3/2 16:00，帕果帕果（UTC-11）還是 3/1 21:00；
+# 3/1 12:00 UTC 的訂單在台北是昨天（3/1 20:00），在帕果帕果是今天（3/1 01:00）
+NOW = datetime(2026, 3, 2, 8, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def pago_pago_merchant(monkeypatch):
+    monkeypatch.setattr(timezone, "now", lambda: NOW)
+    return MerchantFactory(timezone="Pacific/Pago_Pago")
+
+
+def versions(merchant):
+    cache = analytics_cache._cache()
+    return {scope: analytics_cache._version(cache, merchant.id, scope) for scope in (HISTORY, LIVE)}
+
+
+@pytest.mark.django_db
+def test_cache_scope_uses_merchant_today(pago_pago_merchant):
+    merchant = pago_pago_merchant
+    # 伺服器的昨天（3/1）是商家的今天：必須帶入 live 版本號
+    key = analytics_cache.cache_key(merchant, "order_summary", start=date(2026, 2, 1), end=date(2026, 3, 1))
+    analytics_cache.bump_version(merchant.id, LIVE)
+    assert analytics_cache.cache_key(merchant, "order_summary", start=date(2026, 2, 1), end=date(2026, 3, 1)) != key
+
+    # 商家的今天以前就結束的區間：只看 history
+    key = analytics_cache.cache_key(merchant, "order_summary", start=date(2026, 2, 1), end=date(2026, 2, 28))
+    analytics_cache.bump_version(merchant.id, LIVE)
+    assert analytics_cache.cache_key(merchant, "order_summary", start=date(2026, 2, 1), end=date(2026, 2, 28)) == key
+
+
+@pytest.mark.django_db
+def test_invalidation_scope_uses_merchant_day(pago_pago_merchant, django_capture_on_commit_callbacks):
+    merchant = pago_pago_merchant
+    order = OrderFactory(set_created_at=datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc))
+    OrderItemFactory(order=order, product=ProductFactory(store=merchant.store))
+    before = versions(merchant)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        analytics_cache.invalidate_on_order_deleted(sender=None, order=order)
+
+    after = versions(merchant)
+    assert after[LIVE] != before[LIVE]
+    assert after[HISTORY] == before[HISTORY]
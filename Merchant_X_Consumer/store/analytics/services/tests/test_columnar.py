@@ -0,0 +1,115 @@
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from store.analytics.services.order_analytics import (
+    build_order_timeseries, build_top_customers, build_top_products)
+from store.models import Order
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+np = pytest.importorskip("numpy")
+
+from store.analytics.services.columnar import OrderItemColumns  # noqa: E402
+
+PAID_OR_COMPLETED = [Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED]
+
+
+def seed(merchant):
+    """
+    跨年度、跨狀態，含會產生 .x5 分的價格與跨午夜的訂單
+    """
+    members = [MemberFactory() for _ in range(3)]
+    products = [
+        ProductFactory(store=merchant.store, price=price)
+        for price in (Decimal("100.00"), Decimal("30.05"), Decimal("0.99"))
+    ]
+    other = ProductFactory(store=MerchantFactory().store, price=Decimal("999.00"))
+    statuses = [
+        Order.StatusChoices.PAID,
+        Order.StatusChoices.COMPLETED,
+        Order.StatusChoices.CANCELED,
+        Order.StatusChoices.PENDING,
+    ]
+
+    created_at = datetime(2024, 12, 30, 23, 30)
+    for i in range(40):
+        order = OrderFactory(
+            member=members[i % 3],
+            status=statuses[i % 4],
+            set_created_at=created_at + timedelta(days=i * 11, hours=i % 5),
+        )
+        OrderItemFactory(order=order, product=products[i % 3], quantity=i % 4 + 1)
+        OrderItemFactory(order=order, product=products[(i + 1) % 3], quantity=1)
+        OrderItemFactory(order=order, product=other, quantity=1)
+
+
+@pytest.fixture
+def merchant():
+    merchant = MerchantFactory()
+    seed(merchant)
+    return merchant
+
+
+START, END = date(2025, 1, 1), date(2026, 2, 10)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("group_by", ["day", "week", "month", "quarter"])
+@pytest.mark.parametrize("statuses", [None, PAID_OR_COMPLETED])
+def test_columnar_timeseries_matches_sql(merchant, group_by, statuses):
+    columns = OrderItemColumns.load(merchant=merchant, start=START, end=END)
+
+    assert columns.timeseries(group_by=group_by, statuses=statuses) == build_order_timeseries(
+        merchant=merchant, start=START, end=END, group_by=group_by, statuses=statuses,
+    )
+
+
+@pytest.mark.django_db
+def test_columnar_weekly_timeseries_starts_on_monday(merchant):
+    columns = OrderItemColumns.load(merchant=merchant, start=START, end=END)
+    daily = columns.timeseries(group_by="day")
+
+    weekly = columns.timeseries(group_by="week")
+
+    assert weekly[0]["date"] == date(2024, 12, 30)  # START 所在週的星期一
+    assert all(point["date"].weekday() == 0 for point in weekly)
+    assert sum(p["gmv"] for p in weekly) == sum(p["gmv"] for p in daily)
+    assert sum(p["order_count"] for p in weekly) == sum(p["order_count"] for p in daily)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("limit", [1, 2, 10])
+def test_columnar_top_products_and_customers_match_sql(merchant, limit):
+    columns = OrderItemColumns.load(merchant=merchant, start=START, end=END)
+
+    assert columns.top_products(limit=limit, statuses=PAID_OR_COMPLETED) == build_top_products(
+        merchant=merchant, start=START, end=END, limit=limit,
+    )
+    assert columns.top_customers(limit=limit, statuses=PAID_OR_COMPLETED) == build_top_customers(
+        merchant=merchant, start=START, end=END, limit=limit,
+    )
+
+
+@pytest.mark.django_db
+def test_builders_use_columnar_engine_for_long_ranges(merchant, settings, django_assert_num_queries):
+    expected = build_order_timeseries(merchant=merchant, start=START, end=END, statuses=PAID_OR_COMPLETED)
+
+    settings.ANALYTICS_COLUMNAR_MIN_DAYS = 365
+    with django_assert_num_queries(2):  # 彙總表涵蓋範圍 + 一次明細
+        series = build_order_timeseries(merchant=merchant, start=START, end=END, statuses=PAID_OR_COMPLETED)
+
+    assert series == expected
+
+
+@pytest.mark.django_db
+def test_columnar_empty_range():
+    merchant = MerchantFactory()
+    columns = OrderItemColumns.load(merchant=merchant, start=date(2026, 1, 1), end=date(2026, 1, 3))
+
+    assert columns.timeseries() == [
+        {"date": date(2026, 1, day), "order_count": 0, "gmv": Decimal("0.00")} for day in (1, 2, 3)
+    ]
+    assert columns.top_products() == []
+    assert columns.top_customers() == []
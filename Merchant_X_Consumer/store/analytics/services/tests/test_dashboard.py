@@ -0,0 +1,148 @@
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+
+from rest_framework.test import APIClient
+
+from store.analytics.services.dashboard import DASHBOARD_METRICS, build_dashboard
+from store.analytics.services.order_analytics import (
+    build_order_summary, build_order_timeseries, build_top_customers, build_top_products)
+from store.analytics.services.sales_rollup import backfill_sales_rollup
+from store.models import Order
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+def seed(merchant):
+    """
+    兩位會員、三個商品、跨日期與狀態的訂單；另有其他商家的商品混在同一筆訂單
+    """
+    alice, bob = MemberFactory(), MemberFactory()
+    a = ProductFactory(store=merchant.store, price=Decimal("100.00"))
+    b = ProductFactory(store=merchant.store, price=Decimal("30.00"))
+    c = ProductFactory(store=merchant.store, price=Decimal("5.00"))
+    other = ProductFactory(store=MerchantFactory().store, price=Decimal("999.00"))
+
+    for member, created_at, status, items in [
+        (alice, datetime(2026, 1, 5, 10), Order.StatusChoices.PAID, [(a, 2), (b, 1), (other, 1)]),
+        (alice, datetime(2026, 1, 5, 23, 30), Order.StatusChoices.COMPLETED, [(c, 7)]),
+        (bob, datetime(2026, 1, 20), Order.StatusChoices.CANCELED, [(a, 9)]),
+        (bob, datetime(2026, 2, 2), Order.StatusChoices.PAID, [(b, 4), (b, 1)]),
+        (bob, datetime(2026, 3, 1), Order.StatusChoices.PAID, [(a, 1)]),  # 區間外
+    ]:
+        order = OrderFactory(member=member, status=status, set_created_at=created_at)
+        for product, quantity in items:
+            OrderItemFactory(order=order, product=product, quantity=quantity)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("group_by", ["hour", "day", "week", "month", "quarter"])
+def test_dashboard_matches_individual_builders(group_by):
+    merchant = MerchantFactory()
+    seed(merchant)
+    start, end = date(2026, 1, 1), date(2026, 2, 28)
+
+    dashboard = build_dashboard(
+        merchant=merchant, start=start, end=end, metrics=list(DASHBOARD_METRICS), group_by=group_by,
+    )
+
+    assert dashboard["summary"] == build_order_summary(merchant=merchant, start=start, end=end)
+    assert dashboard["timeseries"] == build_order_timeseries(
+        merchant=merchant, start=start, end=end, group_by=group_by,
+        statuses=[Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED],
+    )
+    assert dashboard["top_products"] == build_top_products(merchant=merchant, start=start, end=end)
+    assert dashboard["top_customers"] == build_top_customers(merchant=merchant, start=start, end=end)
+
+
+@pytest.mark.django_db
+def test_builders_bucket_days_in_merchant_timezone():
+    """
+    商家時區不是預設時區時，總覽、熱門商品、熟客都與時序一樣依商家當地日期切分，不讀彙總表（預設時區的日期）
+    台北 2026-01-01 10:00 在紐約是 12/31，不在區間內；台北 3/1 00:00 在紐約是 2/28，在區間內
+    """
+    merchant = MerchantFactory()
+    merchant.timezone = "America/New_York"
+    merchant.save()
+    seed(merchant)
+    early = ProductFactory(store=merchant.store, price=Decimal("50.00"))
+    order = OrderFactory(member=MemberFactory(), status=Order.StatusChoices.PAID, set_created_at=datetime(2026, 1, 1, 10))
+    OrderItemFactory(order=order, product=early, quantity=1)
+    backfill_sales_rollup()
+    start, end = date(2026, 1, 1), date(2026, 2, 28)
+
+    summary = build_order_summary(merchant=merchant, start=start, end=end)
+    products = build_top_products(merchant=merchant, start=start, end=end)
+    customers = build_top_customers(merchant=merchant, start=start, end=end)
+    series = build_order_timeseries(
+        merchant=merchant, start=start, end=end, statuses=[Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED],
+    )
+
+    assert (summary.order_count, summary.gmv) == (5, Decimal("1415.00"))
+    assert early.id not in [row["product_id"] for row in products]
+    assert order.member_id not in [row["order__member_id"] for row in customers]
+    assert max(row["last_order_date"] for row in customers) == date(2026, 2, 28)
+    assert sum(point["order_count"] for point in series) == 4
+    assert build_dashboard(merchant=merchant, start=start, end=end, metrics=list(DASHBOARD_METRICS)) == {
+        "summary": summary, "timeseries": series, "top_products": products, "top_customers": customers,
+    }
+
+
+@pytest.mark.django_db
+def test_dashboard_reads_order_items_once(django_assert_num_queries):
+    merchant = MerchantFactory()
+    seed(merchant)
+
+    with django_assert_num_queries(1):
+        build_dashboard(
+            merchant=merchant, start=date(2026, 1, 1), end=date(2026, 2, 28), metrics=list(DASHBOARD_METRICS),
+        )
+
+
+@pytest.mark.django_db
+def test_dashboard_api_returns_requested_metrics_only(django_assert_num_queries):
+    merchant = MerchantFactory()
+    seed(merchant)
+    client = APIClient()
+    client.force_authenticate(user=merchant.user)
+
+    with django_assert_num_queries(2):  # 商家 + 明細
+        res = client.get(
+            "/store/merchant/analytics/dashboard/"
+            "?start=2026-01-01&end=2026-02-28&metrics=summary,top_products&product_limit=1"
+        )
+
+    assert res.status_code == 200
+    assert set(res.data) == {"start", "end", "group_by", "summary", "top_products"}
+    assert res.data["summary"]["order_count"] == 4
+    assert len(res.data["top_products"]) == 1
+
+
+@pytest.mark.django_db
+def test_dashboard_api_limits_products_and_customers_separately():
+    merchant = MerchantFactory()
+    seed(merchant)
+    client = APIClient()
+    client.force_authenticate(user=merchant.user)
+    url = "/store/merchant/analytics/dashboard/?start=2026-01-01&end=2026-02-28&metrics=top_products,top_customers"
+
+    res = client.get(f"{url}&product_limit=1&customer_limit=2")
+    assert res.status_code == 200
+    assert (len(res.data["top_products"]), len(res.data["top_customers"])) == (1, 2)
+
+    res = client.get(f"{url}&customer_limit=1")
+    assert (len(res.data["top_products"]), len(res.data["top_customers"])) == (3, 1) # product_limit 不受影響
+
+    assert client.get(f"{url}&product_limit=x").status_code == 400
+
+
+@pytest.mark.django_db
+def test_dashboard_api_rejects_unknown_metric():
+    merchant = MerchantFactory()
+    client = APIClient()
+    client.force_authenticate(user=merchant.user)
+
+    res = client.get("/store/merchant/analytics/dashboard/?start=2026-01-01&end=2026-01-31&metrics=bogus")
+
+    assert res.status_code == 400
@@ -0,0 +1,223 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from store.analytics.services.leaderboards import rebuild_leaderboards, window_for
+from store.analytics.services.order_analytics import build_top_customers, build_top_products
+from store.models import LeaderboardState, Order, ProductLeaderboardEntry
+from store.serializers import OrderCreateSerializer, OrderUpdateSerializer
+from store.signals import order_deleted
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.user_factory import MerchantFactory, MemberFactory
+from tests.factories.product_factory import ProductFactory
+
+
+def create_order(member, items):
+    serializer = OrderCreateSerializer(data={
+        "receiver_name": "王小明",
+        "receiver_phone": "0912345678",
+        "address": "高雄市",
+        "items": [{"product": p.id, "quantity": q} for p, q in items],
+    })
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(member=member)
+
+
+def change_status(order, status):
+    order.refresh_from_db()
+    updater = OrderUpdateSerializer(order, data={"status": status}, partial=True)
+    updater.is_valid(raise_exception=True)
+    return updater.save()
+
+
+def seed_recent(merchant):
+    """
+    最近 40 天內、跨狀態的訂單（直接寫 raw 資料）
+    """
+    products = [ProductFactory(store=merchant.store, price=Decimal(price), stock=100) for price in ("100.00", "30.00", "5.00")]
+    members = [MemberFactory() for _ in range(3)]
+    now = timezone.now()
+
+    for days_ago, status, member, items in [
+        (0, Order.StatusChoices.PAID, members[0], [(products[0], 1), (products[1], 2)]),
+        (2, Order.StatusChoices.COMPLETED, members[1], [(products[1], 3)]),
+        (5, Order.StatusChoices.CANCELED, members[2], [(products[0], 9)]),
+        (10, Order.StatusChoices.PAID, members[2], [(products[2], 4)]),
+        (35, Order.StatusChoices.COMPLETED, members[0], [(products[0], 5)]),
+    ]:
+        order = OrderFactory(member=member, status=status, set_created_at=now - timedelta(days=days_ago))
+        for product, quantity in items:
+            OrderItemFactory(order=order, product=product, quantity=quantity)
+    return products, members
+
+
+def sql_top(builder, **kwargs):
+    with override_settings(ANALYTICS_LEADERBOARD_WINDOWS=()):
+        return builder(**kwargs)
+
+
+def window(days):
+    end = timezone.localdate()
+    return {"start": end - timedelta(days=days - 1), "end": end}
+
+
+def test_window_for_only_matches_default_statuses_ending_today():
+    today = timezone.localdate()
+    paid_or_completed = [Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED]
+
+    assert window_for(today - timedelta(days=6), today, paid_or_completed) == 7
+    assert window_for(today - timedelta(days=29), today, paid_or_completed) == 30
+    assert window_for(today - timedelta(days=7), today, paid_or_completed) is None
+    assert window_for(today - timedelta(days=7), today - timedelta(days=1), paid_or_completed) is None
+    assert window_for(today - timedelta(days=6), today, [Order.StatusChoices.PAID]) is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("days", [7, 30, 90])
+def test_leaderboard_matches_sql(days):
+    merchant = MerchantFactory()
+    seed_recent(merchant)
+    rebuild_leaderboards(merchant_ids=[merchant.id])
+
+    for builder in (build_top_products, build_top_customers):
+        assert builder(merchant=merchant, limit=10, **window(days)) == sql_top(
+            builder, merchant=merchant, limit=10, **window(days)
+        )
+    assert LeaderboardState.objects.filter(merchant=merchant, window=days).exists()
+
+
+@pytest.mark.django_db
+def test_leaderboard_read_is_limit_rows(django_assert_num_queries):
+    merchant = MerchantFactory()
+    seed_recent(merchant)
+    rebuild_leaderboards(merchant_ids=[merchant.id], windows=[30])
+
+    # 狀態檢查 + 前 N 名
+    with django_assert_num_queries(2):
+        rows = build_top_products(merchant=merchant, limit=2, **window(30))
+    assert len(rows) == 2
+
+
+@pytest.mark.django_db
+def test_leaderboard_is_updated_incrementally_on_status_changes(django_capture_on_commit_callbacks):
+    """
+    付款 → 累加；出貨（離開已付款 / 已完成）→ 扣回；刪除已付款訂單 → 扣回
+    每一步（commit 之後）都與 SQL 結果相同，且不需要重建
+    """
+    merchant = MerchantFactory()
+    products, members = seed_recent(merchant)
+    rebuild_leaderboards(merchant_ids=[merchant.id], windows=[7])
+    rebuilt_at = LeaderboardState.objects.get(merchant=merchant, window=7).rebuilt_at
+
+    def assert_matches_sql():
+        for builder in (build_top_products, build_top_customers):
+            assert builder(merchant=merchant, **window(7)) == sql_top(builder, merchant=merchant, **window(7))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        order = create_order(members[1], [(products[2], 20)])
+    assert_matches_sql()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        change_status(order, Order.StatusChoices.PAID)
+    assert build_top_products(merchant=merchant, limit=1, **window(7))[0]["product_id"] == products[2].id
+    assert build_top_customers(merchant=merchant, limit=1, **window(7))[0]["order__member_id"] == members[1].id
+    assert_matches_sql()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        change_status(order, Order.StatusChoices.SHIPPED)
+    assert_matches_sql()
+
+    paid = Order.objects.filter(member=members[0], status=Order.StatusChoices.PAID).get()
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            order_deleted.send(sender=Order, order=paid)
+            paid.delete()
+    assert_matches_sql()
+
+    assert LeaderboardState.objects.get(merchant=merchant, window=7).rebuilt_at == rebuilt_at
+
+
+@pytest.mark.django_db
+def test_payment_does_not_lock_leaderboard_rows(django_capture_on_commit_callbacks):
+    """
+    付款的交易中不寫排行榜（熱門商品的列不會被每筆付款鎖住），commit 之後才累加；交易回滾時不套用
+    """
+    merchant = MerchantFactory()
+    products, members = seed_recent(merchant)
+    rebuild_leaderboards(merchant_ids=[merchant.id], windows=[7])
+    with django_capture_on_commit_callbacks(execute=True):
+        order = create_order(members[1], [(products[2], 20)])
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        with CaptureQueriesContext(connection) as queries:
+            change_status(order, Order.StatusChoices.PAID)
+    assert not [q for q in queries.captured_queries if "leaderboardentry" in q["sql"]]
+    assert not ProductLeaderboardEntry.objects.filter(product=products[2], window=7).exists()
+
+    for callback in callbacks:
+        callback()
+    assert ProductLeaderboardEntry.objects.get(product=products[2], window=7).quantity == 20
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            change_status(create_order(members[0], [(products[2], 1)]), Order.StatusChoices.PAID)
+            raise RuntimeError("rollback")
+    assert ProductLeaderboardEntry.objects.get(product=products[2], window=7).quantity == 20
+
+
+@pytest.mark.django_db
+def test_stale_leaderboard_falls_back_to_sql_until_rebuilt():
+    """
+    讀取（走從庫）不重建排行榜：過期時改走 SQL，由 rebuild_leaderboards 指令滑動視窗
+    """
+    merchant = MerchantFactory()
+    seed_recent(merchant)
+    rebuild_leaderboards(merchant_ids=[merchant.id], windows=[7])
+
+    # 模擬排行榜停在 5 天前：5 天前的視窗包含 10 天前的訂單
+    state = LeaderboardState.objects.get(merchant=merchant, window=7)
+    state.as_of = timezone.localdate() - timedelta(days=5)
+    state.save()
+    ProductLeaderboardEntry.objects.filter(merchant=merchant, window=7).update(quantity=999)
+    expected = sql_top(build_top_products, merchant=merchant, **window(7))
+
+    with CaptureQueriesContext(connection) as queries:
+        assert build_top_products(merchant=merchant, **window(7)) == expected
+    assert not [q for q in queries.captured_queries if not q["sql"].startswith("SELECT")]
+    state.refresh_from_db()
+    assert state.as_of == timezone.localdate() - timedelta(days=5)
+
+    call_command("rebuild_leaderboards", stdout=StringIO())
+    state.refresh_from_db()
+    assert state.as_of == timezone.localdate()
+    assert LeaderboardState.objects.filter(merchant=merchant).count() == 3
+    assert build_top_products(merchant=merchant, **window(7)) == expected
+    assert not ProductLeaderboardEntry.objects.filter(quantity=999).exists()
+
+
+@pytest.mark.django_db
+def test_read_never_builds_leaderboard():
+    merchant = MerchantFactory()
+    seed_recent(merchant)
+
+    assert build_top_products(merchant=merchant, **window(7)) == sql_top(
+        build_top_products, merchant=merchant, **window(7)
+    )
+    assert not LeaderboardState.objects.exists()
+
+
+@pytest.mark.django_db
+def test_arbitrary_range_uses_sql_path():
+    merchant = MerchantFactory()
+    seed_recent(merchant)
+
+    build_top_products(merchant=merchant, **window(14))
+
+    assert not LeaderboardState.objects.exists()
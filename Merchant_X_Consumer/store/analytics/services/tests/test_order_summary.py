@@ -1,7 +1,13 @@
+import re
+
 import pytest
 from datetime import date, datetime
 from decimal import Decimal
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
 from store.analytics.services.order_analytics import build_order_summary
 from store.models import Order
 from tests.factories.order_factory import OrderFactory, OrderItemFactory
@@ -202,3 +208,54 @@ def test_order_summary_zero_orders():
     assert summary.gmv == Decimal("0.00")
     assert summary.aov == Decimal("0.00")
     assert summary.status_breakdown == []
+
+
+@pytest.mark.django_db
+def test_order_summary_is_one_grouped_query_plus_coverage_check():
+    """
+    訂單數、GMV、狀態分佈在同一個分組查詢取得；另一個查詢是檢查彙總表涵蓋範圍
+    """
+
+    merchant = MerchantFactory()
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"))
+    other_product = ProductFactory(store=MerchantFactory().store, price=Decimal("99.00"))
+
+    for day, status in [(3, Order.StatusChoices.PAID), (4, Order.StatusChoices.PAID), (5, Order.StatusChoices.CANCELED)]:
+        order = OrderFactory(member=member, status=status, set_created_at=datetime(2026, 1, day))
+        OrderItemFactory(order=order, product=product, quantity=2)
+        OrderItemFactory(order=order, product=other_product, quantity=1)  # 其他商家的商品不計入
+
+    with CaptureQueriesContext(connection) as queries:
+        summary = build_order_summary(
+            merchant=merchant,
+            start=date(2026, 1, 1),
+            end=date(2026, 1, 31),
+        )
+
+    tables = [re.search(r'FROM "(\w+)"', q["sql"]).group(1) for q in queries.captured_queries]
+    assert tables == ["store_salesrollupstate", "store_orderitem"]
+
+    assert summary.order_count == 3
+    assert summary.gmv == Decimal("60.00")
+    assert summary.status_breakdown == [
+        {"status": Order.StatusChoices.CANCELED, "count": 1},
+        {"status": Order.StatusChoices.PAID, "count": 2},
+    ]
+
+
+@pytest.mark.django_db
+def test_order_summary_api_returns_status_breakdown():
+    merchant = MerchantFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"))
+    OrderItemFactory(
+        order=OrderFactory(status=Order.StatusChoices.PAID, set_created_at=datetime(2026, 1, 3)),
+        product=product,
+    )
+
+    api_client = APIClient()
+    api_client.force_authenticate(user=merchant.user)
+    res = api_client.get("/store/merchant/analytics/order_summary/?start=2026-01-01&end=2026-01-31")
+
+    assert res.status_code == 200
+    assert res.data["status_breakdown"] == [{"status": Order.StatusChoices.PAID, "count": 1}]
@@ -1,8 +1,8 @@
 import pytest
-from datetime import date, datetime
+from datetime import date, datetime, timezone as dt_timezone
 from decimal import Decimal
 
-from store.analytics.services.order_analytics import build_order_timeseries
+from store.analytics.services.order_analytics import build_order_timeseries, period_keys
 from store.models import Order
 from tests.factories.order_factory import OrderFactory, OrderItemFactory
 from tests.factories.user_factory import MerchantFactory, MemberFactory
@@ -199,3 +199,128 @@ def test_timeseries_month_grouping():
     assert feb["date"] == date(2026, 2, 1)
     assert feb["order_count"] == 1
     assert feb["gmv"] == Decimal("90.00")  # 30 * 3
+
+
+def _paid_item(member, product, created_at, quantity=1):
+    return OrderItemFactory(
+        order=OrderFactory(
+            member=member,
+            status=Order.StatusChoices.PAID,
+            set_created_at=created_at,
+        ),
+        product=product,
+        quantity=quantity,
+    )
+
+
+@pytest.mark.django_db
+def test_timeseries_week_grouping_starts_on_monday():
+    """
+    week 分組：date 為該週星期一；區間開頭不是星期一時，第一週仍從星期一開始
+    """
+
+    merchant = MerchantFactory()
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"))
+
+    _paid_item(member, product, datetime(2026, 1, 7, 12, 0))   # 週三 → 1/5 那週
+    _paid_item(member, product, datetime(2026, 1, 11, 23, 0))  # 週日 → 1/5 那週
+    _paid_item(member, product, datetime(2026, 1, 12, 0, 30))  # 週一 → 1/12 那週
+
+    series = build_order_timeseries(
+        merchant=merchant,
+        start=date(2026, 1, 7),
+        end=date(2026, 1, 20),
+        group_by="week",
+    )
+
+    assert [row["date"] for row in series] == [date(2026, 1, 5), date(2026, 1, 12), date(2026, 1, 19)]
+    assert [row["order_count"] for row in series] == [2, 1, 0]
+
+
+@pytest.mark.django_db
+def test_timeseries_quarter_grouping():
+    merchant = MerchantFactory()
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"))
+
+    _paid_item(member, product, datetime(2026, 2, 10), quantity=1)
+    _paid_item(member, product, datetime(2026, 3, 31, 23, 0), quantity=2)
+    _paid_item(member, product, datetime(2026, 7, 1), quantity=3)
+
+    series = build_order_timeseries(
+        merchant=merchant,
+        start=date(2026, 2, 1),
+        end=date(2026, 8, 31),
+        group_by="quarter",
+    )
+
+    assert [row["date"] for row in series] == [date(2026, 1, 1), date(2026, 4, 1), date(2026, 7, 1)]
+    assert [row["gmv"] for row in series] == [Decimal("30.00"), Decimal("0.00"), Decimal("30.00")]
+
+
+@pytest.mark.django_db
+def test_timeseries_hour_grouping():
+    merchant = MerchantFactory()
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"))
+
+    _paid_item(member, product, datetime(2026, 1, 10, 9, 15))
+    _paid_item(member, product, datetime(2026, 1, 10, 9, 45))
+    _paid_item(member, product, datetime(2026, 1, 10, 23, 59))
+
+    series = build_order_timeseries(
+        merchant=merchant,
+        start=date(2026, 1, 10),
+        end=date(2026, 1, 10),
+        group_by="hour",
+    )
+
+    assert len(series) == 24
+    assert all(row["date"] == date(2026, 1, 10) for row in series)
+    assert [row["hour"] for row in series] == list(range(24))
+    assert series[9]["order_count"] == 2
+    assert series[23]["order_count"] == 1
+    assert sum(row["order_count"] for row in series) == 3
+
+
+@pytest.mark.django_db
+def test_timeseries_buckets_in_merchant_timezone():
+    """
+    商家時區不是預設時區時，日期依商家當地時間切分
+    UTC 2026-01-10 03:00 在紐約是 1/9 22:00，在台北是 1/10 11:00
+    """
+
+    merchant = MerchantFactory()
+    merchant.timezone = "America/New_York"
+    merchant.save()
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"))
+
+    _paid_item(member, product, datetime(2026, 1, 10, 3, 0, tzinfo=dt_timezone.utc))
+
+    series = build_order_timeseries(
+        merchant=merchant,
+        start=date(2026, 1, 9),
+        end=date(2026, 1, 10),
+        group_by="day",
+    )
+    assert [row["order_count"] for row in series] == [1, 0]
+
+    hourly = build_order_timeseries(
+        merchant=merchant,
+        start=date(2026, 1, 9),
+        end=date(2026, 1, 9),
+        group_by="hour",
+    )
+    assert hourly[22]["order_count"] == 1
+
+
+def test_period_keys_cover_range_in_bulk():
+    assert period_keys(date(2026, 1, 1), date(2026, 12, 31), "day")[-1] == date(2026, 12, 31)
+    assert len(period_keys(date(2021, 1, 1), date(2025, 12, 31), "day")) == 1826
+    assert period_keys(date(2025, 11, 15), date(2026, 2, 1), "month") == [
+        date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1),
+    ]
+    assert period_keys(date(2025, 12, 31), date(2026, 1, 1), "quarter") == [date(2025, 10, 1), date(2026, 1, 1)]
+    assert len(period_keys(date(2026, 1, 1), date(2026, 1, 2), "hour")) == 48
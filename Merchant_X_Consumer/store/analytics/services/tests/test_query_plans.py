@@ -0,0 +1,96 @@
+import re
+
+import pytest
+from datetime import date, datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from store.analytics.services.order_analytics import (
+    build_order_summary, build_order_timeseries, build_top_products, build_top_customers)
+from store.models import Order
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.user_factory import MerchantFactory, MemberFactory
+from tests.factories.product_factory import ProductFactory
+
+# 這些熱門路徑上的大表不允許出現全表掃描
+GUARDED_TABLES = ("store_order", "store_orderitem", "store_product")
+
+START, END = date(2026, 1, 1), date(2026, 1, 31)
+
+
+def seed(merchant_count=2, products_per_store=5, orders_per_merchant=40):
+    merchants = [MerchantFactory() for _ in range(merchant_count)]
+    members = [MemberFactory() for _ in range(2)]
+    statuses = [Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED, Order.StatusChoices.CANCELED]
+
+    for merchant in merchants:
+        products = [ProductFactory(store=merchant.store) for _ in range(products_per_store)]
+        for i in range(orders_per_merchant):
+            order = OrderFactory(
+                member=members[i % len(members)],
+                status=statuses[i % len(statuses)],
+                set_created_at=datetime(2025 + i % 2, 1 + i % 12, 1 + i % 28, 12),
+            )
+            OrderItemFactory(order=order, product=products[i % len(products)])
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return merchants[0]
+
+
+def sequential_scans(sql):
+    """
+    回傳查詢計畫中對 GUARDED_TABLES 做全表掃描的那幾行
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # 小資料量時 Postgres 本來就偏好 seq scan；關掉後仍出現代表「沒有可用的索引」
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN " + sql)
+            plan = [row[0] for row in cursor.fetchall()]
+            pattern = re.compile(r"Seq Scan on (\w+)")
+        elif connection.vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = [row[3] for row in cursor.fetchall()]
+            pattern = re.compile(r"^SCAN (\w+)$")  # "SCAN t USING INDEX ..." 屬於索引掃描
+        else:
+            pytest.skip(f"不支援 {connection.vendor} 的查詢計畫檢查")
+
+    return [
+        line for line in plan
+        if (match := pattern.search(line.strip())) and match.group(1) in GUARDED_TABLES
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("builder, kwargs", [
+    (build_order_summary, {}),
+    (build_order_timeseries, {"group_by": "day", "statuses": ["paid", "completed"]}),
+    (build_order_timeseries, {"group_by": "month"}),
+    (build_top_products, {}),
+    (build_top_customers, {}),
+])
+def test_analytics_queries_do_not_sequential_scan(builder, kwargs):
+    merchant = seed()
+
+    with CaptureQueriesContext(connection) as ctx:
+        builder(merchant=merchant, start=START, end=END, **kwargs)
+
+    selects = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+    assert selects
+
+    for sql in selects:
+        assert sequential_scans(sql) == [], sql
+
+
+@pytest.mark.django_db
+def test_member_order_listing_uses_index():
+    seed()
+    member = Order.objects.first().member
+
+    with CaptureQueriesContext(connection) as ctx:
+        list(Order.objects.filter(member=member).order_by("-created_at"))
+
+    sql = ctx.captured_queries[0]["sql"]
+    assert sequential_scans(sql) == [], sql
@@ -0,0 +1,189 @@
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from store.analytics.services.order_analytics import (
+    build_order_summary, build_order_timeseries, build_top_products)
+from store.analytics.services.sales_rollup import (
+    backfill_sales_rollup, check_sales_rollup, rollup_covers)
+from store.models import MerchantDailySales, MerchantDailyProductSales, Order
+from store.serializers import OrderCreateSerializer, OrderUpdateSerializer
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.user_factory import MerchantFactory, MemberFactory
+from tests.factories.product_factory import ProductFactory
+
+
+def create_order(member, items):
+    serializer = OrderCreateSerializer(data={
+        "receiver_name": "王小明",
+        "receiver_phone": "0912345678",
+        "address": "高雄市",
+        "items": [{"product": p.id, "quantity": q} for p, q in items],
+    })
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(member=member)
+
+
+def seed_history(merchant, member):
+    """
+    建立跨日期、跨狀態的歷史訂單（直接寫 raw 資料，不經過增量更新）
+    """
+    product_a = ProductFactory(store=merchant.store, price=Decimal("100.00"))
+    product_b = ProductFactory(store=merchant.store, price=Decimal("30.00"))
+
+    for day, status, items in [
+        (datetime(2026, 1, 5, 10), Order.StatusChoices.PAID, [(product_a, 2), (product_b, 1)]),
+        (datetime(2026, 1, 5, 23, 30), Order.StatusChoices.COMPLETED, [(product_b, 3)]),
+        (datetime(2026, 1, 20), Order.StatusChoices.CANCELED, [(product_a, 1)]),
+        (datetime(2026, 2, 2), Order.StatusChoices.PAID, [(product_a, 1), (product_a, 1)]),
+    ]:
+        order = OrderFactory(member=member, status=status, set_created_at=day)
+        for product, quantity in items:
+            OrderItemFactory(order=order, product=product, quantity=quantity)
+
+
+@pytest.mark.django_db
+def test_rollup_is_updated_on_create_and_status_change(django_capture_on_commit_callbacks):
+    """
+    經由 OrderCreateSerializer / 狀態變更寫入時，彙總表在 commit 之後反映
+    """
+
+    merchant = MerchantFactory()
+    other_merchant = MerchantFactory()
+    member = MemberFactory()
+
+    product = ProductFactory(store=merchant.store, price=Decimal("50.00"), stock=10)
+    other_product = ProductFactory(store=other_merchant.store, price=Decimal("20.00"), stock=10)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        order = create_order(member, [(product, 2), (other_product, 1)])
+    today = timezone.localdate(order.created_at)
+
+    pending = MerchantDailySales.objects.get(merchant=merchant, day=today, status="pending")
+    assert pending.order_count == 1
+    assert pending.gmv == Decimal("100.00")
+
+    other = MerchantDailySales.objects.get(merchant=other_merchant, day=today, status="pending")
+    assert other.gmv == Decimal("20.00")
+
+    order.refresh_from_db()
+    updater = OrderUpdateSerializer(order, data={"status": "paid"}, partial=True)
+    updater.is_valid(raise_exception=True)
+    with django_capture_on_commit_callbacks(execute=True):
+        updater.save()
+
+    pending.refresh_from_db()
+    assert pending.order_count == 0
+    paid = MerchantDailyProductSales.objects.get(
+        merchant=merchant, day=today, status="paid", product=product
+    )
+    assert paid.quantity == 2
+    assert paid.revenue == Decimal("100.00")
+    assert paid.order_count == 1
+
+    assert check_sales_rollup() == []
+
+
+@pytest.mark.django_db
+def test_checkout_does_not_lock_rollup_rows(django_capture_on_commit_callbacks):
+    """
+    結帳交易中不寫彙總表（同一商家的訂單不必排隊等同一列），commit 之後才累加；交易回滾時不套用
+    """
+    merchant = MerchantFactory()
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, price=Decimal("50.00"), stock=10)
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        with CaptureQueriesContext(connection) as queries:
+            create_order(member, [(product, 1)])
+    assert not [q for q in queries.captured_queries if "merchantdaily" in q["sql"]]
+    assert not MerchantDailySales.objects.exists()
+
+    for callback in callbacks:
+        callback()
+    assert MerchantDailySales.objects.get(merchant=merchant, status="pending").order_count == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            create_order(member, [(product, 1)])
+            raise RuntimeError("rollback")
+    assert MerchantDailySales.objects.get(merchant=merchant, status="pending").order_count == 1
+    assert check_sales_rollup() == []
+
+
+@pytest.mark.django_db
+def test_builders_read_rollup_when_range_is_covered():
+    """
+    回填後，builder 由彙總表計算的結果要與 raw 查詢完全一致
+    """
+
+    merchant = MerchantFactory()
+    member = MemberFactory()
+    seed_history(merchant, member)
+
+    start, end = date(2026, 1, 1), date(2026, 2, 28)
+    raw = (
+        build_order_summary(merchant=merchant, start=start, end=end),
+        build_order_timeseries(merchant=merchant, start=start, end=end, group_by="day",
+                               statuses=["paid", "completed"]),
+        build_order_timeseries(merchant=merchant, start=start, end=end, group_by="month"),
+        build_top_products(merchant=merchant, start=start, end=end),
+    )
+
+    assert not rollup_covers(start)
+    backfill_sales_rollup()
+    assert rollup_covers(start)
+
+    rolled = (
+        build_order_summary(merchant=merchant, start=start, end=end),
+        build_order_timeseries(merchant=merchant, start=start, end=end, group_by="day",
+                               statuses=["paid", "completed"]),
+        build_order_timeseries(merchant=merchant, start=start, end=end, group_by="month"),
+        build_top_products(merchant=merchant, start=start, end=end),
+    )
+
+    assert rolled == raw
+    assert check_sales_rollup() == []
+
+
+@pytest.mark.django_db
+def test_partial_backfill_only_covers_later_ranges():
+    merchant = MerchantFactory()
+    seed_history(merchant, MemberFactory())
+
+    backfill_sales_rollup(start=date(2026, 2, 1))
+
+    assert rollup_covers(date(2026, 2, 1))
+    assert not rollup_covers(date(2026, 1, 31))
+    assert not rollup_covers(None)
+    assert check_sales_rollup(start=date(2026, 2, 1)) == []
+
+
+@pytest.mark.django_db
+def test_consistency_checker_reports_drift():
+    merchant = MerchantFactory()
+    seed_history(merchant, MemberFactory())
+    backfill_sales_rollup()
+
+    MerchantDailySales.objects.filter(
+        merchant=merchant, day=date(2026, 1, 5), status="paid"
+    ).update(gmv=Decimal("1.00"))
+
+    mismatches = check_sales_rollup(merchant=merchant)
+
+    assert len(mismatches) == 1
+    assert mismatches[0].table == "daily"
+    assert mismatches[0].expected["gmv"] == Decimal("230.00")
+    assert mismatches[0].actual["gmv"] == Decimal("1.00")
+
+    with pytest.raises(CommandError):
+        call_command("check_sales_rollup", merchant=merchant.pk)
+
+    call_command("backfill_sales_rollup")
+    call_command("check_sales_rollup")
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class StoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "store"
+
+    def ready(self):
+        from store import checks  # noqa: F401 # 啟動檢查（ORDER_NUMBER_NODE_ID）
+
+        # 註冊訂單事件的 receiver（見 store/signals.py）：彙總表、快取、排行榜、庫存保留、狀態事件紀錄
+        from store.analytics.services import analytics_cache, leaderboards, sales_rollup  # noqa: F401
+        from store.services import inventory, order_events  # noqa: F401
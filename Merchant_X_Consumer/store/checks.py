@@ -0,0 +1,51 @@
+"""
+啟動檢查（manage.py check / migrate / runserver 會執行）
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+from Merchant_X_Consumer.cache_config import is_shared
+from store.services.order_numbers import SnowflakeOrderNumberAllocator
+
+
+@register()
+def check_order_number_node_id(app_configs, **kwargs):
+    """多台主機 / 容器的 PID 可能相同，沒有明確的節點編號會配發出重複的訂單編號"""
+    node_id = getattr(settings, "ORDER_NUMBER_NODE_ID", None)
+    if node_id is None:
+        return [Error(
+            "沒有設定 ORDER_NUMBER_NODE_ID",
+            hint=f"每台主機 / 每個容器設定不同的環境變數 ORDER_NUMBER_NODE_ID（0~{SnowflakeOrderNumberAllocator.MAX_NODE_ID}）",
+            id="store.E001",
+        )]
+    try:
+        valid = 0 <= int(node_id) <= SnowflakeOrderNumberAllocator.MAX_NODE_ID
+    except (TypeError, ValueError):
+        valid = False
+    if not valid:
+        return [Error(
+            f"ORDER_NUMBER_NODE_ID 必須介於 0 ~ {SnowflakeOrderNumberAllocator.MAX_NODE_ID}（目前為 {node_id!r}）",
+            id="store.E002",
+        )]
+    return []
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """分析快取的版本號與讀寫分離的主庫釘選都存在快取中，每個 worker 各自一份時其他 worker 看不到"""
+    if settings.DEBUG:
+        return []
+    aliases = sorted({
+        "default",
+        getattr(settings, "ANALYTICS_CACHE_ALIAS", "default"),
+        getattr(settings, "REPLICA_PIN_CACHE_ALIAS", "default"),
+    })
+    return [
+        Error(
+            f"快取 {alias!r} 只存在單一行程中（{settings.CACHES[alias]['BACKEND']}）",
+            hint="設定 CACHE_URL=redis://...（多台主機）或 file:///路徑（單一主機），讓所有 worker 共用同一個快取",
+            id="store.E003",
+        )
+        for alias in aliases
+        if not is_shared(settings.CACHES[alias])
+    ]
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from member.models import Merchant
+from store.analytics.services.sales_rollup import check_sales_rollup
+
+
+def parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError('日期格式必須是 YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = '比對商家每日銷售彙總表與 raw 訂單資料是否一致'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--merchant', type=int, help='只檢查指定的 Merchant id')
+        parser.add_argument('--start', help='YYYY-MM-DD')
+        parser.add_argument('--end', help='YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        merchant = None
+        if options['merchant']:
+            merchant = Merchant.objects.filter(pk=options['merchant']).first()
+            if merchant is None:
+                raise CommandError(f"找不到 Merchant {options['merchant']}")
+
+        mismatches = check_sales_rollup(
+            merchant=merchant,
+            start=parse_date(options['start']),
+            end=parse_date(options['end']),
+        )
+
+        for mismatch in mismatches:
+            self.stdout.write(
+                f"[{mismatch.table}] {mismatch.key}: "
+                f"expected={mismatch.expected} actual={mismatch.actual}"
+            )
+
+        if mismatches:
+            raise CommandError(f"彙總表有 {len(mismatches)} 筆不一致")
+
+        self.stdout.write(self.style.SUCCESS('彙總表與 raw 資料一致'))
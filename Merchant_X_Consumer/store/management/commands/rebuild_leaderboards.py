@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from store.analytics.services.leaderboards import leaderboard_windows, rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = '重建商家滾動排行榜到今天（每天午夜之後排程執行；讀取時不會重建）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--merchant', type=int, action='append', dest='merchants', help='只重建指定商家（可重複）')
+        parser.add_argument('--window', type=int, action='append', dest='windows', choices=leaderboard_windows())
+
+    def handle(self, *args, **options):
+        count = rebuild_leaderboards(merchant_ids=options['merchants'], windows=options['windows'])
+        self.stdout.write(self.style.SUCCESS(f"重建完成：{count} 個排行榜"))
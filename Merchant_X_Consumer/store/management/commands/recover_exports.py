@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store.services.exports import fail_stale_exports, pending_export_ids, run_export
+
+
+class Command(BaseCommand):
+    help = '重啟後回復匯出工作：中斷的 running 工作標記失敗，pending 的工作在這個指令中執行（建議部署後與排程執行）'
+
+    def handle(self, *args, **options):
+        failed = fail_stale_exports()
+        pending = pending_export_ids()
+        for job_id in pending:
+            run_export(job_id)
+        self.stdout.write(self.style.SUCCESS(f'已標記 {failed} 筆中斷的匯出為失敗，重新執行 {len(pending)} 筆待處理的匯出'))
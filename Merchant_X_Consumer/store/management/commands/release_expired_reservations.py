@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from store.services.inventory import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = '取消庫存保留已逾期的待付款訂單，並把庫存加回（建議以排程每分鐘執行）'
+
+    def handle(self, *args, **options):
+        canceled = release_expired_reservations()
+        self.stdout.write(self.style.SUCCESS(f'已取消 {canceled} 筆逾期未付款的訂單'))
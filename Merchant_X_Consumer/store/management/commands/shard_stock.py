@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.models import Product
+from store.services.inventory import set_stock_shards
+
+
+class Command(BaseCommand):
+    help = '把熱門商品的庫存分散到多個 shard（--shards 0 表示合併回單列），總庫存不變'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product', type=int, help='Product id')
+        parser.add_argument('--shards', type=int, default=8, help='shard 數量（預設 8）')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['shards'] <= 256:
+            raise CommandError('shard 數量必須介於 0 ~ 256')
+
+        product = Product.objects.filter(pk=options['product']).first()
+        if product is None:
+            raise CommandError(f"找不到 Product {options['product']}")
+
+        product = set_stock_shards(product, options['shards'])
+        mode = f"{product.stock_shards} 個 shard" if product.stock_shards else "單列"
+        self.stdout.write(self.style.SUCCESS(f'{product.name}：庫存 {product.stock}，{mode}'))
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0002_merchant_timezone'),
+        ('store', '0005_order_analytics_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.PositiveSmallIntegerField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('total_gmv', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('last_order_at', models.DateTimeField(null=True)),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='member.member')),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_leaderboard', to='member.merchant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['merchant', 'window', '-total_gmv', 'member'], name='customer_lb_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('merchant', 'window', 'member'), name='uniq_customer_leaderboard_entry')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.PositiveSmallIntegerField()),
+                ('as_of', models.DateField()),
+                ('rebuilt_at', models.DateTimeField()),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_states', to='member.merchant')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('merchant', 'window'), name='uniq_leaderboard_state')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.PositiveSmallIntegerField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_leaderboard', to='member.merchant')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='store.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['merchant', 'window', '-quantity', 'product'], name='product_lb_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('merchant', 'window', 'product'), name='uniq_product_leaderboard_entry')],
+            },
+        ),
+    ]
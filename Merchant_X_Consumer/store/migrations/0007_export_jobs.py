@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('member', '0002_merchant_timezone'),
+        ('store', '0006_leaderboards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(choices=[('orders', 'Orders'), ('items', 'Order items')], max_length=10)),
+                ('format', models.CharField(choices=[('csv', 'CSV (gzip)'), ('parquet', 'Parquet')], default='csv', max_length=10)),
+                ('start', models.DateField()),
+                ('end', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('total_rows', models.IntegerField(blank=True, null=True)),
+                ('rows_written', models.IntegerField(default=0)),
+                ('file_path', models.CharField(blank=True, max_length=255)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='member.merchant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['merchant', '-created_at'], name='export_merchant_created_idx')],
+            },
+        ),
+    ]
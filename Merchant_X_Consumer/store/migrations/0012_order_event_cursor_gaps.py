@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_export_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordereventcursor',
+            name='gaps',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,15 +1,15 @@
-import random
 from decimal import Decimal
 from django.db import models
+from django.utils import timezone
 from datetime import datetime
 from member.models import Member, Merchant
+from store.services.order_numbers import get_order_number_allocator
 
 
 # Create your models here.
 def generate_order_number():
-    today = datetime.now().strftime('%Y%m%d')
-    random_digits = str(random.randint(100000, 999999))
-    return f"ORD{today}-{random_digits}"
+    # 由 settings.ORDER_NUMBER_ALLOCATOR 配發，保證不重複，不需再查資料庫
+    return get_order_number_allocator().allocate()
 
 class Store(models.Model):
     merchant = models.OneToOneField(
@@ -38,7 +38,27 @@ class Product(models.Model):
         max_digits=10, 
         decimal_places=2
     )
-    stock = models.PositiveIntegerField()
+    stock = models.PositiveIntegerField() # 分片模式下是各 shard 的加總快照（見 store/services/inventory.py）
+    stock_shards = models.PositiveSmallIntegerField(default=0) # 0 表示庫存只存在這一列；N 表示分散在 N 個 StockShard
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store', 'id'], name='product_store_id_idx'), # 商店商品列表 / 商家 analytics 的 JOIN
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_stock = instance.__dict__.get('stock')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # 分片模式下，商家修改庫存（stock 與讀出時不同）才重新分配到各 shard
+        if self.stock_shards and self.stock != getattr(self, '_loaded_stock', None):
+            from store.services.inventory import distribute_stock
+            distribute_stock(self)
+        self._loaded_stock = self.stock
     
     @property
     def in_stock(self):
@@ -49,7 +69,7 @@ class Product(models.Model):
     
 
 class Order(models.Model):
-    order_number = models.CharField(max_length=30, unique=True, editable=False)
+    order_number = models.CharField(max_length=32, unique=True, editable=False)
     class StatusChoices(models.TextChoices):
         PENDING = 'pending', 'Pending'
         PAID = 'paid', 'Paid'
@@ -87,13 +107,17 @@ class Order(models.Model):
     )
     transaction_id = models.CharField(max_length=64, null=True, blank=True) # 金流交易編號（只有已付款訂單才會有）
     paid_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'), # analytics: status__in + 時間區間
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'), # 依時間排序 / 區間查詢
+            models.Index(fields=['member', 'created_at'], name='order_member_created_idx'), # 會員訂單列表
+        ]
     
     def save(self, *args, **kwargs):
         if not self.order_number:
-            new_order_number = generate_order_number()
-            while Order.objects.filter(order_number=new_order_number).exists():
-                new_order_number = generate_order_number()
-            self.order_number = new_order_number
+            self.order_number = generate_order_number()
 
         super().save(*args, **kwargs)
      
@@ -111,6 +135,27 @@ class Order(models.Model):
         return f"Order {self.order_number} by {self.member.user.username}"
     
 
+class StockShard(models.Model):
+    """
+    熱門商品的庫存分片：扣庫存時只更新其中一列，避免所有買家競爭同一個 Product 列
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_shard_rows',
+    )
+    index = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'index'], name='uniq_stock_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}#{self.index}: {self.stock}"
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(
         Order, 
@@ -124,9 +169,301 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField(default=1)
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'order'], name='orderitem_product_order_idx'), # 由商品找訂單（商家視角）
+        ]
+
     @property
     def item_subtotal(self):
         return self.price_at_purchase * Decimal(self.quantity)
     
     def __str__(self):
-        return f"{self.quantity} x {self.product.name} @ {self.price_at_purchase} in Order {self.order.id}"
\ No newline at end of file
+        return f"{self.quantity} x {self.product.name} @ {self.price_at_purchase} in Order {self.order.id}"
+
+class MerchantDailySales(models.Model):
+    """
+    商家每日銷售彙總（依訂單狀態分開），由訂單建立 / 狀態變更時增量更新
+    """
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='daily_sales',
+    )
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.StatusChoices.choices)
+    order_count = models.IntegerField(default=0)
+    gmv = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['merchant', 'day', 'status'],
+                name='uniq_merchant_daily_sales',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.day} {self.status}: {self.order_count} / {self.gmv}"
+
+
+class MerchantDailyProductSales(models.Model):
+    """
+    商家每日「各商品」銷售彙總，供熱門商品分析使用
+    """
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='daily_product_sales',
+    )
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.StatusChoices.choices)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='daily_sales',
+    )
+    order_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['merchant', 'day', 'status', 'product'],
+                name='uniq_merchant_daily_product_sales',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.day} {self.status} {self.product_id}: {self.quantity}"
+
+
+class SalesRollupState(models.Model):
+    """
+    彙總表的涵蓋範圍（只會有一筆）：
+    covered_from 之後的日期都已回填並持續增量更新；None 代表涵蓋全部歷史
+    """
+    covered_from = models.DateField(null=True, blank=True)
+    backfilled_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"covered from {self.covered_from or 'beginning'}"
+
+
+class LeaderboardState(models.Model):
+    """
+    商家「最近 window 天」排行榜的狀態：as_of 為排行榜目前對應的最後一天
+    as_of 不是今天時不使用排行榜，由 rebuild_leaderboards 指令重建（見 store/analytics/services/leaderboards.py）
+    """
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_states',
+    )
+    window = models.PositiveSmallIntegerField() # 天數，例如 7 / 30 / 90
+    as_of = models.DateField()
+    rebuilt_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['merchant', 'window'],
+                name='uniq_leaderboard_state',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.window}d as of {self.as_of}"
+
+
+class ProductLeaderboardEntry(models.Model):
+    """
+    熱門商品排行榜（最近 window 天、已付款 / 已完成的訂單）
+    """
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='product_leaderboard',
+    )
+    window = models.PositiveSmallIntegerField()
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+    )
+    order_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['merchant', 'window', 'product'],
+                name='uniq_product_leaderboard_entry',
+            ),
+        ]
+        indexes = [
+            # 依數量排序取前 N 名
+            models.Index(fields=['merchant', 'window', '-quantity', 'product'], name='product_lb_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.window}d {self.product_id}: {self.quantity}"
+
+
+class CustomerLeaderboardEntry(models.Model):
+    """
+    熟客排行榜（最近 window 天、已付款 / 已完成的訂單）
+    """
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='customer_leaderboard',
+    )
+    window = models.PositiveSmallIntegerField()
+    member = models.ForeignKey(
+        Member,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+    )
+    order_count = models.IntegerField(default=0)
+    total_gmv = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_order_at = models.DateTimeField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['merchant', 'window', 'member'],
+                name='uniq_customer_leaderboard_entry',
+            ),
+        ]
+        indexes = [
+            # 依消費金額排序取前 N 名
+            models.Index(fields=['merchant', 'window', '-total_gmv', 'member'], name='customer_lb_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.window}d {self.member_id}: {self.total_gmv}"
+
+
+class ExportJob(models.Model):
+    """
+    商家訂單 / 訂單明細的匯出工作，由 store/services/exports.py 的背景 worker 產生壓縮檔
+    """
+    class DatasetChoices(models.TextChoices):
+        ORDERS = 'orders', 'Orders'
+        ITEMS = 'items', 'Order items'
+
+    class FormatChoices(models.TextChoices):
+        CSV = 'csv', 'CSV (gzip)'
+        PARQUET = 'parquet', 'Parquet'
+
+    class StatusChoices(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+    )
+    dataset = models.CharField(max_length=10, choices=DatasetChoices.choices)
+    format = models.CharField(max_length=10, choices=FormatChoices.choices, default=FormatChoices.CSV)
+    start = models.DateField()
+    end = models.DateField()
+    status = models.CharField(max_length=10, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    total_rows = models.IntegerField(null=True, blank=True) # 開始匯出時計算
+    rows_written = models.IntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True) # 執行中的 worker 開始與每寫完一批時更新，用來找出中斷的工作
+    file_path = models.CharField(max_length=255, blank=True) # 相對於 EXPORT_ROOT
+    file_size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['merchant', '-created_at'], name='export_merchant_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} {self.dataset} {self.start}~{self.end} ({self.status})"
+
+
+class StockReservation(models.Model):
+    """
+    待付款訂單保留的庫存（store/services/inventory.py）
+    建立訂單時扣庫存並建立保留；付款後轉為 committed，取消 / 逾期則釋放並把庫存加回
+    """
+    class StatusChoices(models.TextChoices):
+        ACTIVE = 'active', 'Active'
+        COMMITTED = 'committed', 'Committed'
+        RELEASED = 'released', 'Released'
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_reservations',
+    )
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=StatusChoices.choices, default=StatusChoices.ACTIVE)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='reservation_status_expires_idx'), # 找出逾期的保留
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} {self.product_id} x{self.quantity} ({self.status})"
+
+
+class OrderStatusEvent(models.Model):
+    """
+    訂單狀態變更紀錄（只新增、不修改；見 store/services/order_events.py）
+    訂單含多個商店的商品時，每個商店各一筆，商家可以只讀自己商店的事件；建立訂單時 old_status 為空字串
+    """
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='status_events',
+    )
+    store = models.ForeignKey(
+        Store,
+        on_delete=models.CASCADE,
+        related_name='order_status_events',
+    )
+    old_status = models.CharField(max_length=20, blank=True)
+    new_status = models.CharField(max_length=20, choices=Order.StatusChoices.choices)
+    at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'at'], name='order_event_order_at_idx'), # 單筆訂單的時間軸
+            models.Index(fields=['store', 'at'], name='order_event_store_at_idx'), # 商店在時間區間內的事件
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} {self.old_status or '-'} -> {self.new_status} @ {self.at}"
+
+
+class OrderEventCursor(models.Model):
+    """
+    事件消費者的進度：position 之前（含）的事件除了 gaps 以外都已處理（見 consume_events）
+    """
+    name = models.CharField(max_length=64, unique=True)
+    position = models.BigIntegerField(default=0) # 已處理的最大 OrderStatusEvent.id
+    gaps = models.JSONField(default=dict, blank=True) # position 之前還沒看到的 id → 第一次發現的時間（epoch 秒）
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
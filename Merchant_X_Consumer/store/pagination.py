@@ -0,0 +1,185 @@
+import base64
+import json
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """
+    預設與原本相同的頁碼分頁；帶 ?pagination=cursor（或 ?cursor=...）時改用 keyset 分頁：
+
+    - 以 keyset_ordering 欄位的「上一頁最後一筆」當游標，WHERE 條件取代 OFFSET，
+      翻到多深的頁數成本都一樣
+    - 不做 COUNT(*)，回應只有 next / results
+    - page_size 可由 ?page_size= 調整，上限為 max_page_size
+    - 帶 ?ordering=（OrderingFilter）時以該排序加上 id 當游標；只支援本身、不可為 NULL 的欄位，其他排序回傳 400
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    keyset_ordering = ('id',)
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = '無效的 cursor'
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.use_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        self.ordering = self.get_keyset_ordering(request, queryset)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor, queryset.model)))
+
+        # 多拿一筆，用來判斷是否還有下一頁
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page_results = results[:page_size]
+        return self.page_results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        page_schema = super().get_paginated_response_schema(schema)
+        page_schema['properties']['next']['description'] = (
+            '?pagination=cursor 時只會回傳 next 與 results'
+        )
+        return page_schema
+
+    # -- keyset 實作 -------------------------------------------------------
+
+    def get_keyset_ordering(self, request, queryset):
+        """
+        沒有 ?ordering= 時用 keyset_ordering；有的話沿用 OrderingFilter 已套用的排序，最後補上 id 讓游標唯一
+        """
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            return self.keyset_ordering
+
+        ordering = []
+        for field in queryset.query.order_by:
+            name = field.lstrip('-') if isinstance(field, str) else None
+            if name == 'pk':
+                name = 'id'
+            try:
+                model_field = queryset.model._meta.get_field(name) if name else None
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or not model_field.concrete or model_field.is_relation or model_field.null:
+                raise exceptions.ValidationError({
+                    api_settings.ORDERING_PARAM: f'cursor 分頁不支援依 {field} 排序'
+                })
+            ordering.append(f"{'-' if field.startswith('-') else ''}{name}")
+
+        if not ordering:
+            return self.keyset_ordering
+        if not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return tuple(ordering)
+
+    def _fields(self):
+        return [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in getattr(self, 'ordering', self.keyset_ordering)
+        ]
+
+    def _after(self, values):
+        """
+        (a, b) 之後的資料：a <op> va OR (a = va AND b <op> vb) ...
+        <op> 依排序方向為 lt（新到舊）或 gt（舊到新）
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, instance):
+        values = []
+        for name, _ in self._fields():
+            value = getattr(instance, name)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = self._fields()
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        decoded = []
+        for (name, _), value in zip(fields, values):
+            try:
+                value = model._meta.get_field(name).to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            decoded.append(value)
+        return decoded
+
+    def get_next_cursor_link(self):
+        if not self.has_next or not self.page_results:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        url = replace_query_param(url, self.mode_query_param, 'cursor')
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.page_results[-1])
+        )
+
+
+class OrderPagination(OptionalKeysetPagination):
+    keyset_ordering = ('-created_at', '-id') # 與訂單列表預設排序相同：新到舊
+    max_page_size = 100
+
+
+class ProductPagination(OptionalKeysetPagination):
+    keyset_ordering = ('id',)
+    max_page_size = 100
+
+
+class ProductInfoPagination(ProductPagination):
+    """商品統計端點的商品清單一律使用 keyset 分頁（統計數字已另外計算，不需要 COUNT）"""
+
+    def use_keyset(self, request):
+        return True
+
+
+class StorePagination(OptionalKeysetPagination):
+    keyset_ordering = ('id',)
+    max_page_size = 50
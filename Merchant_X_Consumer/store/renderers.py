@@ -0,0 +1,44 @@
+"""
+CSV 輸出
+
+- CSVRenderer：讓 ?format=csv / Accept: text/csv 通過 DRF 的內容協商；
+  大量資料由 view 直接回傳 StreamingHttpResponse，這個 renderer 只會處理錯誤訊息之類的小型資料
+- stream_csv()：把 header 與逐列資料轉成 CSV 字串片段，給 StreamingHttpResponse 使用，記憶體不隨列數成長
+"""
+import csv
+from itertools import islice
+
+from rest_framework.renderers import BaseRenderer
+
+
+class _Echo:
+    """csv.writer 需要 file-like 物件；write() 直接回傳字串，不累積在記憶體"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows, *, batch_size=500):
+    """
+    逐批產生 CSV 字串（每批 batch_size 列合併成一個片段，減少 response 的寫入次數）
+    開頭加上 BOM，Excel 開啟中文才不會亂碼
+    """
+    writer = csv.writer(_Echo())
+    yield "\ufeff" + writer.writerow(header)
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield "".join(writer.writerow(row) for row in batch)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = [data]
+        header = list(data[0]) if data else []
+        return ''.join(stream_csv(header, ([row.get(key) for key in header] for row in data))).encode(self.charset)
@@ -1,12 +1,18 @@
 from django.db import transaction # 用於資料庫交易管理
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from store.models import Store, Product, Order, OrderItem
+from rest_framework.reverse import reverse
+from Merchant_X_Consumer.instrumentation import SerializerTimingMixin
+from store.models import ExportJob, Store, Product, Order, OrderItem
+from store.services.exports import enqueue_export, parquet_available
+from store.services.inventory import InsufficientStock, reserve_stock
+from store.services.order_transitions import BULK_ACTIONS, transition
+from store.signals import order_created
 from datetime import datetime
 from decimal import Decimal
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     store_name = serializers.CharField(source='store.name', read_only=True) # 取得關聯的Store名稱
     class Meta:
         model = Product
@@ -20,11 +26,14 @@ class ProductSerializer(serializers.ModelSerializer):
         return value
 
 
-class StoreSerializer(serializers.ModelSerializer):
-    products = ProductSerializer(many=True, read_only=True) # 取得關聯的產品列表
+class StoreSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    nested_products_limit = 5 # 每間商店最多內嵌幾個商品，完整清單請用 /stores/{id}/products/
+
+    products = serializers.SerializerMethodField() # 取得關聯的產品列表（前幾筆）
     class Meta:
         model = Store
         fields = [
+            'id',
             'merchant', 
             'name', 
             'description',
@@ -35,8 +44,15 @@ class StoreSerializer(serializers.ModelSerializer):
         ] 
         read_only_fields = ["merchant", "created_at"] # 這些欄位為唯讀
 
+    def get_products(self, store):
+        # 列表 / 詳情由 view 預先 prefetch 到 preview_products；其他情況（如新增、修改後回傳）才另外查詢
+        products = getattr(store, 'preview_products', None)
+        if products is None:
+            products = store.products.select_related('store').order_by('id')[:self.nested_products_limit]
+        return ProductSerializer(products, many=True, context=self.context).data
 
-class OrderItemSerializer(serializers.ModelSerializer):
+
+class OrderItemSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name') # 取得關聯的Product名稱
     product_price = serializers.DecimalField(source='product.price', max_digits=10, decimal_places=2) # 取得關聯的Product價格
     class Meta:
@@ -48,7 +64,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
             'item_subtotal'
         ] # 訂單項目小計
 
-class OrderItemCreateSerializer(serializers.ModelSerializer):
+class OrderItemCreateSerializer(SerializerTimingMixin, serializers.ModelSerializer):
         product = serializers.PrimaryKeyRelatedField(
             queryset=Product.objects.all()
         )
@@ -59,7 +75,7 @@ class OrderItemCreateSerializer(serializers.ModelSerializer):
                 'quantity', 
             ]
 
-class OrderCreateSerializer(serializers.ModelSerializer):
+class OrderCreateSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = [
@@ -94,42 +110,53 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         if not orderitem_data:
             raise ValidationError("訂單至少要有一項商品喔！")
 
+        # 同一商品可能出現在多個項目，先彙總每個商品的需求數量
+        requested = {}
+        products = {}
+        for item in orderitem_data:
+            product = item['product'] # 驗證時已載入，不需再查詢
+            products[product.id] = product
+            requested[product.id] = requested.get(product.id, 0) + item['quantity']
+
+        # 先以驗證時讀到的庫存擋掉明顯不足的請求（不上鎖）；真正的檢查在 reserve_stock 的條件式 UPDATE
+        for product_id, quantity in requested.items():
+            product = products[product_id]
+            if product.stock < quantity:
+                raise InsufficientStock(
+                    f"{product.name} 庫存不足(剩餘 {product.stock} )"
+                )
+
+        # 總金額在記憶體中計算，訂單只需寫入一次
+        order_items = []
+        total_amount = Decimal(0)
+        for item in orderitem_data:
+            product = products[item['product'].id]
+            total_amount += product.price * item['quantity']
+            order_items.append(OrderItem(
+                product=product,
+                quantity=item['quantity'],
+                price_at_purchase=product.price,
+            ))
+
         with transaction.atomic():
-            order = Order.objects.create(**validated_data) # 建立主資料訂單(子資料已經被取出，故可以create)
-
-            total_amount = Decimal(0)
-
-            for item in orderitem_data:
-                product = Product.objects.select_for_update().get(
-                    id=item['product'].id
-                ) # 鎖定產品資料以避免競爭條件
-                
-                if product.stock < item['quantity']:
-                    raise ValidationError(
-                        f"{product.name} 庫存不足(剩餘 {product.stock} )"
-                    )
-                
-                price = product.price
-                subtotal = price * item['quantity']
-                total_amount += subtotal
-                
-                product.stock -= item['quantity']
-                product.save()
-
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
-                    quantity=item['quantity'],
-                    price_at_purchase=price,
-                ) # 一筆一筆建立子資料訂單，並連結到主資料訂單
-
-            order.total_amount = total_amount
-            order.save()
+            order = Order.objects.create(
+                **validated_data,
+                total_amount=total_amount,
+            ) # 建立主資料訂單(子資料已經被取出，故可以create)
+
+            for order_item in order_items:
+                order_item.order = order
+            OrderItem.objects.bulk_create(order_items) # 一次建立所有子資料訂單
+
+            order_created.send(sender=Order, order=order)
+
+            # 扣庫存放在交易最後，熱門商品的列只在 UPDATE 到 commit 之間被鎖住
+            reserve_stock(order, products, requested)
 
         return order # 回傳給前端主資料訂單(已經包含子資料訂單)
       
 
-class OrderUpdateSerializer(serializers.ModelSerializer):
+class OrderUpdateSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = [
@@ -141,27 +168,26 @@ class OrderUpdateSerializer(serializers.ModelSerializer):
         ]
 
     def update(self, instance, validated_data):
-        new_status = validated_data.get('status') 
+        # 只寫入有變動的欄位；修改狀態時與其他欄位一起以條件式 UPDATE 寫入（狀態已被其他請求修改時回傳 409）
+        fields = {
+            name: value
+            for name, value in validated_data.items()
+            if name != 'status' and value != getattr(instance, name)
+        }
+        new_status = validated_data.get('status')
         if new_status:
-            if not instance.can_transition(new_status):
-                raise ValidationError(
-                    f"訂單無法從 {instance.status} 改為 {new_status} !"
-                ) # 驗證訂單狀態的轉換正常
-            instance.status = new_status
-        
-        instance.receiver_name = validated_data.get('receiver_name', instance.receiver_name)
-        instance.receiver_phone = validated_data.get('receiver_phone', instance.receiver_phone)
-        instance.address = validated_data.get('address', instance.address)
-        instance.note = validated_data.get('note', instance.note)
-
-        instance.save()
+            transition(instance, new_status, **fields)
+        elif fields:
+            for name, value in fields.items():
+                setattr(instance, name, value)
+            instance.save(update_fields=list(fields))
         return instance
 
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SerializerTimingMixin, serializers.ModelSerializer):
     order_number = serializers.CharField(read_only=True) # 訂單編號
-    member = serializers.IntegerField(source='member.id', read_only=True) 
+    member = serializers.IntegerField(source='member_id', read_only=True) # 直接用外鍵欄位，不必為每筆訂單載入會員
     items = OrderItemSerializer(many=True, read_only=True)
     total_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
@@ -182,59 +208,133 @@ class OrderSerializer(serializers.ModelSerializer):
             'total_amount',
             ]
         
-class ProductInfoSerializer(serializers.Serializer):
-    products = ProductSerializer(many=True) # 產品列表
+class OrderBulkTransitionSerializer(SerializerTimingMixin, serializers.Serializer):
+    MAX_ORDERS = 1000 # 單次批次轉換的訂單數上限
+
+    action = serializers.ChoiceField(choices=list(BULK_ACTIONS))
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_ORDERS,
+    )
+
+
+class OrderBulkTransitionResultSerializer(SerializerTimingMixin, serializers.Serializer):
+    id = serializers.IntegerField()
+    ok = serializers.BooleanField()
+    status = serializers.CharField(allow_null=True) # 轉換後（失敗時為目前）的狀態；找不到訂單時為 null
+    detail = serializers.CharField(allow_blank=True)
+
+
+class ProductInfoSerializer(SerializerTimingMixin, serializers.Serializer):
+    products = ProductSerializer(many=True) # 產品列表（分頁，一次一頁）
     count = serializers.IntegerField() # 總數量
-    max_price = serializers.FloatField() # 最高價格
+    max_price = serializers.FloatField(allow_null=True) # 最高價格
+    next = serializers.CharField(allow_null=True) # 下一頁商品的網址
 
 # Analytics Serializers
-class OrderStatusBreakdownSerializer(serializers.Serializer):
-    sratus = serializers.CharField()
+class OrderStatusBreakdownSerializer(SerializerTimingMixin, serializers.Serializer):
+    status = serializers.CharField()
     count = serializers.IntegerField()
 
-class OrderSummarySerializer(serializers.Serializer):
+class OrderSummarySerializer(SerializerTimingMixin, serializers.Serializer):
     start = serializers.DateField(allow_null=True)
     end = serializers.DateField(allow_null=True)
     order_count = serializers.IntegerField()
     gmv = serializers.DecimalField(max_digits=12, decimal_places=2)
     aov = serializers.DecimalField(max_digits=12, decimal_places=2)
+    status_breakdown = OrderStatusBreakdownSerializer(many=True)
 
 
-class OrderTimeseriesPointSerializer(serializers.Serializer):
+class OrderTimeseriesPointSerializer(SerializerTimingMixin, serializers.Serializer):
     date = serializers.DateField()
+    hour = serializers.IntegerField(required=False) # 只有 group_by=hour 時出現
     order_count = serializers.IntegerField()
     gmv = serializers.DecimalField(max_digits=12, decimal_places=2)
 
-class OrderTimeseriesSerializer(serializers.Serializer):
+class OrderTimeseriesSerializer(SerializerTimingMixin, serializers.Serializer):
     group_by = serializers.CharField()
     start = serializers.DateField()
     end = serializers.DateField()
     series = OrderTimeseriesPointSerializer(many=True)
 
 
-class TopProductSerializer(serializers.Serializer):
+class TopProductSerializer(SerializerTimingMixin, serializers.Serializer):
     product_id = serializers.IntegerField()
     product_name = serializers.CharField(source="product__name")
     order_count = serializers.IntegerField()
     quantity = serializers.IntegerField()
     revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
 
-class TopProductsResponseSerializer(serializers.Serializer):
+class TopProductsResponseSerializer(SerializerTimingMixin, serializers.Serializer):
     start = serializers.DateField()
     end = serializers.DateField()
     limit = serializers.IntegerField()
     top_products = TopProductSerializer(many=True)
 
 
-class TopCustomerSerializer(serializers.Serializer):
+class TopCustomerSerializer(SerializerTimingMixin, serializers.Serializer):
     member_id = serializers.IntegerField(source="order__member_id")
     member_username = serializers.CharField(source="order__member__user__username")
     total_gmv = serializers.DecimalField(max_digits=12, decimal_places=2)
     order_count = serializers.IntegerField()
     last_order_date = serializers.DateField()
 
-class TopCustomersResponseSerializer(serializers.Serializer):
+class TopCustomersResponseSerializer(SerializerTimingMixin, serializers.Serializer):
     start = serializers.DateField()
     end = serializers.DateField()
     limit = serializers.IntegerField()
-    top_customers = TopCustomerSerializer(many=True)
\ No newline at end of file
+    top_customers = TopCustomerSerializer(many=True)
+
+
+class DashboardSerializer(SerializerTimingMixin, serializers.Serializer):
+    # 只回傳有要求的指標（未要求的欄位會被略過）
+    start = serializers.DateField()
+    end = serializers.DateField()
+    group_by = serializers.CharField()
+    summary = OrderSummarySerializer(required=False)
+    timeseries = OrderTimeseriesPointSerializer(many=True, required=False)
+    top_products = TopProductSerializer(many=True, required=False)
+    top_customers = TopCustomerSerializer(many=True, required=False)
+
+
+class ExportJobSerializer(SerializerTimingMixin, serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField() # 0 ~ 1
+    download_url = serializers.SerializerMethodField()
+
+    MAX_DAYS = 366 # 單次匯出的區間上限
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'dataset', 'format', 'start', 'end', 'status',
+            'total_rows', 'rows_written', 'progress', 'file_size', 'error',
+            'created_at', 'finished_at', 'download_url',
+        ]
+        read_only_fields = [
+            'status', 'total_rows', 'rows_written', 'file_size', 'error', 'created_at', 'finished_at',
+        ]
+
+    def validate(self, attrs):
+        if attrs['start'] > attrs['end']:
+            raise ValidationError("start 不能晚於 end")
+        if (attrs['end'] - attrs['start']).days + 1 > self.MAX_DAYS:
+            raise ValidationError(f"匯出區間最多 {self.MAX_DAYS} 天")
+        if attrs.get('format') == ExportJob.FormatChoices.PARQUET and not parquet_available():
+            raise ValidationError("伺服器未安裝 pyarrow，目前只能匯出 csv")
+        return attrs
+
+    def create(self, validated_data):
+        return enqueue_export(**validated_data) # 交易 commit 後由背景 worker 執行
+
+    def get_progress(self, obj):
+        if obj.status == ExportJob.StatusChoices.DONE:
+            return 1.0
+        if not obj.total_rows:
+            return 0.0
+        return round(obj.rows_written / obj.total_rows, 4)
+
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.StatusChoices.DONE:
+            return None
+        return reverse('merchant_exports-download', args=[obj.id], request=self.context.get('request'))
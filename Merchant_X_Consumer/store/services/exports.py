@@ -0,0 +1,311 @@
+"""
+商家匯出工作（ExportJob）
+
+- enqueue_export() 建立工作，交易 commit 後交給本機的執行緒池（EXPORT_WORKERS 個 worker，不需要外部 broker；
+  0 表示在目前的執行緒直接執行）
+- worker 以 iterator(chunk_size=EXPORT_CHUNK_SIZE) 串流讀取，邊讀邊寫入 gzip CSV 或 Parquet（需安裝 pyarrow），
+  每寫完一批就更新 rows_written，狀態 API 可據此回報進度
+- 先寫入 .part 暫存檔，完成後才改名，下載端不會讀到寫到一半的檔案
+- 執行緒池在行程內：重啟 / 部署時排隊中的工作會留在 pending、執行到一半的會停在 running。
+  recover_exports 指令（部署後與排程執行）重新執行 pending 的工作，
+  並把 heartbeat_at 超過 EXPORT_STALE_MINUTES 分鐘沒有更新的 running 工作標記為失敗
+"""
+import csv
+import gzip
+import logging
+import os
+import threading
+from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+
+from store.analytics.services.date_ranges import created_between
+from store.models import ExportJob, OrderItem
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow 為選用套件，未安裝時只能匯出 CSV
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+CENT = Decimal("0.01")
+
+# 每個資料集的欄位：(輸出欄名, 查詢欄位)
+DATASET_COLUMNS = {
+    ExportJob.DatasetChoices.ORDERS: [
+        ("order_number", "order__order_number"),
+        ("created_at", "order__created_at"),
+        ("status", "order__status"),
+        ("member", "order__member__user__username"),
+        ("receiver_name", "order__receiver_name"),
+        ("item_count", "item_count"),
+        ("quantity", "total_quantity"),
+        ("gmv", "gmv"),
+    ],
+    ExportJob.DatasetChoices.ITEMS: [
+        ("order_number", "order__order_number"),
+        ("created_at", "order__created_at"),
+        ("status", "order__status"),
+        ("product_id", "product_id"),
+        ("product_name", "product__name"),
+        ("quantity", "quantity"),
+        ("price", "price_at_purchase"),
+        ("subtotal", "subtotal"),
+    ],
+}
+# 輸出商家當地時間的欄位；依欄名找位置，調整 DATASET_COLUMNS 的順序不受影響
+DATETIME_COLUMNS = ("created_at",)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def export_root() -> Path:
+    return Path(getattr(settings, "EXPORT_ROOT", settings.BASE_DIR / "exports"))
+
+
+def export_path(job) -> Path:
+    return export_root() / job.file_path
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "EXPORT_WORKERS", 2),
+                thread_name_prefix="export",
+            )
+        return _executor
+
+
+def enqueue_export(*, merchant, dataset, start, end, format=ExportJob.FormatChoices.CSV) -> ExportJob:
+    """
+    建立匯出工作；交易 commit 後才交給 worker，worker 一定讀得到這筆工作
+    """
+    job = ExportJob.objects.create(merchant=merchant, dataset=dataset, format=format, start=start, end=end)
+    transaction.on_commit(lambda: submit_export(job.id))
+    return job
+
+
+def submit_export(job_id):
+    if getattr(settings, "EXPORT_WORKERS", 2) <= 0:
+        run_export(job_id)
+        return
+    _get_executor().submit(_run_in_worker, job_id)
+
+
+def _run_in_worker(job_id):
+    try:
+        run_export(job_id)
+    finally:
+        # worker 執行緒的資料庫連線不會被 request 結束時關閉，必須自己關
+        connections.close_all()
+
+
+# ---------------------------------------------------------------------------
+# 讀取
+# ---------------------------------------------------------------------------
+
+def _items(job):
+    return OrderItem.objects.filter(
+        product__store__merchant_id=job.merchant_id,
+        **created_between("order__created_at", job.start, job.end, job.merchant.tzinfo),
+    )
+
+
+def _rows_queryset(job):
+    items = _items(job)
+    fields = [field for _, field in DATASET_COLUMNS[job.dataset]]
+
+    if job.dataset == ExportJob.DatasetChoices.ORDERS:
+        # 一筆訂單一列，只計算該商家的商品
+        order_fields = [field for field in fields if field.startswith("order__")]
+        return (
+            items.values("order_id", *order_fields)
+            .annotate(
+                # gmv 必須先於 total_quantity，否則 F("quantity") 會指到彙總後的欄位
+                gmv=Sum(F("price_at_purchase") * F("quantity"), output_field=MONEY),
+                total_quantity=Sum("quantity"),
+                item_count=Count("id"),
+            )
+            .order_by("order__created_at", "order_id")
+            .values_list(*fields)
+        )
+
+    return (
+        items.annotate(subtotal=ExpressionWrapper(F("price_at_purchase") * F("quantity"), output_field=MONEY))
+        .order_by("order__created_at", "id")
+        .values_list(*fields)
+    )
+
+
+def _count_rows(job):
+    items = _items(job)
+    if job.dataset == ExportJob.DatasetChoices.ORDERS:
+        return items.values("order_id").distinct().count()
+    return items.count()
+
+
+def _format_value(value, tz, is_datetime):
+    if is_datetime:
+        return timezone.localtime(value, tz).isoformat() if value else value
+    return value.quantize(CENT) if isinstance(value, Decimal) else value
+
+
+def _batches(job, chunk_size):
+    tz = job.merchant.tzinfo
+    header = [name for name, _ in DATASET_COLUMNS[job.dataset]]
+    is_datetime = [name in DATETIME_COLUMNS for name in header]
+    rows = _rows_queryset(job).iterator(chunk_size=chunk_size)
+    while batch := list(islice(rows, chunk_size)):
+        # 時間欄位輸出商家當地時間，金額統一到分
+        yield [
+            tuple(_format_value(value, tz, flag) for value, flag in zip(row, is_datetime))
+            for row in batch
+        ]
+
+
+# ---------------------------------------------------------------------------
+# 寫入
+# ---------------------------------------------------------------------------
+
+def _write_csv(path, header, batches, progress):
+    with gzip.open(path, "wt", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(header)
+        for batch in batches:
+            writer.writerows(batch)
+            progress(len(batch))
+
+
+def _parquet_schema(header):
+    # 固定型別，避免各批次推斷出不同的 schema（例如 decimal 精度）
+    integers = {"item_count", "quantity", "product_id"}
+    money = {"gmv", "price", "subtotal"}
+    return pa.schema([
+        (name, pa.int64() if name in integers else pa.decimal128(14, 2) if name in money else pa.string())
+        for name in header
+    ])
+
+
+def _write_parquet(path, header, batches, progress):
+    schema = _parquet_schema(header)
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist([dict(zip(header, row)) for row in batch], schema=schema))
+            progress(len(batch))
+
+
+def _relative_path(job) -> Path:
+    extension = "csv.gz" if job.format == ExportJob.FormatChoices.CSV else "parquet"
+    return Path(str(job.merchant_id)) / f"export-{job.id}-{job.dataset}.{extension}"
+
+
+def _partial_path(path) -> Path:
+    return path.with_name(path.name + ".part")
+
+
+def run_export(job_id):
+    """
+    執行一個匯出工作（worker 進入點）；只處理 pending 的工作，重複送出不會重做
+    """
+    updated = ExportJob.objects.filter(pk=job_id, status=ExportJob.StatusChoices.PENDING).update(
+        status=ExportJob.StatusChoices.RUNNING,
+        heartbeat_at=timezone.now(),
+    )
+    if not updated:
+        return
+
+    job = ExportJob.objects.select_related("merchant").get(pk=job_id)
+    relative = _relative_path(job)
+    path = export_root() / relative
+    partial = _partial_path(path)
+
+    try:
+        if job.format == ExportJob.FormatChoices.PARQUET and not parquet_available():
+            raise RuntimeError("Parquet 匯出需要安裝 pyarrow")
+
+        ExportJob.objects.filter(pk=job.id).update(total_rows=_count_rows(job))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        written = 0
+
+        def progress(count):
+            nonlocal written
+            written += count
+            ExportJob.objects.filter(pk=job.id).update(rows_written=written, heartbeat_at=timezone.now())
+
+        write = _write_csv if job.format == ExportJob.FormatChoices.CSV else _write_parquet
+        header = [name for name, _ in DATASET_COLUMNS[job.dataset]]
+        write(partial, header, _batches(job, getattr(settings, "EXPORT_CHUNK_SIZE", 2000)), progress)
+        os.replace(partial, path)
+    except Exception as exc:
+        logger.exception("export job %s failed", job.id)
+        with suppress(OSError):
+            partial.unlink(missing_ok=True)
+        ExportJob.objects.filter(pk=job.id).update(
+            status=ExportJob.StatusChoices.FAILED,
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+        return
+
+    ExportJob.objects.filter(pk=job.id).update(
+        status=ExportJob.StatusChoices.DONE,
+        file_path=str(relative),
+        file_size=path.stat().st_size,
+        finished_at=timezone.now(),
+    )
+
+
+# ---------------------------------------------------------------------------
+# 重啟後的回復
+# ---------------------------------------------------------------------------
+
+def fail_stale_exports(*, stale_after: timedelta | None = None) -> int:
+    """
+    heartbeat_at 超過 stale_after（預設 EXPORT_STALE_MINUTES 分鐘）沒有更新的 running 工作標記為失敗，回傳筆數
+    執行它的 worker 已經不在（行程重啟或被終止），不會再完成
+    """
+    if stale_after is None:
+        stale_after = timedelta(minutes=getattr(settings, "EXPORT_STALE_MINUTES", 15))
+    cutoff = timezone.now() - stale_after
+    stale = ExportJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created_at__lt=cutoff),
+        status=ExportJob.StatusChoices.RUNNING,
+    )
+    for job in stale.only("id", "merchant_id", "dataset", "format"):
+        with suppress(OSError):
+            _partial_path(export_root() / _relative_path(job)).unlink(missing_ok=True)
+    return stale.update(
+        status=ExportJob.StatusChoices.FAILED,
+        error="匯出中斷（worker 重啟或終止），請重新建立匯出",
+        finished_at=timezone.now(),
+    )
+
+
+def pending_export_ids() -> list[int]:
+    """
+    仍在 pending 的工作（由舊行程排入、尚未執行）；run_export 以條件式 UPDATE 取得工作，重複執行也只會做一次
+    """
+    return list(
+        ExportJob.objects.filter(status=ExportJob.StatusChoices.PENDING)
+        .order_by("created_at", "id")
+        .values_list("id", flat=True)
+    )
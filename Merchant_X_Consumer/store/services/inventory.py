@@ -0,0 +1,261 @@
+"""
+庫存保留
+
+- reserve_stock()：以一個條件式 UPDATE（SET stock = stock - n WHERE stock >= n）扣庫存，不先 SELECT ... FOR UPDATE，
+  同一熱門商品的買家只在 UPDATE 的瞬間競爭同一列，資料庫保證不會超賣
+- 每筆待付款訂單都有 StockReservation，STOCK_RESERVATION_MINUTES 分鐘內未付款即逾期
+- 付款 → committed；取消（OrderCancelAPIView / 訂單更新）、刪除待付款訂單、逾期 → 釋放並把庫存加回
+- 逾期的保留由 release_expired_reservations 指令定期清除（會把訂單改為已取消）
+
+分片模式（Product.stock_shards = N > 0，以 shard_stock 指令開啟）：
+- 庫存分散在 N 個 StockShard；扣庫存從隨機的 shard 開始，不足時依序嘗試其他 shard，
+  都不足時才鎖住全部 shard 跨 shard 扣除
+- Product.stock 是各 shard 加總的快照，每次扣除 / 釋放的交易 commit 後以一個 UPDATE 重新計算；
+  Product 列只在這個很短的 UPDATE 期間被鎖住，不會在下單交易中一直被鎖著
+- in_stock、InStockFilterBackend、ProductSerializer 照舊讀 Product.stock
+- 商家修改 Product.stock（save()）時重新平均分配到各 shard
+"""
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, PositiveIntegerField, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from store.models import Order, Product, StockReservation, StockShard
+from store.services.order_transitions import OrderConflict, transition
+from store.signals import order_deleted, order_status_changed, orders_status_changed
+
+
+class InsufficientStock(ValidationError):
+    """庫存不足；繼承 ValidationError，API 回傳 400"""
+
+
+def reservation_expires_at(now=None):
+    now = now or timezone.now()
+    return now + timedelta(minutes=getattr(settings, "STOCK_RESERVATION_MINUTES", 30))
+
+
+def _adjust_stock(quantities, sign):
+    """
+    一個 UPDATE 調整多個商品的庫存；扣庫存時 WHERE 條件確認每個商品都足夠，回傳更新的列數
+    """
+    condition = Q()
+    for product_id, quantity in quantities.items():
+        condition |= Q(id=product_id, stock__gte=quantity) if sign < 0 else Q(id=product_id)
+    return Product.objects.filter(condition).update(
+        stock=Case(
+            *[When(id=product_id, then=F("stock") + sign * quantity) for product_id, quantity in quantities.items()],
+            output_field=PositiveIntegerField(),
+        )
+    )
+
+
+def reserve_stock(order, products, quantities):
+    """
+    為訂單扣庫存並建立保留；products 為 {product_id: Product}，quantities 為 {product_id: 數量}
+    必須在建立訂單的交易中呼叫，任何商品不足時丟出 InsufficientStock，整筆交易回滾
+    單列商品先以一個 UPDATE 扣除，分片商品再依 id 順序逐一扣除（固定的上鎖順序，避免死結）
+    """
+    single = {pid: qty for pid, qty in quantities.items() if not products[pid].stock_shards}
+    if single and _adjust_stock(single, -1) != len(single):
+        for product in Product.objects.filter(id__in=single).order_by("id"):
+            if product.stock < single[product.id]:
+                raise InsufficientStock(f"{product.name} 庫存不足(剩餘 {product.stock} )")
+        raise InsufficientStock("商品庫存已變動，請重新下單")
+
+    for product_id in sorted(set(quantities) - set(single)):
+        product = products[product_id]
+        if not _take_from_shards(product, quantities[product_id]):
+            remaining = sharded_stock(product_id)
+            raise InsufficientStock(f"{product.name} 庫存不足(剩餘 {remaining} )")
+        transaction.on_commit(lambda pid=product_id: sync_stock(pid))
+
+    expires_at = reservation_expires_at()
+    return StockReservation.objects.bulk_create([
+        StockReservation(order=order, product_id=product_id, quantity=quantity, expires_at=expires_at)
+        for product_id, quantity in quantities.items()
+    ])
+
+
+def commit_reservations(*orders):
+    return StockReservation.objects.filter(
+        order__in=orders, status=StockReservation.StatusChoices.ACTIVE,
+    ).update(status=StockReservation.StatusChoices.COMMITTED)
+
+
+def release_reservations(*orders):
+    """
+    釋放訂單仍有效的保留並把庫存加回；鎖定保留列，同一訂單重複取消也只會加回一次
+    """
+    with transaction.atomic(savepoint=False): # 呼叫端通常已在交易中（signal receiver），不需要額外的 savepoint
+        reservations = list(
+            StockReservation.objects.select_for_update(of=("self",))
+            .select_related("product")
+            .filter(order__in=orders, status=StockReservation.StatusChoices.ACTIVE)
+            .order_by("product_id")
+        )
+        if not reservations:
+            return 0
+
+        single = defaultdict(int)
+        sharded = defaultdict(int)
+        for reservation in reservations:
+            target = sharded if reservation.product.stock_shards else single
+            target[reservation.product_id] += reservation.quantity
+
+        StockReservation.objects.filter(id__in=[r.id for r in reservations]).update(
+            status=StockReservation.StatusChoices.RELEASED,
+        )
+        if single:
+            _adjust_stock(single, 1)
+        for reservation in reservations:
+            if reservation.product_id in sharded:
+                _return_to_shard(reservation.product, sharded.pop(reservation.product_id))
+                transaction.on_commit(lambda pid=reservation.product_id: sync_stock(pid))
+    return len(reservations)
+
+
+# ---------------------------------------------------------------------------
+# 分片庫存
+# ---------------------------------------------------------------------------
+
+def _split(total, parts):
+    """把 total 盡量平均分成 parts 份"""
+    base, extra = divmod(total, parts)
+    return [base + (1 if index < extra else 0) for index in range(parts)]
+
+
+def sharded_stock(product_id):
+    return StockShard.objects.filter(product_id=product_id).aggregate(total=Sum("stock"))["total"] or 0
+
+
+def _take_from_shards(product, quantity):
+    """
+    從隨機的 shard 開始找一個足夠的 shard 扣除；都不足時鎖住全部 shard 跨 shard 扣除
+    回傳是否成功
+    """
+    count = product.stock_shards
+    start = random.randrange(count)
+    for offset in range(count):
+        updated = StockShard.objects.filter(
+            product_id=product.id, index=(start + offset) % count, stock__gte=quantity,
+        ).update(stock=F("stock") - quantity)
+        if updated:
+            return True
+
+    shards = list(StockShard.objects.select_for_update().filter(product_id=product.id).order_by("index"))
+    if sum(shard.stock for shard in shards) < quantity:
+        return False
+    remaining = quantity
+    for shard in shards:
+        take = min(shard.stock, remaining)
+        if take:
+            StockShard.objects.filter(pk=shard.pk).update(stock=F("stock") - take)
+            remaining -= take
+        if not remaining:
+            break
+    return True
+
+
+def _return_to_shard(product, quantity):
+    StockShard.objects.filter(
+        product_id=product.id, index=random.randrange(product.stock_shards),
+    ).update(stock=F("stock") + quantity)
+
+
+def sync_stock(product_id):
+    """以各 shard 的加總更新 Product.stock 快照（一個 UPDATE）"""
+    total = StockShard.objects.filter(product_id=OuterRef("pk")).values("product_id").annotate(total=Sum("stock")).values("total")
+    Product.objects.filter(pk=product_id, stock_shards__gt=0).update(
+        stock=Coalesce(Subquery(total), Value(0)),
+    )
+
+
+def distribute_stock(product):
+    """
+    把 product.stock 平均分配到 product.stock_shards 個 shard（建立不存在的 shard、刪除多出來的）
+    """
+    with transaction.atomic():
+        existing = {
+            shard.index: shard
+            for shard in StockShard.objects.select_for_update().filter(product=product).order_by("index")
+        }
+        to_create, to_update = [], []
+        for index, stock in enumerate(_split(product.stock, product.stock_shards)):
+            shard = existing.pop(index, None)
+            if shard is None:
+                to_create.append(StockShard(product=product, index=index, stock=stock))
+            else:
+                shard.stock = stock
+                to_update.append(shard)
+        StockShard.objects.bulk_create(to_create)
+        StockShard.objects.bulk_update(to_update, ["stock"])
+        StockShard.objects.filter(pk__in=[shard.pk for shard in existing.values()]).delete()
+
+
+def set_stock_shards(product, shards):
+    """
+    開啟（shards > 0）、調整或關閉（shards = 0）商品的分片模式，總庫存不變
+    """
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product.pk)
+        if product.stock_shards:
+            product.stock = sharded_stock(product.pk)
+        product.stock_shards = shards
+        Product.objects.filter(pk=product.pk).update(stock=product.stock, stock_shards=shards)
+        if shards:
+            distribute_stock(product)
+        else:
+            StockShard.objects.filter(product=product).delete()
+    return product
+
+
+def release_expired_reservations(now=None):
+    """
+    取消保留已逾期、仍未付款的訂單（庫存由取消事件釋放），回傳取消的訂單數
+    """
+    now = now or timezone.now()
+    order_ids = (
+        StockReservation.objects.filter(status=StockReservation.StatusChoices.ACTIVE, expires_at__lte=now)
+        .values_list("order_id", flat=True)
+        .distinct()
+    )
+
+    canceled = 0
+    for order in Order.objects.filter(pk__in=list(order_ids), status=Order.StatusChoices.PENDING).order_by("id"):
+        # 條件式 UPDATE：讀取之後才付款的訂單會得到 OrderConflict，不會被取消
+        try:
+            transition(order, Order.StatusChoices.CANCELED, expected=Order.StatusChoices.PENDING)
+        except OrderConflict:
+            continue
+        canceled += 1
+    return canceled
+
+
+@receiver(order_status_changed, dispatch_uid="inventory_order_status_changed")
+def inventory_order_status_changed(sender, order, old_status, new_status, **kwargs):
+    if new_status == Order.StatusChoices.PAID:
+        commit_reservations(order)
+    elif new_status == Order.StatusChoices.CANCELED:
+        release_reservations(order)
+
+
+@receiver(order_deleted, dispatch_uid="inventory_order_deleted")
+def inventory_order_deleted(sender, order, **kwargs):
+    release_reservations(order)
+
+
+@receiver(orders_status_changed, dispatch_uid="inventory_orders_status_changed")
+def inventory_orders_status_changed(sender, orders, old_status, new_status, **kwargs):
+    if not orders:
+        return
+    if new_status == Order.StatusChoices.PAID:
+        commit_reservations(*orders)
+    elif new_status == Order.StatusChoices.CANCELED:
+        release_reservations(*orders)
@@ -0,0 +1,122 @@
+"""
+訂單狀態事件（OrderStatusEvent，只新增、不修改）
+
+- 建立訂單、每次狀態轉換（單筆、批次、逾期取消）都由 signal receiver 寫入事件，與狀態寫入在同一個交易中
+- 每筆事件對應一個商店：訂單含多個商店的商品時各寫一筆；批次轉換以一個查詢找出商店、一個 INSERT 寫入全部事件
+- 時間軸：order.status_events.order_by("at")（索引 order, at）；
+  商店在某段時間內的事件：OrderStatusEvent.objects.filter(store=..., at__range=...)（索引 store, at）
+
+增量消費：consume_events(name, handler) 依 id 順序把 cursor 之後的新事件交給 handler，處理完才前進 cursor，
+彙總表、快取等可以只處理新事件，不必重新掃描 Order。
+id 較小的事件可能屬於較晚 commit 的交易：cursor 越過時記下還看不到的 id（gaps），之後每一批都重新檢查，
+出現了就交給 handler（晚到的事件在較後的批次處理，不依 id 順序）；
+超過 ORDER_EVENT_GAP_SECONDS 秒仍未出現的 id 視為已回滾的交易，不再等待
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DateTimeField, ExpressionWrapper, F, OuterRef, Q, Subquery
+from django.dispatch import receiver
+from django.utils import timezone
+
+from store.models import Order, OrderEventCursor, OrderItem, OrderStatusEvent
+from store.signals import order_created, order_status_changed, orders_status_changed
+
+
+def record_events(orders, old_status, new_status):
+    """
+    為 orders 寫入狀態事件：一個查詢找出每筆訂單的商店，一個 INSERT 寫入全部事件
+    """
+    stores = defaultdict(set)
+    rows = (
+        OrderItem.objects.filter(order_id__in=[order.id for order in orders])
+        .values_list("order_id", "product__store_id")
+        .distinct()
+    )
+    for order_id, store_id in rows:
+        stores[order_id].add(store_id)
+
+    at = timezone.now()
+    return OrderStatusEvent.objects.bulk_create([
+        OrderStatusEvent(order_id=order.id, store_id=store_id, old_status=old_status, new_status=new_status, at=at)
+        for order in orders
+        for store_id in sorted(stores[order.id])
+    ])
+
+
+def consume_events(name, handler, *, batch_size=1000):
+    """
+    把名為 name 的 cursor 之後的新事件依 id 順序、每次最多 batch_size 筆交給 handler(events)，回傳處理的事件數
+    每一批與 cursor 的更新在同一個交易中：handler 丟出例外時 cursor 不前進，下次會重新處理同一批；
+    handler 寫入資料庫的結果與 cursor 一起 commit，不會重複套用
+    同名的 cursor 以 select_for_update 鎖住，多個 worker 同時執行也不會處理同一批事件
+    """
+    max_wait = getattr(settings, "ORDER_EVENT_GAP_SECONDS", 600)
+    processed = 0
+    while True:
+        with transaction.atomic():
+            OrderEventCursor.objects.get_or_create(name=name)
+            cursor = OrderEventCursor.objects.select_for_update().get(name=name)
+            now = timezone.now().timestamp()
+            gaps = {int(event_id): seen for event_id, seen in cursor.gaps.items()}
+
+            late = list(OrderStatusEvent.objects.filter(id__in=list(gaps)).order_by("id")) if gaps else []
+            new = list(OrderStatusEvent.objects.filter(id__gt=cursor.position).order_by("id")[:batch_size])
+            for event in late:
+                del gaps[event.id]
+            if new:
+                found = {event.id for event in new}
+                gaps.update(
+                    (event_id, now) for event_id in range(cursor.position + 1, new[-1].id) if event_id not in found
+                )
+            gaps = {event_id: seen for event_id, seen in gaps.items() if now - seen < max_wait}
+
+            events = late + new
+            if events:
+                handler(events)
+            if events or len(gaps) != len(cursor.gaps):
+                if new:
+                    cursor.position = new[-1].id
+                cursor.gaps = {str(event_id): seen for event_id, seen in sorted(gaps.items())}
+                cursor.save(update_fields=["position", "gaps", "updated_at"])
+        processed += len(events)
+        if len(new) < batch_size:
+            return processed
+
+
+def shipping_sla(store, *, start, end, hours=24):
+    """
+    [start, end) 之間出貨的訂單中，付款後 hours 小時內出貨的筆數：{"shipped": ..., "within": ...}
+    只讀事件表（store, at 索引），不必掃描 Order
+    """
+    paid_at = (
+        OrderStatusEvent.objects.filter(order=OuterRef("order"), store=store, new_status=Order.StatusChoices.PAID)
+        .order_by("at")
+        .values("at")[:1]
+    )
+    deadline = ExpressionWrapper(F("paid_at") + timedelta(hours=hours), output_field=DateTimeField())
+    return (
+        OrderStatusEvent.objects.filter(
+            store=store, new_status=Order.StatusChoices.SHIPPED, at__gte=start, at__lt=end,
+        )
+        .annotate(paid_at=Subquery(paid_at))
+        .aggregate(shipped=Count("id"), within=Count("id", filter=Q(at__lte=deadline)))
+    )
+
+
+@receiver(order_created, dispatch_uid="order_events_order_created")
+def order_events_order_created(sender, order, **kwargs):
+    record_events([order], "", order.status)
+
+
+@receiver(order_status_changed, dispatch_uid="order_events_order_status_changed")
+def order_events_order_status_changed(sender, order, old_status, new_status, **kwargs):
+    record_events([order], old_status, new_status)
+
+
+@receiver(orders_status_changed, dispatch_uid="order_events_orders_status_changed")
+def order_events_orders_status_changed(sender, orders, old_status, new_status, **kwargs):
+    if orders:
+        record_events(orders, old_status, new_status)
@@ -0,0 +1,129 @@
+"""
+訂單編號配發器
+
+訂單編號格式固定為 ORD{YYYYMMDD}-{流水段}，流水段如何產生由
+settings.ORDER_NUMBER_ALLOCATOR 指定的配發器決定。日期與時間一律取 UTC，
+夏令時間結束時本地時間會重複一小時，UTC 不會。
+配發器必須保證「不查資料庫也不會重複」，Order.save() 不再做 exists() 檢查。
+"""
+import os
+import threading
+from datetime import date, datetime, timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+
+class OrderNumberAllocator:
+    """配發器介面：allocate() 回傳一個新的訂單編號"""
+
+    prefix = "ORD"
+
+    def allocate(self) -> str:
+        raise NotImplementedError
+
+    def format(self, day: date, suffix: str) -> str:
+        return f"{self.prefix}{day:%Y%m%d}-{suffix}"
+
+
+class SnowflakeOrderNumberAllocator(OrderNumberAllocator):
+    """
+    Snowflake 風格、依時間排序的訂單編號（流水段共 20 碼）：
+
+        UTC 當日毫秒數(8) + 節點編號(2) + 行程 PID(7) + 序號(3)
+
+    - 同一主機上的 gunicorn worker PID 不會相同，跨主機 / 容器以 ORDER_NUMBER_NODE_ID 區分；
+      容器中的 PID 經常相同（例如都是 1），因此節點編號必須明確設定（store/checks.py 在啟動時檢查）
+    - 同一毫秒內最多配發 1000 個，用完就借用下一毫秒，時鐘倒退時也不會往回走
+    """
+
+    MAX_SEQUENCE = 999
+    MAX_NODE_ID = 99
+    MAX_PID = 9_999_999
+
+    def __init__(self, node_id=None):
+        if node_id is None:
+            node_id = getattr(settings, "ORDER_NUMBER_NODE_ID", None)
+        if node_id is None:
+            raise ImproperlyConfigured("請設定 ORDER_NUMBER_NODE_ID（每台主機 / 每個容器不同）")
+        node_id = int(node_id)
+        if not 0 <= node_id <= self.MAX_NODE_ID:
+            raise ValueError(f"ORDER_NUMBER_NODE_ID 必須介於 0 ~ {self.MAX_NODE_ID}")
+
+        self.node_id = node_id
+        self._lock = threading.Lock()
+        self._reset(os.getpid())
+
+    def _reset(self, pid):
+        # fork 之後 PID 改變，狀態必須重新開始
+        if pid > self.MAX_PID:
+            raise ValueError(f"PID {pid} 超過 {self.MAX_PID}，無法編入訂單編號")
+        self._pid = pid
+        self._last_day = None
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _utcnow(self):
+        return datetime.now(timezone.utc)
+
+    def _now(self):
+        now = self._utcnow()
+        ms_of_day = (
+            (now.hour * 3600 + now.minute * 60 + now.second) * 1000
+            + now.microsecond // 1000
+        )
+        return now.date(), ms_of_day
+
+    def allocate(self) -> str:
+        with self._lock:
+            pid = os.getpid()
+            if pid != self._pid:
+                self._reset(pid)
+
+            day, ms = self._now()
+
+            if self._last_day is not None and day < self._last_day:
+                day = self._last_day # 時鐘跨日倒退，沿用上一個日期
+
+            if day != self._last_day:
+                self._last_day = day
+                self._last_ms = -1
+
+            if ms > self._last_ms:
+                self._last_ms = ms
+                self._sequence = 0
+            else:
+                # 同一毫秒（或時鐘倒退）：序號遞增，用完就借用下一毫秒
+                self._sequence += 1
+                if self._sequence > self.MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+
+            suffix = (
+                f"{self._last_ms:08d}"
+                f"{self.node_id:02d}"
+                f"{self._pid:07d}"
+                f"{self._sequence:03d}"
+            )
+            return self.format(day, suffix)
+
+
+_allocator = None
+
+
+def get_order_number_allocator() -> OrderNumberAllocator:
+    global _allocator
+    if _allocator is None:
+        _allocator = import_string(settings.ORDER_NUMBER_ALLOCATOR)()
+    return _allocator
+
+
+def _reset_allocator(*, setting, **kwargs):
+    global _allocator
+    if setting in ("ORDER_NUMBER_ALLOCATOR", "ORDER_NUMBER_NODE_ID"):
+        _allocator = None
+
+
+setting_changed.connect(_reset_allocator)
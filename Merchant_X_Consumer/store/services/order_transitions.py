@@ -0,0 +1,106 @@
+"""
+訂單狀態機
+
+單筆轉換 transition()（付款、出貨、取消、OrderUpdateSerializer 修改狀態共用）：
+- 以條件式 UPDATE ... SET status = <新狀態>, ... WHERE id = ? AND status = <讀到的狀態> 寫入，不先鎖定訂單
+- 兩個請求同時轉換同一筆訂單（例如同時付款與取消）時只有一個成功，另一個得到 OrderConflict（409）
+- 只寫入狀態與呼叫端指定的欄位，不會整列覆寫
+
+商家批次轉換訂單狀態（出貨 / 完成 / 取消）：
+- 一個查詢取得並鎖定所有屬於該商店的訂單（訂單中有該商店的商品），狀態轉換規則在記憶體中以 can_transition 驗證
+- 每個來源狀態一個 UPDATE ... WHERE status = <來源狀態>
+- 衍生資料（彙總表、排行榜、快取、庫存保留）由 orders_status_changed 批次更新，查詢數不隨訂單數成長
+- 回傳每筆訂單的結果，部分失敗不影響其他訂單
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from store.models import Order, OrderItem
+from store.signals import order_status_changed, orders_status_changed
+
+BULK_ACTIONS = {
+    "ship": Order.StatusChoices.SHIPPED,
+    "complete": Order.StatusChoices.COMPLETED,
+    "cancel": Order.StatusChoices.CANCELED,
+}
+
+
+class OrderConflict(APIException):
+    """訂單狀態在讀取之後已被其他請求修改"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "訂單狀態已被修改，請重新整理後再試"
+    default_code = "conflict"
+
+
+def transition(order, new_status, *, expected=None, **fields):
+    """
+    把 order 從目前（讀取時）的狀態轉換為 new_status，並一起寫入 fields；成功時更新 order 並送出 order_status_changed
+    不允許的轉換丟出 ValidationError，訂單狀態已被其他請求修改時丟出 OrderConflict
+    expected：只接受從這個狀態轉換（例如逾期取消只取消 pending 的訂單），讀到的狀態不同時直接丟出 OrderConflict
+    """
+    old_status = order.status
+    if expected is not None and old_status != expected:
+        raise OrderConflict(f"訂單狀態已不是 {expected}，無法改為 {new_status}")
+    if not order.can_transition(new_status):
+        raise ValidationError(f"訂單無法從 {old_status} 改為 {new_status} !")
+
+    with transaction.atomic():
+        updated = Order.objects.filter(pk=order.pk, status=old_status).update(status=new_status, **fields)
+        if not updated:
+            raise OrderConflict(f"訂單狀態已不是 {old_status}，無法改為 {new_status}")
+        order.status = new_status
+        for name, value in fields.items():
+            setattr(order, name, value)
+        order_status_changed.send(sender=Order, order=order, old_status=old_status, new_status=new_status)
+    return order
+
+
+def _result(order_id, ok, status=None, detail=""):
+    return {"id": order_id, "ok": ok, "status": status, "detail": detail}
+
+
+def bulk_transition(*, store, order_ids, action):
+    """
+    把 order_ids 中屬於 store 的訂單轉換為 action 對應的狀態，依 order_ids 的順序回傳每筆結果
+    """
+    target = BULK_ACTIONS[action]
+    order_ids = list(dict.fromkeys(order_ids)) # 去除重複、保留順序
+
+    with transaction.atomic():
+        # 依主鍵順序上鎖，與其他批次 / 單筆轉換不會互相等待造成死結
+        orders = {
+            order.id: order
+            for order in Order.objects.select_for_update()
+            .filter(id__in=order_ids)
+            .filter(Exists(OrderItem.objects.filter(order=OuterRef("pk"), product__store=store)))
+            .order_by("id")
+        }
+
+        results = {}
+        groups = defaultdict(list)
+        for order_id in order_ids:
+            order = orders.get(order_id)
+            if order is None:
+                results[order_id] = _result(order_id, False, detail="找不到訂單，或訂單中沒有您商店的商品")
+            elif not order.can_transition(target):
+                results[order_id] = _result(
+                    order_id, False, order.status, f"訂單無法從 {order.status} 改為 {target} !"
+                )
+            else:
+                groups[order.status].append(order)
+
+        for source, group in groups.items():
+            updated = Order.objects.filter(id__in=[order.id for order in group], status=source).update(status=target)
+            if updated != len(group): # 已鎖定，不應發生；回滾整批
+                raise RuntimeError(f"批次轉換時訂單狀態被修改（預期 {len(group)} 筆，實際 {updated} 筆）")
+            for order in group:
+                order.status = target
+                results[order.id] = _result(order.id, True, target)
+            orders_status_changed.send(sender=Order, orders=group, old_status=source, new_status=target)
+
+    return [results[order_id] for order_id in order_ids]
@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+# 訂單生命週期事件，receiver 會在同一個資料庫交易內執行
+# 彙總表、快取等衍生資料都透過這些 signal 維護，呼叫端不需要知道有哪些訂閱者
+
+order_created = Signal()         # kwargs: order
+order_status_changed = Signal()  # kwargs: order, old_status, new_status
+order_deleted = Signal()         # kwargs: order（在刪除前送出，OrderItem 仍存在）
+orders_status_changed = Signal() # kwargs: orders, old_status, new_status（批次轉換，orders 已是新狀態；不會再逐筆送 order_status_changed）
@@ -11,6 +11,7 @@ urlpatterns = [
     path("orders/<int:pk>/pay/", store_views.OrderPayAPIView.as_view(), name="order_pay"),
     path("orders/<int:pk>/ship/", store_views.OrderShipAPIView.as_view(), name="order_ship"),
     path("orders/<int:pk>/cancel/", store_views.OrderCancelAPIView.as_view(), name="order_cancel"),
+    path("merchant/orders/transition/", store_views.MerchantOrderBulkTransitionAPIView.as_view(), name="merchant_order_bulk_transition"),
 
 ]
 
@@ -18,4 +19,5 @@ router = DefaultRouter()
 router.register('stores', store_views.StoreViewSet, basename='store') # 註冊Store的ViewSet到路由系統
 router.register('products', store_views.ProductViewSet, basename='product') # 註冊Product的ViewSet到路由系統
 router.register('merchant/analytics', store_views.MerchantAnalyticsViewSet, basename='merchant_analytics')
+router.register('merchant/exports', store_views.MerchantExportViewSet, basename='merchant_exports')
 urlpatterns += router.urls
\ No newline at end of file
@@ -1,16 +1,26 @@
-from django.db.models import Max  # 用於聚合查詢
+import logging
+import re
+from django.db import transaction # 用於資料庫交易管理
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse # 匯出檔下載
+from django.db.models import Count, Max, Prefetch  # 用於聚合查詢與預先載入
+from django.utils import timezone
 from django.shortcuts import get_object_or_404  # 用於取得物件或回傳404錯誤
 from django_filters.rest_framework import \
     DjangoFilterBackend  # 使用Django Filter進行過濾
 from rest_framework.decorators import action  # 用於在ViewSet中定義自訂動作
 from rest_framework import (filters,  # 使用Django REST framework的通用視圖和過濾器
                             generics,
+                            mixins,
                             status,
                             viewsets)
 from rest_framework.decorators import \
     api_view  # 使用Django REST framework的api_view裝飾器
-from rest_framework.pagination import (LimitOffsetPagination,  # 分頁類別
-                                       PageNumberPagination)
+from rest_framework.settings import api_settings
+from Merchant_X_Consumer.db_router import ReplicaReadMixin # 讀取較重的 API 改讀 replica
+from store.pagination import (OrderPagination,  # 分頁類別（可選 keyset 模式）
+                              ProductInfoPagination,
+                              ProductPagination,
+                              StorePagination)
 from rest_framework.permissions import IsAuthenticatedOrReadOnly # 確保只有已驗證的用戶可以存取這些API
 from rest_framework.permissions import AllowAny  # 允許任何人存取這些API
 from rest_framework.permissions import IsAdminUser  # 確保只有管理員用戶可以存取這些API
@@ -18,15 +28,23 @@ from rest_framework.permissions import IsAuthenticated  # 確保只有已驗證
 from rest_framework.response import Response
 from rest_framework.views import APIView  # 基本的API視圖類別
 
+from store.renderers import CSVRenderer, stream_csv
 from store.filter import (InStockFilterBackend, OrderFilter,  # 自定義的過濾器
                           ProductFilter)
-from store.models import Store, Order, OrderItem, Product
+from store.models import ExportJob, Store, Order, OrderItem, Product
+from store.signals import order_deleted
 from member.models import Merchant
 from store.serializers import (StoreSerializer, OrderSerializer, ProductInfoSerializer,
                                ProductSerializer, OrderCreateSerializer, OrderUpdateSerializer,
                                OrderSummarySerializer, OrderTimeseriesSerializer, TopProductsResponseSerializer,
-                               TopCustomersResponseSerializer)
+                               TopCustomersResponseSerializer, DashboardSerializer, ExportJobSerializer,
+                               OrderBulkTransitionSerializer, OrderBulkTransitionResultSerializer)
+from store.services.exports import export_path
+from store.services.order_transitions import bulk_transition, transition
+from store.analytics.services import analytics_cache
+from store.analytics.services.dashboard import DASHBOARD_METRICS, build_dashboard
 from store.analytics.services.order_analytics import (
+    HOURLY_MAX_DAYS, TIMESERIES_GROUPINGS,
     build_order_summary, build_order_timeseries, build_top_products, build_top_customers)
 from member.permissions import (IsMerchant, 
                                 IsMember, 
@@ -37,17 +55,60 @@ from member.permissions import (IsMerchant,
 from rest_framework.exceptions import ValidationError, PermissionDenied # 用於權限拒絕例外
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # Create your views here.
 def parse_date(value):
     if not value:
         return None
     return datetime.strptime(value, "%Y-%m-%d").date()
 
-class StoreViewSet(viewsets.ModelViewSet):
+
+def store_orders(store):
+    """
+    包含該商店商品的訂單。
+    以 id IN (子查詢) 的 semi-join 取代 JOIN items + DISTINCT：
+    一筆訂單有多個商品也不會被放大，分頁與 COUNT 都不必先對整個 JOIN 結果去重。
+    （Postgres 會把 IN / EXISTS 規劃成相同的 semi-join；SQLite 無法把關聯式 EXISTS
+    攤平，深分頁與 COUNT 會逐筆檢查，因此這裡用不相關的子查詢）
+    """
+    return Order.objects.filter(
+        id__in=OrderItem.objects.filter(product__store=store).values('order_id')
+    )
+
+
+def visible_orders(user):
+    """
+    依角色決定使用者看得到的訂單（列表 / 詳情共用）
+    """
+    if not user.is_authenticated:
+        return Order.objects.none()
+
+    if user.role == 'member':
+        return Order.objects.filter(member=user.member) # 會員只會看到自己的訂單
+
+    if user.role == 'merchant':
+        try:
+            return store_orders(user.merchant.store) # 商家只能看到有自己商品的訂單
+        except Store.DoesNotExist:
+            return Order.objects.none() # 商家無商店無法查看訂單
+
+    return Order.objects.all() # 管理員可以看到所有訂單
+
+class StoreViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Store.objects.all()
     serializer_class = StoreSerializer
-    pagination_class = PageNumberPagination
-    
+    pagination_class = StorePagination
+
+    def get_queryset(self):
+        if self.action not in ('list', 'retrieve'):
+            return Store.objects.all()
+        # 每間商店只取前 N 個商品，所有商店的商品用同一個查詢預先載入
+        preview = Product.objects.order_by('id')[:StoreSerializer.nested_products_limit]
+        return Store.objects.prefetch_related(
+            Prefetch('products', queryset=preview, to_attr='preview_products')
+        )
+
     def get_permissions(self):
         if self.action == 'create':
            return [IsAuthenticated(), IsMerchant()] # 只有登入後的商家可以創建商店
@@ -69,9 +130,21 @@ class StoreViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save() # 儲存更新的商店資料
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
+    @action(detail=True, methods=['get'], pagination_class=ProductPagination)
+    def products(self, request, pk=None):
+        """
+        商店的完整商品清單（分頁）
+        """
+        store = self.get_object()
+        products = Product.objects.filter(store=store).select_related('store').order_by('id')
+        page = self.paginate_queryset(products)
+        serializer = ProductSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+class ProductViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    queryset = Product.objects.select_related('store') # store_name 不需每個商品各查一次
     serializer_class = ProductSerializer
+    pagination_class = ProductPagination
     filterset_class = ProductFilter 
     filter_backends = [
         DjangoFilterBackend, 
@@ -103,8 +176,26 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer.save() # 儲存更新的產品資料
 
 
-class OrderListCreateAPIView(generics.ListCreateAPIView):
+class OrderListCreateAPIView(ReplicaReadMixin, generics.ListCreateAPIView):
     queryset = Order.objects.prefetch_related('items__product')
+    pagination_class = OrderPagination
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer] # ?format=csv 下載完整訂單紀錄
+
+    # CSV 欄位：(欄名, 查詢欄位)
+    csv_columns = [
+        ('order_number', 'order_number'),
+        ('created_at', 'created_at'),
+        ('status', 'status'),
+        ('member', 'member__user__username'),
+        ('receiver_name', 'receiver_name'),
+        ('receiver_phone', 'receiver_phone'),
+        ('address', 'address'),
+        ('total_amount', 'total_amount'),
+        ('payment_method', 'payment_method'),
+        ('paid_at', 'paid_at'),
+    ]
+    csv_datetime_columns = ('created_at', 'paid_at') # 輸出當地時間；依欄名找位置，調整 csv_columns 順序不受影響
+    csv_chunk_size = 2000
 
     def get_permissions(self):
         if self.request.method == 'POST':
@@ -122,8 +213,7 @@ class OrderListCreateAPIView(generics.ListCreateAPIView):
         serializer = self.get_serializer(data=request.data)
 
         if not serializer.is_valid():
-            # 🔥 關鍵：把真正的錯誤印出來
-            print("SERIALIZER ERRORS =", serializer.errors)
+            logger.debug("order create rejected: %s", serializer.errors)
             return Response(
                 serializer.errors,
                 status=status.HTTP_400_BAD_REQUEST
@@ -133,24 +223,42 @@ class OrderListCreateAPIView(generics.ListCreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def get_queryset(self):
-        user =self.request.user
-
-        if not user.is_authenticated:
-            return Order.objects.none()
-        
-        if user.role == 'member':
-            return Order.objects.filter(member=user.member).prefetch_related('items__product')
-        
-        if user.role == 'merchant':
-            try:
-                store = user.merchant.store
-                return Order.objects.filter(
-                    item__product__store=store
-                ).distinct().prefetch_related('items__product')
-            except Store.DoesNotExist:
-                return Order.objects.none()
-            
-        return Order.objects.all().prefetch_related('items__product')
+        return visible_orders(self.request.user).order_by(
+            '-created_at', '-id' # 穩定排序：同一時間建立的訂單再以 id 排序，分頁不會重複或漏掉
+        ).prefetch_related('items__product')
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == 'csv':
+            return self.csv_response()
+        return super().list(request, *args, **kwargs)
+
+    def csv_response(self):
+        """
+        以 server-side cursor（iterator）逐批讀取 values_list，直接寫成 CSV 串流：
+        不分頁、不建立 model / serializer 實例，記憶體與訂單數無關
+        """
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        queryset = queryset.using(queryset.db) # 串流在 view 結束後才讀取，先固定好要讀的資料庫
+        rows = queryset.values_list(*[field for _, field in self.csv_columns]).iterator(
+            chunk_size=self.csv_chunk_size
+        )
+        header = [name for name, _ in self.csv_columns]
+        datetime_indexes = [header.index(name) for name in self.csv_datetime_columns]
+
+        def formatted():
+            for row in rows:
+                row = list(row)
+                for index in datetime_indexes:
+                    if row[index]:
+                        row[index] = timezone.localtime(row[index]).isoformat()
+                yield row
+
+        response = StreamingHttpResponse(
+            stream_csv(header, formatted()),
+            content_type='text/csv; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'attachment; filename="orders.csv"'
+        return response
     
 
 class OrderDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
@@ -170,25 +278,13 @@ class OrderDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     def perform_update(self, serializer):
         serializer.save()
 
-    def get_queryset(self):
-        user = self.request.user
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            order_deleted.send(sender=Order, order=instance) # 刪除前通知，彙總表需要讀取訂單項目
+            instance.delete()
 
-        if not user.is_authenticated:
-            return Order.objects.none()
-        
-        if user.role == 'member':
-            return Order.objects.filter(member=user.member) # 會員只會看到自己的訂單
-        
-        if user.role == 'merchant':
-            try:
-                store = user.merchant.store
-                return Order.objects.filter(
-                    items__product__store=store
-                ).distinct() #商家只能看到有自己商品的訂單
-            except Store.DoesNotExist:
-                return Order.objects.none() # 商家無商店無法查看訂單
-            
-        return Order.objects.all() # 管理員可以看到所有訂單
+    def get_queryset(self):
+        return visible_orders(self.request.user).prefetch_related('items__product')
 
 
 class OrderPayAPIView(APIView):
@@ -198,19 +294,12 @@ class OrderPayAPIView(APIView):
         order = get_object_or_404(Order, pk=pk)
         self.check_object_permissions(request, order)
 
-        new_status = Order.StatusChoices.PAID
-
-        if not order.can_transition(new_status):
-            raise ValidationError(
-                f"訂單無法從 {order.status} 改為 {new_status} !"
-            )
-        
-        order.status = new_status
-        order.payment_method = request.data.get(
-            'payment_method', Order.PaymentMethodChoices.UNPAID
-        ) 
-        order.paid_at = datetime.now()
-        order.save()
+        transition(
+            order,
+            Order.StatusChoices.PAID,
+            payment_method=request.data.get('payment_method', Order.PaymentMethodChoices.UNPAID),
+            paid_at=timezone.now(),
+        )
 
         return Response(
             {"detail": "付款成功", "status": order.status},
@@ -237,15 +326,7 @@ class OrderShipAPIView(APIView):
         if not has_own_product:
             raise PermissionDenied("此單並無您商店的商品，無法出貨！")
 
-        new_status =Order.StatusChoices.SHIPPED
-
-        if not order.can_transition(new_status):
-            raise ValidationError(
-                f"訂單無法從 {order.status} 改為 {new_status} !"
-            )
-        
-        order.status = new_status
-        order.save()
+        transition(order, Order.StatusChoices.SHIPPED)
 
         return Response(
             {"detail": "出貨成功", "status": order.status},
@@ -260,33 +341,60 @@ class OrderCancelAPIView(APIView):
         order = get_object_or_404(Order, pk=pk)
         self.check_object_permissions(request, order)
 
-        new_status = Order.StatusChoices.CANCELED
-
-        if not order.can_transition(new_status):
-            raise ValidationError(
-                f"訂單無法從 {order.status} 改為 {new_status} !"
-            )
-        
-        order.status = new_status
-        order.save()
+        transition(order, Order.StatusChoices.CANCELED)
 
         return Response(
             {"detail": "訂單已取消", "status": order.status},
             status=status.HTTP_200_OK
         )
 
-class ProductInfoAPIView(APIView):
+class MerchantOrderBulkTransitionAPIView(APIView):
+    """
+    商家一次出貨 / 完成 / 取消多筆訂單，回傳每筆訂單的結果
+    """
+    permission_classes = [IsAuthenticated, IsMerchant]
+
+    def post(self, request):
+        try:
+            store = request.user.merchant.store
+        except Store.DoesNotExist:
+            raise PermissionDenied("您尚未創建商店哦！")
+
+        serializer = OrderBulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = bulk_transition(store=store, **serializer.validated_data)
+        updated = sum(result["ok"] for result in results)
+        return Response({
+            "action": serializer.validated_data["action"],
+            "updated": updated,
+            "failed": len(results) - updated,
+            "results": OrderBulkTransitionResultSerializer(results, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+class ProductInfoAPIView(ReplicaReadMixin, APIView):
+    pagination_class = ProductInfoPagination
+
     def get(self, request):
-        products = Product.objects.all()
+        # 總數與最高價格用同一個聚合查詢取得，不需把所有商品載入記憶體
+        stats = Product.objects.aggregate(count=Count('id'), max_price=Max('price'))
+
+        # 商品清單改為 keyset 分頁，每次只序列化一頁
+        paginator = self.pagination_class()
+        products = paginator.paginate_queryset(
+            Product.objects.select_related('store'), request, view=self
+        )
+
         serializer = ProductInfoSerializer({
-            'products': products, # 所有產品資料
-            'count': len(products), # 取得產品總數量
-            'max_price': products.aggregate(max_price=Max('price'))['max_price'] # 取得最高價格
+            'products': products, # 本頁產品資料
+            'count': stats['count'], # 取得產品總數量
+            'max_price': stats['max_price'], # 取得最高價格
+            'next': paginator.get_next_cursor_link(), # 下一頁
         })
         return Response(serializer.data)
 
 
-class MerchantAnalyticsViewSet(viewsets.ViewSet):
+class MerchantAnalyticsViewSet(ReplicaReadMixin, viewsets.ViewSet):
     permission_classes = [IsAuthenticated, IsMerchant]
 
     def get_merchant(self, request):
@@ -309,23 +417,42 @@ class MerchantAnalyticsViewSet(viewsets.ViewSet):
             ]
         return statuses
     
-    def get_limit(self, request, default=5):
+    def get_limit(self, request, default=5, param="limit"):
         try:
-            return int(request.query_params.get("limit", default))
+            return int(request.query_params.get(param, default))
         except ValueError:
-            raise ValidationError("limit 必須是整數")
+            raise ValidationError(f"{param} 必須是整數")
     
+    def get_group_by(self, request, start, end):
+        group_by = request.query_params.get("group_by", "day")
+        if group_by not in TIMESERIES_GROUPINGS:
+            raise ValidationError(f"group_by 只能是 {', '.join(TIMESERIES_GROUPINGS)}")
+        if group_by == "hour" and (end - start).days + 1 > HOURLY_MAX_DAYS:
+            raise ValidationError(f"group_by=hour 的區間最多 {HOURLY_MAX_DAYS} 天")
+        return group_by
+
+    def cached(self, merchant, action, start, end, params, build):
+        """
+        分析結果的回應快取（見 store/analytics/services/analytics_cache.py）
+        """
+        return Response(analytics_cache.get_or_build(
+            merchant, action, start=start, end=end, params=params, build=build,
+        ))
+
     @action(detail=False, methods=["get"])
     def order_summary(self, request):
         merchant = self.get_merchant(request)
         start, end = self.get_date_range(request)
-        data = build_order_summary(
-            merchant=merchant,
-            start=start,
-            end=end,
-        )
 
-        return Response(OrderSummarySerializer(data).data)
+        def build():
+            data = build_order_summary(
+                merchant=merchant,
+                start=start,
+                end=end,
+            )
+            return OrderSummarySerializer(data).data
+
+        return self.cached(merchant, "order_summary", start, end, {"timezone": merchant.timezone}, build)
     
     @action(detail=False, methods=["get"])
     def timeseries(self, request):
@@ -333,24 +460,25 @@ class MerchantAnalyticsViewSet(viewsets.ViewSet):
         start, end = self.get_date_range(request)
         statuses = self.get_statuses(request)
 
-        group_by = request.query_params.get("group_by", "day")
-        if group_by not in {"day", "month"}:
-            raise ValidationError("group_by 只能是 day 或 month")
-
-        data = build_order_timeseries(
-            merchant=merchant,
-            start=start,
-            end=end,
-            group_by=group_by,
-            statuses=statuses
-        )
+        group_by = self.get_group_by(request, start, end)
 
-        return Response(OrderTimeseriesSerializer({
-            "group_by": group_by,
-            "start": start,
-            "end": end,
-            "series": data,
-        }).data)
+        def build():
+            data = build_order_timeseries(
+                merchant=merchant,
+                start=start,
+                end=end,
+                group_by=group_by,
+                statuses=statuses
+            )
+            return OrderTimeseriesSerializer({
+                "group_by": group_by,
+                "start": start,
+                "end": end,
+                "series": data,
+            }).data
+
+        params = {"group_by": group_by, "statuses": sorted(statuses), "timezone": merchant.timezone}
+        return self.cached(merchant, "timeseries", start, end, params, build)
 
     @action(detail=False, methods=["get"])
     def top_products(self, request):
@@ -358,19 +486,22 @@ class MerchantAnalyticsViewSet(viewsets.ViewSet):
         start, end = self.get_date_range(request)
         limit = self.get_limit(request, 10)
 
-        data = build_top_products(
-            merchant=merchant,
-            start=start,
-            end=end,
-            limit=limit
-        )
+        def build():
+            data = build_top_products(
+                merchant=merchant,
+                start=start,
+                end=end,
+                limit=limit
+            )
+            return TopProductsResponseSerializer({
+                "start": start,
+                "end": end,
+                "limit": limit,
+                "top_products": data,
+            }).data
 
-        return Response(TopProductsResponseSerializer({
-            "start": start,
-            "end": end,
-            "limit": limit,
-            "top_products": data,
-        }).data)
+        params = {"limit": limit, "timezone": merchant.timezone}
+        return self.cached(merchant, "top_products", start, end, params, build)
 
     @action(detail=False, methods=["get"])
     def top_customers(self, request):
@@ -378,16 +509,166 @@ class MerchantAnalyticsViewSet(viewsets.ViewSet):
         start, end = self.get_date_range(request)
         limit = self.get_limit(request)
 
-        data = build_top_customers(
-            merchant=merchant,
-            start=start,
-            end=end,
-            limit=limit
+        def build():
+            data = build_top_customers(
+                merchant=merchant,
+                start=start,
+                end=end,
+                limit=limit
+            )
+            return TopCustomersResponseSerializer({
+                "start": start,
+                "end": end,
+                "limit": limit,
+                "top_customers": data,
+            }).data
+
+        params = {"limit": limit, "timezone": merchant.timezone}
+        return self.cached(merchant, "top_customers", start, end, params, build)
+
+    @action(detail=False, methods=["get"])
+    def dashboard(self, request):
+        """
+        一次取得多個指標：?metrics=summary,timeseries,top_products,top_customers（預設全部）
+        熱門商品 / 熟客的筆數分別由 ?product_limit=（預設 10）、?customer_limit=（預設 5）指定
+        所有指標共用同一次 OrderItem 明細讀取
+        """
+        merchant = self.get_merchant(request)
+        start, end = self.get_date_range(request)
+        statuses = self.get_statuses(request)
+        product_limit = self.get_limit(request, 10, "product_limit")
+        customer_limit = self.get_limit(request, 5, "customer_limit")
+
+        group_by = self.get_group_by(request, start, end)
+
+        metrics = [
+            metric
+            for value in request.query_params.getlist("metrics")
+            for metric in value.split(",") if metric
+        ] or list(DASHBOARD_METRICS)
+        unknown = set(metrics) - set(DASHBOARD_METRICS)
+        if unknown:
+            raise ValidationError(f"metrics 只能是 {', '.join(DASHBOARD_METRICS)}")
+
+        def build():
+            data = build_dashboard(
+                merchant=merchant,
+                start=start,
+                end=end,
+                metrics=metrics,
+                statuses=statuses,
+                group_by=group_by,
+                product_limit=product_limit,
+                customer_limit=customer_limit,
+            )
+            return DashboardSerializer({
+                "start": start,
+                "end": end,
+                "group_by": group_by,
+                **data,
+            }).data
+
+        params = {
+            "metrics": sorted(set(metrics)),
+            "statuses": sorted(statuses),
+            "group_by": group_by,
+            "timezone": merchant.timezone,
+            "product_limit": product_limit,
+            "customer_limit": customer_limit,
+        }
+        return self.cached(merchant, "dashboard", start, end, params, build)
+
+
+_RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def _read_range(fp, length, block_size=64 * 1024):
+    try:
+        while length > 0:
+            data = fp.read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        fp.close()
+
+
+def ranged_file_response(request, path, *, filename, content_type):
+    """
+    檔案下載，支援單一區段的 Range 請求（續傳 / 分段下載）：
+    - 沒有 Range 或格式不支援（例如多段）→ 200 整個檔案
+    - 合法區段 → 206 + Content-Range
+    - 起點超過檔案大小 → 416
+    """
+    size = path.stat().st_size
+    match = _RANGE_PATTERN.fullmatch(request.headers.get("Range", "").strip())
+
+    if not match or match.groups() == ("", ""):
+        response = FileResponse(open(path, "rb"), as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1 # bytes=-N：最後 N 個位元組
+
+        if start >= size or start > end:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        fp = open(path, "rb")
+        fp.seek(start)
+        response = StreamingHttpResponse(
+            _read_range(fp, end - start + 1), status=status.HTTP_206_PARTIAL_CONTENT, content_type=content_type,
         )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+class MerchantExportViewSet(mixins.CreateModelMixin,
+                            mixins.ListModelMixin,
+                            mixins.RetrieveModelMixin,
+                            viewsets.GenericViewSet):
+    """
+    商家匯出工作：
+    - POST：建立匯出工作（dataset=orders/items、format=csv/parquet、start、end），立即回傳 202
+    - GET：工作狀態與進度
+    - GET {id}/download/：下載完成的檔案（支援 Range）
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated, IsMerchant]
 
-        return Response(TopCustomersResponseSerializer({
-            "start": start,
-            "end": end,
-            "limit": limit,
-            "top_customers": data,
-        }).data)
+    CONTENT_TYPES = {
+        ExportJob.FormatChoices.CSV: "application/gzip",
+        ExportJob.FormatChoices.PARQUET: "application/vnd.apache.parquet",
+    }
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(merchant__user=self.request.user).order_by('-created_at')
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED # 工作已排入佇列，尚未完成
+        return response
+
+    def perform_create(self, serializer):
+        serializer.save(merchant=Merchant.objects.get(user=self.request.user))
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != ExportJob.StatusChoices.DONE:
+            return Response(
+                {"detail": f"匯出尚未完成（{job.status}）"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        path = export_path(job)
+        return ranged_file_response(
+            request, path, filename=path.name, content_type=self.CONTENT_TYPES[job.format],
+        )
@@ -0,0 +1,193 @@
+"""
+API 端點清單：store/urls.py 與 member/urls.py 的每個路由都要在這裡出現，
+查詢數上限測試與延遲基準測試共用。
+
+每個 Endpoint 的 build(ctx) 在計時之前執行，負責準備這次請求需要的資料
+（例如付款需要一筆新的待付款訂單），回傳 (path, data)。
+"""
+import itertools
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable
+
+from django.urls import URLPattern, URLResolver
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from store.analytics.services.analytics_cache import LIVE, bump_version
+from store.models import ExportJob, Order, Store
+from store.services.exports import run_export
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str # 路由名稱（url name）
+    method: str
+    actor: str | None # None / "member" / "merchant"
+    max_queries: int # 查詢數上限，設為實測的查詢數
+    build: Callable[[dict], tuple[str, dict | None]]
+    label: str = "" # 同一路由有多個方法時用來區分
+
+    @property
+    def key(self):
+        return f"{self.name} {self.method}{' ' + self.label if self.label else ''}"
+
+
+def seed_api_data(*, products=10, orders=8, items_per_order=2):
+    """
+    以 tests/factories 建立一位商家（含商店、商品）與一位有訂單的會員
+    """
+    merchant = MerchantFactory()
+    store = Store.objects.get(merchant=merchant)
+    catalog = [ProductFactory(store=store, price=Decimal("99.99"), stock=10_000) for _ in range(products)]
+
+    member = MemberFactory()
+    for i in range(orders):
+        order = OrderFactory(member=member, status=Order.StatusChoices.PAID)
+        for j in range(items_per_order):
+            OrderItemFactory(order=order, product=catalog[(i + j) % len(catalog)])
+
+    return {
+        "merchant": merchant,
+        "store": store,
+        "products": catalog,
+        "member": member,
+        "order": order,
+        "counter": itertools.count(),
+    }
+
+
+def client_for(ctx, actor):
+    client = APIClient()
+    if actor == "member":
+        client.force_authenticate(user=ctx["member"].user)
+    elif actor == "merchant":
+        client.force_authenticate(user=ctx["merchant"].user)
+    return client
+
+
+def send(client, endpoint, path, data):
+    return getattr(client, endpoint.method.lower())(path, data, format="json")
+
+
+def _new_order(ctx, status=Order.StatusChoices.PENDING):
+    order = OrderFactory(member=ctx["member"], status=status)
+    OrderItemFactory(order=order, product=ctx["products"][0])
+    return order
+
+
+def _analytics(action):
+    def build(ctx):
+        # 量測的是報表計算，不是快取命中：區間包含今天，遞增 live 版本號讓快取失效
+        bump_version(ctx["merchant"].id, LIVE)
+        end = date.today()
+        start = end - timedelta(days=30)
+        return f"/store/merchant/analytics/{action}/?start={start}&end={end}", None
+    return build
+
+
+def _export_job(ctx, run=False):
+    job = ExportJob.objects.create(
+        merchant=ctx["merchant"], dataset="orders", start=date.today() - timedelta(days=30), end=date.today(),
+    )
+    if run:
+        run_export(job.id)
+    return job
+
+
+def _export_list(ctx):
+    for _ in range(3):
+        _export_job(ctx)
+    return "/store/merchant/exports/", None
+
+
+def _register(ctx):
+    return "/member/register/", {
+        "username": f"bench-register-{next(ctx['counter'])}",
+        "password": "test1234",
+        "email": "bench@test.com",
+        "role": "member",
+    }
+
+
+ENDPOINTS = [
+    # store
+    Endpoint("api-root", "GET", None, 0, lambda ctx: ("/store/", None), label="store"),
+    Endpoint("product_info", "GET", None, 2, lambda ctx: ("/store/products/info/", None)),
+    Endpoint("store-list", "GET", None, 3, lambda ctx: ("/store/stores/", None)),
+    Endpoint("store-detail", "GET", None, 2, lambda ctx: (f"/store/stores/{ctx['store'].id}/", None)),
+    Endpoint("store-detail", "PATCH", "merchant", 3,
+             lambda ctx: (f"/store/stores/{ctx['store'].id}/", {"address": "高雄市"})),
+    Endpoint("store-products", "GET", None, 3, lambda ctx: (f"/store/stores/{ctx['store'].id}/products/", None)),
+    Endpoint("product-list", "GET", None, 2, lambda ctx: ("/store/products/", None)),
+    Endpoint("product-list", "POST", "merchant", 2, lambda ctx: ("/store/products/", {
+        "name": "新商品", "description": "基準測試商品", "price": "10.00", "stock": 5,
+    })),
+    Endpoint("product-detail", "GET", None, 1, lambda ctx: (f"/store/products/{ctx['products'][0].id}/", None)),
+    Endpoint("product-detail", "PATCH", "merchant", 2,
+             lambda ctx: (f"/store/products/{ctx['products'][0].id}/", {"stock": 10_000})),
+    Endpoint("product-detail", "DELETE", "merchant", 7,
+             lambda ctx: (f"/store/products/{ProductFactory(store=ctx['store']).id}/", None)),
+    Endpoint("order_list_create", "GET", "member", 4, lambda ctx: ("/store/orders/", None)),
+    Endpoint("order_list_create", "GET", "merchant", 4, lambda ctx: ("/store/orders/", None), label="merchant"),
+    Endpoint("order_list_create", "POST", "member", 17, lambda ctx: ("/store/orders/", {
+        "receiver_name": "bench",
+        "receiver_phone": "0900000000",
+        "address": "高雄市",
+        "items": [{"product": p.id, "quantity": 1} for p in ctx["products"][:3]],
+    })),
+    Endpoint("order_detail", "GET", "member", 3, lambda ctx: (f"/store/orders/{ctx['order'].id}/", None)),
+    Endpoint("order_detail", "PATCH", "member", 4,
+             lambda ctx: (f"/store/orders/{ctx['order'].id}/", {"note": "bench"})),
+    Endpoint("order_detail", "DELETE", "member", 16,
+             lambda ctx: (f"/store/orders/{_new_order(ctx).id}/", None)),
+    Endpoint("order_pay", "POST", "member", 18,
+             lambda ctx: (f"/store/orders/{_new_order(ctx).id}/pay/", {"payment_method": "credit_card"})),
+    Endpoint("order_ship", "POST", "merchant", 18,
+             lambda ctx: (f"/store/orders/{_new_order(ctx, Order.StatusChoices.PAID).id}/ship/", None)),
+    Endpoint("order_cancel", "POST", "member", 17,
+             lambda ctx: (f"/store/orders/{_new_order(ctx).id}/cancel/", None)),
+    Endpoint("merchant_order_bulk_transition", "POST", "merchant", 17, lambda ctx: ("/store/merchant/orders/transition/", {
+        "action": "ship", "order_ids": [_new_order(ctx, Order.StatusChoices.PAID).id for _ in range(3)],
+    })),
+    Endpoint("merchant_analytics-order-summary", "GET", "merchant", 3, _analytics("order_summary")),
+    Endpoint("merchant_analytics-timeseries", "GET", "merchant", 3, _analytics("timeseries")),
+    Endpoint("merchant_analytics-top-products", "GET", "merchant", 3, _analytics("top_products")),
+    Endpoint("merchant_analytics-top-customers", "GET", "merchant", 2, _analytics("top_customers")),
+    Endpoint("merchant_analytics-dashboard", "GET", "merchant", 2, _analytics("dashboard")),
+    Endpoint("merchant_exports-list", "GET", "merchant", 2, _export_list),
+    Endpoint("merchant_exports-list", "POST", "merchant", 2, lambda ctx: ("/store/merchant/exports/", {
+        "dataset": "items", "start": str(date.today() - timedelta(days=30)), "end": str(date.today()),
+    })),
+    Endpoint("merchant_exports-detail", "GET", "merchant", 1,
+             lambda ctx: (f"/store/merchant/exports/{_export_job(ctx).id}/", None)),
+    Endpoint("merchant_exports-download", "GET", "merchant", 1,
+             lambda ctx: (f"/store/merchant/exports/{_export_job(ctx, run=True).id}/download/", None)),
+    # member
+    Endpoint("api-root", "GET", None, 0, lambda ctx: ("/member/", None), label="member"),
+    Endpoint("register", "POST", None, 4, _register),
+    Endpoint("login", "POST", None, 4, lambda ctx: ("/member/login/", {
+        "username": ctx["member"].user.username, "password": "test1234",
+    })),
+    Endpoint("refresh", "POST", None, 1, lambda ctx: ("/member/login/refresh/", {
+        "refresh": str(RefreshToken.for_user(ctx["member"].user)),
+    })),
+    Endpoint("members-detail", "GET", "member", 4, lambda ctx: (f"/member/members/{ctx['member'].id}/", None)),
+    Endpoint("members-detail", "PATCH", "member", 9,
+             lambda ctx: (f"/member/members/{ctx['member'].id}/", {"address": "高雄市"})),
+]
+
+
+def route_names(urlpatterns):
+    """列出 urlpatterns 中所有具名路由（含 router 產生的）"""
+    names = set()
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
@@ -0,0 +1,243 @@
+"""
+效能基準測試共用工具。
+
+基準測試資料量大、執行時間長，預設不執行；
+需要時以環境變數開啟：
+
+    RUN_BENCHMARKS=1 pytest tests/benchmarks -s
+"""
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import OperationalError, connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from store.models import Order, OrderItem, Product, Store
+from store.serializers import OrderCreateSerializer
+from store.services.inventory import InsufficientStock
+
+from store.services.order_numbers import get_order_number_allocator
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+BENCHMARKS_ENABLED = os.environ.get("RUN_BENCHMARKS") == "1"
+
+requires_benchmarks = pytest.mark.skipif(
+    not BENCHMARKS_ENABLED,
+    reason="設定 RUN_BENCHMARKS=1 才會執行效能基準測試",
+)
+
+
+def env_int(name, default):
+    """讀取整數環境變數，方便在 CI 與本機調整資料量"""
+    return int(os.environ.get(name, default))
+
+
+def percentile(values, pct):
+    """最近排名法（nearest-rank）計算百分位數"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(func, repeat=20, prepare=None, warmup=0):
+    """
+    重複執行 func，回傳 (每次耗時 ms 的 list, 每次的查詢數 list)
+    prepare 不為 None 時，每次先執行 prepare()（不計時），其回傳值當作 func 的參數
+    warmup：先執行幾次不計入結果（第一次請求的 import、URL 解析等冷啟動成本）
+    """
+    for _ in range(warmup):
+        func(*(prepare() if prepare else ()))
+    durations = []
+    query_counts = []
+    for _ in range(repeat):
+        args = prepare() if prepare else ()
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            func(*args)
+            durations.append((time.perf_counter() - started) * 1000)
+        query_counts.append(len(ctx.captured_queries))
+    return durations, query_counts
+
+
+def print_table(title, headers, rows):
+    """以固定寬度表格輸出結果（搭配 pytest -s 觀察）"""
+    widths = [
+        max(len(str(headers[i])), *(len(str(row[i])) for row in rows))
+        for i in range(len(headers))
+    ]
+    print(f"\n{title}")
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
+
+
+def rss_mb():
+    """目前行程的常駐記憶體（RSS，MB）；讀 /proc，只支援 Linux"""
+    with open("/proc/self/statm") as fp:
+        pages = int(fp.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def _allocate_many(count):
+    allocator = get_order_number_allocator()
+    return [allocator.allocate() for _ in range(count)]
+
+
+def allocate_in_processes(processes, per_process):
+    """
+    以多個 fork 出來的行程（模擬 gunicorn worker）各自配發訂單編號
+    """
+    ctx = multiprocessing.get_context("fork")
+    # 先在父行程建立配發器，確認 fork 後子行程會依 PID 重新開始
+    get_order_number_allocator().allocate()
+    with ctx.Pool(processes) as pool:
+        batches = pool.map(_allocate_many, [per_process] * processes)
+    return [number for batch in batches for number in batch]
+
+
+def seed_order_items(item_count, *, first_day, merchants=10, products_per_store=20, days=365, batch_size=5_000):
+    """
+    以 bulk_create 建立 item_count 筆 OrderItem，回傳第一個商家
+    每筆訂單 2 項、分散在 merchants 個商家；每批訂單落在 first_day 之後 days 天內的某一天
+    """
+    rng = random.Random(7)
+    stores = [Store.objects.get(merchant=MerchantFactory()) for _ in range(merchants)]
+    Product.objects.bulk_create([
+        Product(store=store, name=f"{store.id}-{i}", description="", price=Decimal("10.00"), stock=0)
+        for store in stores for i in range(products_per_store)
+    ])
+    product_ids = list(Product.objects.values_list("id", flat=True))
+    members = [MemberFactory() for _ in range(20)]
+    first_day = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
+    statuses = [choice for choice, _ in Order.StatusChoices.choices]
+
+    created = 0
+    while created < item_count:
+        size = min(batch_size, item_count - created) // 2 or 1
+        orders = Order.objects.bulk_create([
+            Order(
+                order_number=f"SEED-{created}-{i}",
+                member=rng.choice(members),
+                receiver_name="bench",
+                receiver_phone="0900000000",
+                address="高雄市",
+                status=rng.choice(statuses),
+            )
+            for i in range(size)
+        ])
+        # created_at 是 auto_now_add，建立後再把整批移到隨機的一天
+        Order.objects.filter(id__in=[order.id for order in orders]).update(
+            created_at=first_day + timedelta(minutes=rng.randrange(days * 24 * 60))
+        )
+        items = [
+            OrderItem(order=order, product_id=product_id, quantity=rng.randint(1, 3), price_at_purchase=Decimal("10.00"))
+            for order in orders
+            for product_id in rng.sample(product_ids, 2)
+        ]
+        OrderItem.objects.bulk_create(items)
+        created += len(items)
+
+    return stores[0].merchant
+
+
+def order_serializer(product, quantity=1):
+    """驗證過、尚未儲存的下單 serializer（save(member=...) 建立訂單）"""
+    serializer = OrderCreateSerializer(data={
+        "receiver_name": "搶購",
+        "receiver_phone": "0900000000",
+        "address": "高雄市",
+        "items": [{"product": product.id, "quantity": quantity}],
+    })
+    serializer.is_valid(raise_exception=True)
+    return serializer
+
+
+def _buy_many(product, member, *, attempts, quantity, barrier, write_lock):
+    """一個買家連續下單 attempts 次，回傳 (成功數, 因庫存不足被拒絕的次數)"""
+    sold = rejected = 0
+    barrier.wait()
+    try:
+        for _ in range(attempts):
+            while True:
+                try:
+                    serializer = order_serializer(product, quantity)
+                    with write_lock:
+                        serializer.save(member=member)
+                    sold += 1
+                except InsufficientStock:
+                    rejected += 1
+                except OperationalError:
+                    time.sleep(0.001)
+                    continue
+                break
+    finally:
+        connections.close_all()
+    return sold, rejected
+
+
+def _buy_in_process(results, product, member, kwargs):
+    results.put(_buy_many(product, member, **kwargs))
+
+
+def hammer_product(product, members, *, attempts_per_member, quantity=1, processes=False):
+    """
+    每個會員一個執行緒，同時對同一商品下單 attempts_per_member 次
+    回傳 (成功的訂單數, 因庫存不足被拒絕的次數, 耗時秒數)
+    SQLite 同時只允許一個寫入者：寫入以 lock 排隊（驗證時讀到的庫存仍可能已過期，條件式 UPDATE 照樣會被考驗），
+    讀取遇到 table is locked 時重試；PostgreSQL 不排隊，直接量測列鎖競爭
+    processes=True 時每個會員改用一個 fork 出來的行程（模擬多個 gunicorn worker）：
+    執行緒共用 GIL，Python 端的開銷會蓋過資料庫的鎖等待；只支援 SQLite 以外的資料庫
+    """
+    if processes and connection.vendor == "sqlite":
+        raise ValueError("SQLite 測試資料庫無法跨行程共用，processes=True 需要 PostgreSQL")
+
+    kwargs = {"attempts": attempts_per_member, "quantity": quantity}
+    if processes:
+        ctx = multiprocessing.get_context("fork")
+        kwargs.update(barrier=ctx.Barrier(len(members)), write_lock=nullcontext())
+        queue = ctx.Queue()
+        connections.close_all() # 子行程各自建立連線
+        workers = [ctx.Process(target=_buy_in_process, args=(queue, product, member, kwargs)) for member in members]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        results = [queue.get(timeout=600) for _ in workers]
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        assert all(worker.exitcode == 0 for worker in workers), "有行程發生錯誤"
+    else:
+        kwargs.update(
+            barrier=threading.Barrier(len(members)),
+            write_lock=threading.Lock() if connection.vendor == "sqlite" else nullcontext(),
+        )
+        results = []
+        lock = threading.Lock()
+
+        def buy(member):
+            outcome = _buy_many(product, member, **kwargs)
+            with lock:
+                results.append(outcome)
+
+        threads = [threading.Thread(target=buy, args=(member,)) for member in members]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    assert len(results) == len(members), "有執行緒發生錯誤"
+    return sum(sold for sold, _ in results), sum(rejected for _, rejected in results), elapsed
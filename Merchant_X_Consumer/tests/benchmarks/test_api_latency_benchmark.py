@@ -0,0 +1,100 @@
+"""
+每個 API 端點的延遲基準（p50 / p95），與 baselines/api_latency.json 比較
+
+    RUN_BENCHMARKS=1 pytest tests/benchmarks/test_api_latency_benchmark.py -s
+    RUN_BENCHMARKS=1 BENCH_UPDATE_BASELINE=1 pytest ...   # 重新記錄基準
+
+p95 超過基準 (1 + BENCH_REGRESSION_THRESHOLD) 倍、且差距大於 BENCH_REGRESSION_SLACK_MS 時判定為退步；
+查詢數增加、或端點沒有基準一律判定為失敗。每個端點先送一次請求暖機，不計入結果。
+基準與機器有關，換環境時請先重新記錄。
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from tests.benchmarks.endpoints import ENDPOINTS, client_for, seed_api_data, send
+from tests.benchmarks.helpers import (
+    env_int, measure, percentile, print_table, requires_benchmarks)
+
+pytestmark = requires_benchmarks
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "api_latency.json"
+
+
+def load_baseline():
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+
+def save_baseline(results):
+    BASELINE_PATH.write_text(
+        json.dumps(results, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+        encoding="utf-8",
+    )
+
+
+def regressions(results, baseline, *, threshold, slack_ms):
+    problems = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            problems.append(f"{key}: 沒有基準（以 BENCH_UPDATE_BASELINE=1 記錄）")
+            continue
+        if current["queries"] > previous["queries"]:
+            problems.append(f"{key}: 查詢數 {previous['queries']} -> {current['queries']}")
+        limit = previous["p95_ms"] * (1 + threshold)
+        if current["p95_ms"] > limit and current["p95_ms"] - previous["p95_ms"] > slack_ms:
+            problems.append(f"{key}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+    return problems
+
+
+@pytest.mark.django_db
+def test_api_latency_against_baseline():
+    ctx = seed_api_data(
+        products=env_int("BENCH_API_PRODUCTS", 200),
+        orders=env_int("BENCH_API_ORDERS", 500),
+    )
+    repeat = env_int("BENCH_API_REPEAT", 30)
+
+    results = {}
+    for endpoint in ENDPOINTS:
+        client = client_for(ctx, endpoint.actor)
+
+        def prepare(endpoint=endpoint):
+            return endpoint.build(ctx)
+
+        def request(path, data, endpoint=endpoint, client=client):
+            res = send(client, endpoint, path, data)
+            assert res.status_code < 400, (endpoint.key, res.status_code)
+
+        durations, query_counts = measure(request, repeat, prepare=prepare, warmup=1)
+        results[endpoint.key] = {
+            "p50_ms": round(percentile(durations, 50), 2),
+            "p95_ms": round(percentile(durations, 95), 2),
+            "queries": max(query_counts),
+        }
+
+    baseline = load_baseline()
+    print_table(
+        f"API 延遲（每個端點 {repeat} 次）",
+        ["endpoint", "p50 ms", "p95 ms", "queries", "baseline p95"],
+        [
+            (key, r["p50_ms"], r["p95_ms"], r["queries"], baseline.get(key, {}).get("p95_ms", "-"))
+            for key, r in results.items()
+        ],
+    )
+
+    if os.environ.get("BENCH_UPDATE_BASELINE") == "1" or not baseline:
+        save_baseline(results)
+        return
+
+    problems = regressions(
+        results,
+        baseline,
+        threshold=float(os.environ.get("BENCH_REGRESSION_THRESHOLD", "0.5")),
+        slack_ms=float(os.environ.get("BENCH_REGRESSION_SLACK_MS", "5")),
+    )
+    assert not problems, "效能退步：\n" + "\n".join(problems)
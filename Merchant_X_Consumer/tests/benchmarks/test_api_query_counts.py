@@ -0,0 +1,34 @@
+"""
+每個 API 端點的查詢數上限（一般測試流程就會執行，不需 RUN_BENCHMARKS）
+
+種子資料的訂單、商品數都超過一頁，若序列化時出現 N+1，查詢數會明顯超過上限。
+上限設為實測的查詢數，減少查詢之後請一併調低 max_queries，不要讓上限留下空間。
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import member.urls
+import store.urls
+from tests.benchmarks.endpoints import ENDPOINTS, client_for, route_names, seed_api_data, send
+
+
+def test_every_route_has_an_endpoint():
+    covered = {endpoint.name for endpoint in ENDPOINTS}
+    routes = route_names(store.urls.urlpatterns) | route_names(member.urls.urlpatterns)
+    assert routes - covered == set()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("endpoint", ENDPOINTS, ids=lambda endpoint: endpoint.key)
+def test_endpoint_query_count(endpoint, django_capture_on_commit_callbacks):
+    ctx = seed_api_data()
+    client = client_for(ctx, endpoint.actor)
+    path, data = endpoint.build(ctx)
+
+    # commit 之後才執行的工作（例如彙總表累加）也算在請求的查詢數內
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+        res = send(client, endpoint, path, data)
+
+    assert res.status_code < 400, res.data
+    assert len(queries) <= endpoint.max_queries, "\n".join(q["sql"] for q in queries.captured_queries)
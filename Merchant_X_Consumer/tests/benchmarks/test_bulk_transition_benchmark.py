@@ -0,0 +1,94 @@
+import gc
+import os
+import statistics
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from store.models import Order
+from tests.benchmarks.helpers import env_int, print_table, requires_benchmarks
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+pytestmark = requires_benchmarks
+
+
+def seed_paid_orders(store, count):
+    product = ProductFactory(store=store)
+    member = MemberFactory()
+    orders = []
+    for _ in range(count):
+        order = OrderFactory(member=member, status=Order.StatusChoices.PAID)
+        OrderItemFactory(order=order, product=product)
+        orders.append(order)
+    return orders
+
+
+@pytest.mark.django_db
+def test_bulk_ship_vs_one_request_per_order():
+    """
+    商家出貨 BENCH_BULK_ORDERS 筆訂單：逐筆呼叫 /store/orders/{id}/ship/ 與一次呼叫 /store/merchant/orders/transition/
+    批次端點的查詢數不隨訂單數成長，耗時（BENCH_BULK_REPEAT 次的中位數）至少要快 BENCH_BULK_MIN_SPEEDUP 倍
+    """
+    count = env_int("BENCH_BULK_ORDERS", 200)
+    repeat = env_int("BENCH_BULK_REPEAT", 5)
+    min_speedup = float(os.environ.get("BENCH_BULK_MIN_SPEEDUP", "50"))
+
+    merchant = MerchantFactory()
+    client = APIClient()
+    client.force_authenticate(user=merchant.user)
+
+    # 兩種方式各先送一次請求（不計時，批次端點用同樣筆數），避免冷啟動成本只落在其中一邊
+    warm_up = seed_paid_orders(merchant.store, count + 1)
+    assert client.post(f"/store/orders/{warm_up[0].id}/ship/").status_code == 200
+    assert client.post(
+        "/store/merchant/orders/transition/",
+        {"action": "ship", "order_ids": [order.id for order in warm_up[1:]]},
+        format="json",
+    ).status_code == 200
+
+    single_orders = seed_paid_orders(merchant.store, count)
+    gc.collect() # 建立測試資料留下的物件不要在計時中才被回收
+    with CaptureQueriesContext(connection) as single_queries:
+        started = time.perf_counter()
+        for order in single_orders:
+            res = client.post(f"/store/orders/{order.id}/ship/")
+            assert res.status_code == 200, res.data
+        single_seconds = time.perf_counter() - started
+
+    # 單次批次請求只有幾十毫秒，容易受雜訊影響：以 BENCH_BULK_REPEAT 批新的訂單各送一次，取中位數
+    bulk_orders, bulk_runs = [], []
+    for _ in range(repeat):
+        orders = seed_paid_orders(merchant.store, count)
+        gc.collect()
+        with CaptureQueriesContext(connection) as bulk_queries:
+            started = time.perf_counter()
+            res = client.post(
+                "/store/merchant/orders/transition/",
+                {"action": "ship", "order_ids": [order.id for order in orders]},
+                format="json",
+            )
+            bulk_runs.append(time.perf_counter() - started)
+        assert res.status_code == 200, res.data
+        assert res.data["updated"] == count
+        bulk_orders += orders
+    bulk_seconds = statistics.median(bulk_runs)
+
+    speedup = single_seconds / bulk_seconds
+    print_table(
+        f"出貨 {count} 筆訂單（{connection.vendor}）",
+        ["mode", "requests", "queries", "seconds", "orders/s"],
+        [
+            ("one by one", count, len(single_queries), f"{single_seconds:.3f}", f"{count / single_seconds:,.0f}"),
+            ("bulk", 1, len(bulk_queries), f"{bulk_seconds:.3f}", f"{count / bulk_seconds:,.0f}"),
+        ],
+    )
+
+    assert not Order.objects.filter(
+        id__in=[order.id for order in single_orders + bulk_orders],
+    ).exclude(status=Order.StatusChoices.SHIPPED).exists()
+    assert speedup >= min_speedup, f"批次出貨只快 {speedup:.1f} 倍"
@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+
+from store.analytics.services.order_analytics import (
+    build_order_timeseries, build_top_customers, build_top_products)
+from store.models import Order
+from tests.benchmarks.helpers import (
+    env_int, measure, percentile, print_table, requires_benchmarks, seed_order_items)
+
+np = pytest.importorskip("numpy")
+
+from store.analytics.services.columnar import OrderItemColumns  # noqa: E402
+
+pytestmark = requires_benchmarks
+
+PAID_OR_COMPLETED = [Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED]
+
+
+@pytest.mark.django_db
+def test_columnar_engine_vs_sql_on_multi_year_range(settings):
+    """
+    三年區間：SQL builder（時序 + 熱門商品 + 熟客各自查詢）vs 欄式引擎（讀一次明細）
+    """
+    start, end = date(2023, 1, 1), date(2025, 12, 31)
+    merchant = seed_order_items(
+        env_int("BENCH_COLUMNAR_ITEMS", 1_000_000), first_day=start, days=(end - start).days + 1,
+    )
+    repeat = env_int("BENCH_COLUMNAR_REPEAT", 3)
+
+    def sql():
+        return (
+            build_order_timeseries(merchant=merchant, start=start, end=end, statuses=PAID_OR_COMPLETED),
+            build_top_products(merchant=merchant, start=start, end=end),
+            build_top_customers(merchant=merchant, start=start, end=end),
+        )
+
+    def columnar():
+        columns = OrderItemColumns.load(merchant=merchant, start=start, end=end, statuses=PAID_OR_COMPLETED)
+        return (
+            columns.timeseries(statuses=PAID_OR_COMPLETED),
+            columns.top_products(statuses=PAID_OR_COMPLETED),
+            columns.top_customers(statuses=PAID_OR_COMPLETED),
+        )
+
+    assert columnar() == sql()
+
+    rows = []
+    for name, func in [("sql", sql), ("columnar", columnar)]:
+        durations, query_counts = measure(func, repeat)
+        rows.append((name, f"{percentile(durations, 50):.0f}", f"{percentile(durations, 95):.0f}", max(query_counts)))
+
+    print_table("三年區間分析（時序 + 熱門商品 + 熟客）", ["engine", "p50 ms", "p95 ms", "queries"], rows)
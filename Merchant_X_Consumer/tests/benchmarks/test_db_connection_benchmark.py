@@ -0,0 +1,80 @@
+import os
+import time
+
+import pytest
+from django.db.backends.signals import connection_created
+from django.db.utils import ConnectionHandler
+
+from Merchant_X_Consumer.db_config import POSTGRES_ENGINES, database_config, pool_available
+from tests.benchmarks.helpers import env_int, percentile, print_table, requires_benchmarks
+
+pytestmark = requires_benchmarks
+
+
+def simulate_requests(config, requests):
+    """
+    模擬 gunicorn worker 依序處理請求：請求開始與結束時 Django 都會呼叫 close_if_unusable_or_obsolete()，
+    中間執行一個簡單查詢；回傳 (每個請求耗時 ms 的 list, 建立的連線數)
+    """
+    connection = ConnectionHandler({"default": config})["default"]
+    opened = []
+
+    def on_created(sender, connection, **kwargs):
+        opened.append(connection)
+
+    connection_created.connect(on_created)
+    durations = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            connection.close_if_unusable_or_obsolete()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            connection.close_if_unusable_or_obsolete()
+            durations.append((time.perf_counter() - started) * 1000)
+    finally:
+        connection_created.disconnect(on_created)
+        connection.close()
+        if config.get("OPTIONS", {}).get("pool"):
+            connection.close_pool()
+    return durations, len(opened)
+
+
+def test_connection_reuse_overhead(tmp_path, django_db_blocker):
+    """
+    每個請求重新連線（CONN_MAX_AGE=0）、持久連線（CONN_MAX_AGE=60）、psycopg3 連線池三種模式的每請求開銷
+    預設以 SQLite 檔代替 PostgreSQL；設定 BENCH_DATABASE_URL=postgres://... 可量測真實的連線成本
+    （連線池只在 PostgreSQL 且安裝 psycopg[pool] 時量測）
+    """
+    url = os.environ.get("BENCH_DATABASE_URL", f"sqlite:///{tmp_path / 'bench.sqlite3'}")
+    requests = env_int("BENCH_DB_REQUESTS", 2_000)
+
+    modes = {
+        "no reuse": database_config(url, conn_max_age=0, health_checks=False),
+        "persistent": database_config(url, conn_max_age=60, health_checks=True),
+    }
+    if database_config(url)["ENGINE"] in POSTGRES_ENGINES and pool_available():
+        modes["pool"] = database_config(url, pool=True)
+
+    results = {}
+    with django_db_blocker.unblock():
+        for name, config in modes.items():
+            simulate_requests(config, 50) # 暖機
+            results[name] = simulate_requests(config, requests)
+
+    print_table(
+        f"每請求資料庫連線開銷（{url.split(':', 1)[0]}，{requests} requests）",
+        ["mode", "connections", "mean ms", "p50 ms", "p95 ms"],
+        [
+            (
+                name, opened, f"{sum(durations) / len(durations):.3f}",
+                f"{percentile(durations, 50):.3f}", f"{percentile(durations, 95):.3f}",
+            )
+            for name, (durations, opened) in results.items()
+        ],
+    )
+
+    assert results["no reuse"][1] == requests
+    assert results["persistent"][1] == 1
+    assert sum(results["persistent"][0]) < sum(results["no reuse"][0])
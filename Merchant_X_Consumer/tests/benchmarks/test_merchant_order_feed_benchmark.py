@@ -0,0 +1,101 @@
+import random
+import time
+
+import pytest
+from decimal import Decimal
+
+from django.db.models import Exists, OuterRef
+
+from store.models import Order, OrderItem, Product, Store
+from store.views import store_orders
+from tests.benchmarks.helpers import (
+    env_int, measure, percentile, print_table, requires_benchmarks)
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+pytestmark = requires_benchmarks
+
+PAGE_SIZE = 5
+
+
+def seed_orders(order_count, store_count=20, products_per_store=10, batch_size=20_000):
+    """
+    以 bulk_create 建立大量訂單，每筆訂單 1~3 個項目、分散在不同商店
+    """
+    rng = random.Random(42)
+    stores = [Store.objects.get(merchant=MerchantFactory()) for _ in range(store_count)]
+    Product.objects.bulk_create([
+        Product(store=store, name=f"{store.id}-{i}", description="", price=Decimal("10.00"), stock=0)
+        for store in stores for i in range(products_per_store)
+    ])
+    product_ids = list(Product.objects.values_list("id", flat=True))
+    member = MemberFactory()
+
+    created = 0
+    while created < order_count:
+        size = min(batch_size, order_count - created)
+        orders = Order.objects.bulk_create([
+            Order(
+                order_number=f"BENCH-{created + i}",
+                member=member,
+                receiver_name="bench",
+                receiver_phone="0900000000",
+                address="高雄市",
+            )
+            for i in range(size)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, quantity=1, price_at_purchase=Decimal("10.00"))
+            for order in orders
+            for product_id in rng.sample(product_ids, rng.randint(1, 3))
+        ])
+        created += size
+
+    return stores[0]
+
+
+@pytest.mark.django_db
+def test_merchant_order_feed_exists_vs_distinct_join():
+    """
+    商家訂單列表：JOIN + DISTINCT vs EXISTS vs IN 子查詢（預設 100 萬筆訂單）
+    """
+
+    order_count = env_int("BENCH_ORDER_COUNT", 1_000_000)
+    repeat = env_int("BENCH_REPEAT", 10)
+
+    started = time.perf_counter()
+    store = seed_orders(order_count)
+    seed_seconds = time.perf_counter() - started
+
+    strategies = {
+        "distinct_join": lambda: Order.objects.filter(items__product__store=store).distinct(),
+        "exists": lambda: Order.objects.filter(
+            Exists(OrderItem.objects.filter(order=OuterRef("pk"), product__store=store))
+        ),
+        "semi_join (store_orders)": lambda: store_orders(store),
+    }
+
+    rows = []
+    results = {}
+    for name, build in strategies.items():
+        ordered = lambda: build().order_by("-created_at", "-id")  # noqa: E731
+
+        for label, offset in [("page_1", 0), ("page_1000", 999 * PAGE_SIZE)]:
+            durations, _ = measure(
+                lambda: list(ordered()[offset:offset + PAGE_SIZE].values_list("id", flat=True)),
+                repeat=repeat,
+            )
+            rows.append((name, label, f"{percentile(durations, 50):.1f}", f"{percentile(durations, 95):.1f}"))
+
+        durations, _ = measure(lambda: build().count(), repeat=max(1, repeat // 2))
+        rows.append((name, "count", f"{percentile(durations, 50):.1f}", f"{percentile(durations, 95):.1f}"))
+
+        results[name] = list(ordered()[:50].values_list("id", flat=True))
+
+    print_table(
+        f"Merchant order feed ({order_count:,} orders, seeded in {seed_seconds:.0f}s)",
+        ["strategy", "query", "p50_ms", "p95_ms"],
+        rows,
+    )
+
+    assert results["exists"] == results["distinct_join"]
+    assert results["semi_join (store_orders)"] == results["distinct_join"]
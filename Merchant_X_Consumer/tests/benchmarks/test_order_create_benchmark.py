@@ -0,0 +1,78 @@
+import pytest
+from decimal import Decimal
+
+from store.models import Product, Store
+from store.serializers import OrderCreateSerializer
+from tests.benchmarks.helpers import (
+    env_int, measure, percentile, print_table, requires_benchmarks)
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+pytestmark = requires_benchmarks
+
+CART_SIZES = [1, 5, 10, 30, 60]
+
+
+@pytest.mark.django_db
+def test_order_create_round_trips_and_latency_by_cart_size():
+    """
+    建立訂單：購物車大小 vs 資料庫往返次數 / p95 延遲
+    - 寫入流程的查詢數不應隨購物車大小成長
+    """
+
+    repeat = env_int("BENCH_REPEAT", 30)
+
+    merchant = MerchantFactory()
+    store = Store.objects.get(merchant=merchant)
+    Product.objects.bulk_create([
+        Product(
+            store=store,
+            name=f"商品{i}",
+            description="benchmark",
+            price=Decimal("10.00"),
+            stock=1_000_000,
+        )
+        for i in range(max(CART_SIZES))
+    ])
+    products = list(Product.objects.filter(store=store).order_by("id"))
+    member = MemberFactory()
+
+    rows = []
+    round_trips = {}
+    for size in CART_SIZES:
+        payload = {
+            "receiver_name": "王小明",
+            "receiver_phone": "0912345678",
+            "address": "高雄市",
+            "items": [{"product": p.id, "quantity": 1} for p in products[:size]],
+        }
+
+        def create_order():
+            serializer = OrderCreateSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(member=member)
+
+        # 驗證階段不在量測範圍內，只量 create() 的寫入流程
+        def save_only():
+            serializer.save(member=member)
+
+        durations, _ = measure(create_order, repeat=repeat)
+
+        serializer = OrderCreateSerializer(data=payload)
+        serializer.is_valid(raise_exception=True)
+        _, query_counts = measure(save_only, repeat=1)
+
+        round_trips[size] = query_counts[0]
+        rows.append((
+            size,
+            query_counts[0],
+            f"{percentile(durations, 50):.2f}",
+            f"{percentile(durations, 95):.2f}",
+        ))
+
+    print_table(
+        "Order create (validate + save)",
+        ["cart_size", "save_queries", "p50_ms", "p95_ms"],
+        rows,
+    )
+
+    assert len(set(round_trips.values())) == 1
@@ -0,0 +1,67 @@
+import gc
+import time
+
+import pytest
+from rest_framework.test import APIClient
+
+from store.models import Order
+from tests.benchmarks.helpers import env_int, print_table, requires_benchmarks, rss_mb
+from tests.factories.user_factory import MemberFactory
+
+pytestmark = requires_benchmarks
+
+
+def seed_orders(member, total, batch_size=20_000):
+    created = 0
+    while created < total:
+        size = min(batch_size, total - created)
+        Order.objects.bulk_create([
+            Order(
+                order_number=f"CSV-{created + i}",
+                member=member,
+                receiver_name="bench",
+                receiver_phone="0900000000",
+                address="高雄市",
+            )
+            for i in range(size)
+        ])
+        created += size
+
+
+@pytest.mark.django_db
+def test_order_csv_export_rss_stays_flat():
+    """
+    /store/orders/?format=csv 串流 50 萬筆訂單（BENCH_CSV_ORDERS）
+    消費串流期間 RSS 的成長必須低於 BENCH_CSV_RSS_BUDGET_MB（預設 64 MB）
+    """
+    total = env_int("BENCH_CSV_ORDERS", 500_000)
+    budget = env_int("BENCH_CSV_RSS_BUDGET_MB", 64)
+
+    member = MemberFactory()
+    seed_orders(member, total)
+    client = APIClient()
+    client.force_authenticate(user=member.user)
+
+    gc.collect()
+    baseline = peak = rss_mb()
+    started = time.perf_counter()
+
+    response = client.get("/store/orders/?format=csv")
+    lines = 0
+    size = 0
+    for i, chunk in enumerate(response.streaming_content):
+        lines += chunk.count(b"\n")
+        size += len(chunk)
+        if i % 50 == 0:
+            peak = max(peak, rss_mb())
+    peak = max(peak, rss_mb())
+    elapsed = time.perf_counter() - started
+
+    print_table(
+        "訂單 CSV 串流",
+        ["orders", "MB written", "seconds", "RSS before MB", "RSS peak MB", "growth MB"],
+        [(total, f"{size / 1024 / 1024:.1f}", f"{elapsed:.1f}", f"{baseline:.0f}", f"{peak:.0f}", f"{peak - baseline:.1f}")],
+    )
+
+    assert lines == total + 1
+    assert peak - baseline < budget, f"RSS 成長 {peak - baseline:.1f} MB 超過預算 {budget} MB"
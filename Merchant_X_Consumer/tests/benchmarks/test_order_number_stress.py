@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from store.models import Order
+from tests.benchmarks.helpers import (
+    allocate_in_processes, env_int, print_table, requires_benchmarks)
+from tests.factories.user_factory import MemberFactory
+
+pytestmark = requires_benchmarks
+
+
+@pytest.mark.django_db
+def test_one_million_orders_from_many_processes_have_no_duplicates():
+    """
+    多行程壓力測試：
+    - 模擬 gunicorn 多個 worker 同時配發訂單編號，合計一百萬筆
+    - 全部寫入 Order 表，由 unique 約束再確認一次沒有重複
+    """
+
+    processes = env_int("BENCH_PROCESSES", 8)
+    total = env_int("BENCH_ORDER_COUNT", 1_000_000)
+    per_process = total // processes
+
+    started = time.perf_counter()
+    numbers = allocate_in_processes(processes=processes, per_process=per_process)
+    allocate_seconds = time.perf_counter() - started
+
+    assert len(set(numbers)) == len(numbers)
+
+    member = MemberFactory()
+    started = time.perf_counter()
+    batch_size = 10_000
+    for offset in range(0, len(numbers), batch_size):
+        Order.objects.bulk_create([
+            Order(
+                order_number=number,
+                member=member,
+                receiver_name="壓力測試",
+                receiver_phone="0900000000",
+                address="高雄市",
+            )
+            for number in numbers[offset:offset + batch_size]
+        ])
+    insert_seconds = time.perf_counter() - started
+
+    assert Order.objects.count() == len(numbers)
+
+    print_table(
+        "Order number allocation",
+        ["processes", "orders", "allocate_s", "orders/s", "insert_s"],
+        [(
+            processes,
+            len(numbers),
+            f"{allocate_seconds:.2f}",
+            f"{len(numbers) / allocate_seconds:,.0f}",
+            f"{insert_seconds:.2f}",
+        )],
+    )
@@ -0,0 +1,54 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+
+from store.analytics.services.date_ranges import created_between
+from store.analytics.services.order_analytics import build_order_summary
+from store.models import Order, OrderItem
+from tests.benchmarks.helpers import (
+    env_int, measure, percentile, print_table, requires_benchmarks, seed_order_items)
+
+pytestmark = requires_benchmarks
+
+
+def legacy_order_summary(merchant, start, end):
+    """舊版三個查詢：DISTINCT count / order__in 子查詢加總 / 狀態分佈"""
+    order_qs = Order.objects.filter(
+        items__product__store__merchant=merchant,
+        **created_between("created_at", start, end),
+    ).distinct()
+    order_count = order_qs.count()
+    gmv = OrderItem.objects.filter(
+        product__store__merchant=merchant, order__in=order_qs,
+    ).aggregate(total=Coalesce(Sum(F("price_at_purchase") * F("quantity")), Decimal("0.00")))["total"]
+    breakdown = list(
+        order_qs.values("status").annotate(count=Count("id", distinct=True)).order_by("status")
+    )
+    return order_count, gmv, breakdown
+
+
+@pytest.mark.django_db
+def test_order_summary_grouped_query_vs_legacy():
+    """
+    訂單總覽：單一分組查詢（加上彙總表涵蓋範圍檢查共兩個查詢）vs 舊版三個查詢（預設 100 萬筆 OrderItem）
+    """
+    merchant = seed_order_items(env_int("BENCH_SUMMARY_ITEMS", 1_000_000), first_day=date(2025, 1, 1))
+    start, end = date(2025, 1, 1), date(2025, 12, 31)
+    repeat = env_int("BENCH_SUMMARY_REPEAT", 5)
+
+    new = build_order_summary(merchant=merchant, start=start, end=end)
+    order_count, gmv, breakdown = legacy_order_summary(merchant, start, end)
+    assert (new.order_count, new.gmv, new.status_breakdown) == (order_count, gmv, breakdown)
+
+    rows = []
+    for name, func in [
+        ("legacy (3 queries)", lambda: legacy_order_summary(merchant, start, end)),
+        ("grouped (2 queries)", lambda: build_order_summary(merchant=merchant, start=start, end=end)),
+    ]:
+        durations, query_counts = measure(func, repeat)
+        rows.append((name, f"{percentile(durations, 50):.0f}", f"{percentile(durations, 95):.0f}", max(query_counts)))
+
+    print_table("build_order_summary", ["variant", "p50 ms", "p95 ms", "queries"], rows)
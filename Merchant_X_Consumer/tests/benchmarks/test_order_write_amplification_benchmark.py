@@ -0,0 +1,69 @@
+import re
+import time
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from store.models import Order
+from store.services.order_transitions import transition
+from store.signals import order_status_changed
+from tests.benchmarks.helpers import env_int, print_table, requires_benchmarks
+from tests.factories.order_factory import OrderFactory
+from tests.factories.user_factory import MemberFactory
+
+pytestmark = requires_benchmarks
+
+
+def save_whole_row(order, new_status, **fields):
+    """舊的寫法：改完屬性後 save()，整列所有欄位都會寫回"""
+    old_status = order.status
+    order.status = new_status
+    for name, value in fields.items():
+        setattr(order, name, value)
+    with transaction.atomic():
+        order.save()
+        order_status_changed.send(sender=Order, order=order, old_status=old_status, new_status=new_status)
+
+
+def pay_all(orders, write):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for order in orders:
+            write(order, Order.StatusChoices.PAID, payment_method=Order.PaymentMethodChoices.CASH, paid_at=timezone.now())
+        seconds = time.perf_counter() - started
+    updates = [q["sql"] for q in queries.captured_queries if q["sql"].startswith('UPDATE "store_order"')]
+    columns = sum(len(re.findall(r'"\w+" = ', sql.split(" WHERE ")[0])) for sql in updates)
+    return seconds, len(updates), columns, sum(len(sql) for sql in updates)
+
+
+@pytest.mark.django_db
+def test_conditional_update_writes_fewer_columns():
+    """
+    付款 BENCH_WRITE_ORDERS 筆訂單：整列 save() 與條件式 UPDATE（只寫狀態、付款方式、付款時間）
+    比較 UPDATE 寫入的欄位數、SQL 長度與耗時；收件資料、備註越長，整列寫回的浪費越大
+    """
+    count = env_int("BENCH_WRITE_ORDERS", 500)
+    member = MemberFactory()
+    note = "請放管理室，" * 50
+
+    results = {}
+    for name, write in (("save()", save_whole_row), ("transition()", transition)):
+        orders = [OrderFactory(member=member, note=note) for _ in range(count)]
+        results[name] = pay_all(orders, write)
+        assert not Order.objects.filter(pk__in=[o.pk for o in orders]).exclude(status=Order.StatusChoices.PAID).exists()
+
+    print_table(
+        f"付款 {count} 筆訂單的寫入量（{connection.vendor}）",
+        ["mode", "updates", "columns/update", "SQL KB", "seconds", "orders/s"],
+        [
+            (name, updates, columns // updates, f"{sql_bytes / 1024:,.0f}", f"{seconds:.3f}", f"{count / seconds:,.0f}")
+            for name, (seconds, updates, columns, sql_bytes) in results.items()
+        ],
+    )
+
+    whole_row, conditional = results["save()"], results["transition()"]
+    assert conditional[1] == whole_row[1] == count
+    assert conditional[2] * 3 <= whole_row[2]
+    assert conditional[3] < whole_row[3]
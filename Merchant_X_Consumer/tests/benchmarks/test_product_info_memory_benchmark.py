@@ -0,0 +1,85 @@
+import time
+import tracemalloc
+
+import pytest
+from decimal import Decimal
+
+from rest_framework.test import APIClient
+
+from store.models import Product, Store
+from store.serializers import ProductInfoSerializer
+from tests.benchmarks.helpers import env_int, print_table, requires_benchmarks
+from tests.factories.user_factory import MerchantFactory
+
+pytestmark = requires_benchmarks
+
+
+def seed_products(total, batch_size=20_000):
+    store = Store.objects.get(merchant=MerchantFactory())
+    created = 0
+    while created < total:
+        size = min(batch_size, total - created)
+        Product.objects.bulk_create([
+            Product(store=store, name=f"P-{created + i}", description="", price=Decimal("10.00"), stock=1)
+            for i in range(size)
+        ])
+        created += size
+
+
+def legacy_product_info():
+    """舊版寫法：整份商品目錄載入記憶體後一次序列化"""
+    from django.db.models import Max
+
+    products = Product.objects.all()
+    return ProductInfoSerializer({
+        'products': products,
+        'count': len(products),
+        'max_price': products.aggregate(max_price=Max('price'))['max_price'],
+        'next': None,
+    }).data
+
+
+def traced(func):
+    """回傳 (耗時 ms, 峰值記憶體 MB)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+@pytest.mark.django_db
+def test_product_info_memory_by_catalog_size():
+    """
+    商品統計端點的峰值記憶體：10k / 100k / 1M 商品
+    - 新版：聚合查詢 + 一頁商品，記憶體不隨目錄大小成長
+    - 舊版：只在 BENCH_PRODUCT_INFO_LEGACY_MAX 以內量測（預設 100k，避免 1M 時耗盡記憶體）
+    """
+    sizes = [10_000, 100_000, env_int("BENCH_PRODUCT_INFO_MAX", 1_000_000)]
+    legacy_max = env_int("BENCH_PRODUCT_INFO_LEGACY_MAX", 100_000)
+    client = APIClient()
+
+    rows = []
+    seeded = 0
+    for size in sizes:
+        seed_products(size - seeded)
+        seeded = size
+
+        paged_ms, paged_mb = traced(lambda: client.get("/store/products/info/?page_size=100"))
+        if size <= legacy_max:
+            legacy_ms, legacy_mb = traced(legacy_product_info)
+            legacy = (f"{legacy_ms:.0f}", f"{legacy_mb:.1f}")
+        else:
+            legacy = ("-", "-")
+
+        rows.append((size, f"{paged_ms:.0f}", f"{paged_mb:.1f}", *legacy))
+        # 新版只讀一頁，峰值記憶體應與目錄大小無關
+        assert paged_mb < 20
+
+    print_table(
+        "ProductInfoAPIView 峰值記憶體",
+        ["products", "paged ms", "paged MB", "legacy ms", "legacy MB"],
+        rows,
+    )
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+from django.db import connection, connections, transaction
+
+from store.models import Product
+from store.services.inventory import set_stock_shards, sharded_stock
+from tests.benchmarks.helpers import env_int, hammer_product, order_serializer, print_table, requires_benchmarks
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+pytestmark = requires_benchmarks
+
+
+@pytest.mark.django_db(transaction=True)
+def test_flash_sale_throughput_without_oversell():
+    """
+    搶購：BENCH_HAMMER_THREADS 個買家同時購買同一商品（庫存 BENCH_HAMMER_STOCK），總請求數為庫存的兩倍
+    分別以單列庫存與 BENCH_STOCK_SHARDS 個 shard 執行；成功的訂單數必須剛好等於庫存，並回報每秒成立的訂單數
+    （SQLite 只允許單一寫入者，以執行緒執行、兩種模式差異不大；以 DATABASE_URL 指向 PostgreSQL 時每個買家一個行程，
+    量測真實的列鎖競爭）
+    """
+    threads = env_int("BENCH_HAMMER_THREADS", 16)
+    stock = env_int("BENCH_HAMMER_STOCK", 500)
+    shards = env_int("BENCH_STOCK_SHARDS", 8)
+    attempts = -(-stock * 2 // threads)
+
+    processes = connection.vendor != "sqlite"
+    store = MerchantFactory().store
+    members = [MemberFactory() for _ in range(threads)]
+
+    rows = []
+    for mode_shards in (0, shards):
+        product = ProductFactory(store=store, stock=stock)
+        if mode_shards:
+            set_stock_shards(product, mode_shards)
+
+        sold, rejected, seconds = hammer_product(
+            product, members, attempts_per_member=attempts, processes=processes,
+        )
+        rows.append((
+            f"{mode_shards} shards" if mode_shards else "single row",
+            threads, threads * attempts, sold, rejected, f"{seconds:.2f}", f"{sold / seconds:,.0f}",
+        ))
+
+        product = Product.objects.get(pk=product.pk)
+        assert sold == stock
+        assert rejected == threads * attempts - stock
+        assert product.stock == 0
+        if mode_shards:
+            assert sharded_stock(product.pk) == 0
+
+    print_table(
+        f"熱門商品搶購（{connection.vendor}，{'processes' if processes else 'threads'}）",
+        ["mode", "threads", "requests", "sold", "rejected", "seconds", "orders/s"],
+        rows,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_checkouts_of_one_merchant_do_not_wait_for_each_other():
+    """
+    同一商家、不同商品的兩筆結帳：第一筆停在 commit 之前 BENCH_HOLD_MS 毫秒，量測第二筆要等多久
+    結帳交易鎖住的列（例如當日彙總列）若是同一商家共用，第二筆會等到第一筆 commit；
+    CPU 數少時吞吐量看不出列鎖競爭，這裡直接量測等待時間（需要 PostgreSQL，SQLite 整個資料庫只有一個寫入者）
+    """
+    if connection.vendor == "sqlite":
+        pytest.skip("SQLite 整個資料庫只有一個寫入者，請以 DATABASE_URL 指向 PostgreSQL 執行")
+
+    hold = env_int("BENCH_HOLD_MS", 1000) / 1000
+    store = MerchantFactory().store
+    first, second = ProductFactory(store=store, stock=10), ProductFactory(store=store, stock=10)
+    first_member, second_member = MemberFactory(), MemberFactory()
+    entered = threading.Event()
+
+    def slow_checkout():
+        try:
+            with transaction.atomic():
+                order_serializer(first).save(member=first_member)
+                entered.set()
+                time.sleep(hold)
+        finally:
+            entered.set()
+            connections.close_all()
+
+    thread = threading.Thread(target=slow_checkout)
+    thread.start()
+    entered.wait()
+    started = time.perf_counter()
+    order_serializer(second).save(member=second_member)
+    waited = time.perf_counter() - started
+    thread.join()
+
+    print_table(
+        f"同一商家兩筆結帳（{connection.vendor}）",
+        ["first checkout held ms", "second checkout ms"],
+        [(f"{hold * 1000:.0f}", f"{waited * 1000:.1f}")],
+    )
+    assert waited < hold / 2
@@ -0,0 +1,40 @@
+from datetime import date
+
+import pytest
+
+from store.analytics.services.order_analytics import build_order_timeseries, period_keys
+from tests.benchmarks.helpers import (
+    env_int, measure, percentile, print_table, requires_benchmarks, seed_order_items)
+
+pytestmark = requires_benchmarks
+
+START, END = date(2021, 1, 1), date(2025, 12, 31)
+
+
+@pytest.mark.django_db
+def test_five_year_daily_timeseries_within_budget():
+    """
+    5 年逐日時序（1826 個點）：資料庫分組 + 一次產生補 0 的期間
+    p95 必須低於 BENCH_TIMESERIES_BUDGET_MS（預設 1500 ms，預設 20 萬筆 OrderItem）
+    """
+    merchant = seed_order_items(
+        env_int("BENCH_TIMESERIES_ITEMS", 200_000), first_day=START, days=(END - START).days + 1,
+    )
+    repeat = env_int("BENCH_TIMESERIES_REPEAT", 5)
+    budget = env_int("BENCH_TIMESERIES_BUDGET_MS", 1500)
+
+    rows = []
+    for group_by in ("day", "week", "month", "quarter"):
+        series = build_order_timeseries(merchant=merchant, start=START, end=END, group_by=group_by)
+        assert len(series) == len(period_keys(START, END, group_by))
+
+        durations, query_counts = measure(
+            lambda: build_order_timeseries(merchant=merchant, start=START, end=END, group_by=group_by), repeat,
+        )
+        rows.append((group_by, len(series), f"{percentile(durations, 50):.0f}",
+                     f"{percentile(durations, 95):.0f}", max(query_counts)))
+
+    print_table(f"build_order_timeseries {START} ~ {END}", ["group_by", "points", "p50 ms", "p95 ms", "queries"], rows)
+
+    day_p95 = float(rows[0][3])
+    assert day_p95 < budget, f"5 年逐日時序 p95 {day_p95:.0f} ms 超過預算 {budget} ms"
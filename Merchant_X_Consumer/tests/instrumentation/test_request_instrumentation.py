@@ -0,0 +1,120 @@
+import json
+import logging
+
+import pytest
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from Merchant_X_Consumer import instrumentation
+
+from store.models import Store
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+original_serializer_data = serializers.Serializer.__dict__["data"]
+
+
+def server_timing(response):
+    metrics = {}
+    for entry in response["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+@pytest.mark.django_db
+def test_instrumentation_emits_server_timing_and_log(settings, caplog):
+    settings.INSTRUMENTATION_ENABLED = True
+    settings.INSTRUMENTATION_SAMPLE_RATE = 1.0
+    store = Store.objects.get(merchant=MerchantFactory())
+    ProductFactory(store=store)
+
+    with caplog.at_level(logging.INFO, logger="instrumentation"):
+        res = APIClient().get("/store/products/")
+
+    assert res.status_code == 200
+    metrics = server_timing(res)
+    assert metrics["db"]["desc"] == '"2 queries"' # COUNT + 一頁商品
+    assert float(metrics["render"]["dur"]) > 0
+    # ProductSerializer 在 view 內執行，serializer 時間是 view 的一部分
+    assert 0 < float(metrics["serialize"]["dur"]) <= float(metrics["view"]["dur"])
+    assert float(metrics["view"]["dur"]) >= float(metrics["db"]["dur"])
+    assert float(metrics["total"]["dur"]) >= float(metrics["view"]["dur"]) + float(metrics["render"]["dur"])
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["view"] == "product-list"
+    assert record["status"] == 200
+    assert record["db_queries"] == 2
+    assert record["render_ms"] > 0
+    assert record["serializer_ms"] > 0
+
+
+@pytest.mark.django_db
+def test_instrumentation_does_not_patch_drf(settings):
+    settings.INSTRUMENTATION_ENABLED = True
+
+    assert APIClient().get("/store/products/").status_code == 200
+    assert serializers.Serializer.__dict__["data"] is original_serializer_data
+
+
+@pytest.mark.django_db
+def test_serializer_time_counts_outermost_serializer_once(settings, monkeypatch):
+    settings.INSTRUMENTATION_ENABLED = True
+    member = MemberFactory()
+    store = MerchantFactory().store
+    for _ in range(3):
+        OrderItemFactory(order=OrderFactory(member=member), product=ProductFactory(store=store))
+    client = APIClient()
+    client.force_authenticate(user=member.user)
+
+    # 以假的時鐘讓每個計時區段剛好 1 秒：3 筆訂單（各含巢狀的 OrderItemSerializer）只計 3 次
+    ticks = iter(range(1000))
+    monkeypatch.setattr(instrumentation.time, "perf_counter", lambda: next(ticks))
+    res = client.get("/store/orders/")
+
+    assert res.status_code == 200
+    assert len(res.data["results"]) == 3
+    assert server_timing(res)["serialize"]["dur"] == "3000.00"
+
+
+@pytest.mark.django_db
+def test_instrumentation_counts_queries_while_streaming(settings, caplog):
+    settings.INSTRUMENTATION_ENABLED = True
+    member = MemberFactory()
+    OrderItemFactory(order=OrderFactory(member=member), product=ProductFactory(store=MerchantFactory().store))
+    client = APIClient()
+    client.force_authenticate(user=member.user)
+
+    with caplog.at_level(logging.INFO, logger="instrumentation"):
+        res = client.get("/store/orders/?format=csv")
+        assert res.streaming
+        # 標頭送出時 view 還沒讀取訂單，log 要等串流結束
+        assert not caplog.records
+        body = b"".join(res.streaming_content).decode()
+
+    assert body.count("\n") == 2 # header + 1 筆訂單
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["view"] == "order_list_create"
+    assert record["db_queries"] >= 1 # 串流期間讀取訂單的查詢
+    assert record["stream_ms"] > 0
+
+
+@pytest.mark.django_db
+def test_instrumentation_disabled_by_default(settings):
+    settings.INSTRUMENTATION_ENABLED = False
+
+    res = APIClient().get("/store/products/")
+
+    assert not res.has_header("Server-Timing")
+
+
+@pytest.mark.django_db
+def test_instrumentation_sampling_skips_unsampled_requests(settings):
+    settings.INSTRUMENTATION_ENABLED = True
+    settings.INSTRUMENTATION_SAMPLE_RATE = 0.0
+
+    res = APIClient().get("/store/products/")
+
+    assert res.status_code == 200
+    assert not res.has_header("Server-Timing")
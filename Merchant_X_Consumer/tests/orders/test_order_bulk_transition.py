@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from store.analytics.services.leaderboards import rebuild_leaderboards, window_for
+from store.analytics.services.order_analytics import build_top_customers, build_top_products
+from store.analytics.services.sales_rollup import backfill_sales_rollup, check_sales_rollup
+from store.models import LeaderboardState, Order, Product
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+URL = "/store/merchant/orders/transition/"
+
+
+@pytest.fixture
+def merchant():
+    return MerchantFactory()
+
+
+@pytest.fixture
+def merchant_client(api_client, merchant):
+    api_client.force_authenticate(user=merchant.user)
+    return api_client
+
+
+def seed_orders(merchant, count, status=Order.StatusChoices.PAID, *, created_at=None):
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"))
+    member = MemberFactory()
+    orders = []
+    for i in range(count):
+        order = OrderFactory(member=member, status=status, set_created_at=created_at or datetime(2026, 1, 1 + i % 5, 10))
+        OrderItemFactory(order=order, product=product, quantity=i + 1)
+        orders.append(order)
+    return orders
+
+
+def statuses(orders):
+    return list(Order.objects.filter(id__in=[o.id for o in orders]).order_by("id").values_list("status", flat=True))
+
+
+@pytest.mark.django_db
+def test_bulk_ship_returns_per_order_results(merchant_client, merchant):
+    paid = seed_orders(merchant, 3)
+    pending = seed_orders(merchant, 1, Order.StatusChoices.PENDING)
+    others = seed_orders(MerchantFactory(), 1)
+    ids = [paid[0].id, pending[0].id, others[0].id, paid[1].id, paid[2].id, paid[0].id, 999999]
+
+    res = merchant_client.post(URL, {"action": "ship", "order_ids": ids}, format="json")
+
+    assert res.status_code == 200
+    assert res.data["updated"] == 3
+    assert res.data["failed"] == 3
+    results = {row["id"]: row for row in res.data["results"]}
+    assert [row["id"] for row in res.data["results"]] == list(dict.fromkeys(ids))
+    assert results[paid[0].id] == {"id": paid[0].id, "ok": True, "status": "shipped", "detail": ""}
+    assert results[pending[0].id]["ok"] is False
+    assert results[pending[0].id]["status"] == "pending"
+    assert "pending" in results[pending[0].id]["detail"]
+    assert results[others[0].id]["ok"] is False
+    assert results[others[0].id]["status"] is None
+    assert results[999999]["ok"] is False
+
+    assert statuses(paid) == ["shipped"] * 3
+    assert statuses(pending) == ["pending"]
+    assert statuses(others) == ["paid"]
+
+
+@pytest.mark.django_db
+def test_bulk_transition_keeps_rollups_consistent(merchant_client, merchant, django_capture_on_commit_callbacks):
+    orders = seed_orders(merchant, 6)
+    backfill_sales_rollup()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        res = merchant_client.post(URL, {"action": "ship", "order_ids": [o.id for o in orders[:4]]}, format="json")
+    assert res.data["updated"] == 4
+    assert check_sales_rollup() == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        res = merchant_client.post(URL, {"action": "complete", "order_ids": [o.id for o in orders]}, format="json")
+    assert res.data["updated"] == 4
+    assert check_sales_rollup() == []
+
+
+@pytest.mark.django_db
+def test_bulk_transition_applies_leaderboard_deltas(merchant_client, merchant, django_capture_on_commit_callbacks):
+    now = timezone.now()
+    orders = seed_orders(merchant, 3, created_at=now - timedelta(days=1))
+    orders += seed_orders(merchant, 2, created_at=now - timedelta(days=3))
+    end = timezone.localdate()
+    start = end - timedelta(days=6)
+    assert window_for(start, end, [Order.StatusChoices.PAID, Order.StatusChoices.COMPLETED]) == 7
+    rebuild_leaderboards(merchant_ids=[merchant.id])
+    rebuilt_at = LeaderboardState.objects.get(merchant=merchant, window=7).rebuilt_at
+
+    def assert_matches_sql():
+        for builder in (build_top_products, build_top_customers):
+            with override_settings(ANALYTICS_LEADERBOARD_WINDOWS=()):
+                expected = builder(merchant=merchant, start=start, end=end)
+            assert builder(merchant=merchant, start=start, end=end) == expected
+
+    # 各會員最後一筆訂單被出貨（扣回），再完成（加回）
+    shipped = [orders[2], orders[4]]
+    with django_capture_on_commit_callbacks(execute=True):
+        merchant_client.post(URL, {"action": "ship", "order_ids": [o.id for o in shipped]}, format="json")
+    assert_matches_sql()
+    with django_capture_on_commit_callbacks(execute=True):
+        merchant_client.post(URL, {"action": "complete", "order_ids": [o.id for o in shipped]}, format="json")
+    assert_matches_sql()
+
+    state = LeaderboardState.objects.get(merchant=merchant, window=7)
+    assert (state.as_of, state.rebuilt_at) == (end, rebuilt_at) # 增量套用，沒有重建
+
+
+@pytest.mark.django_db
+def test_bulk_cancel_releases_reserved_stock(api_client, merchant):
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"), stock=10)
+    api_client.force_authenticate(user=MemberFactory().user)
+    ids = []
+    for quantity in (2, 3):
+        res = api_client.post("/store/orders/", {
+            "receiver_name": "王小明",
+            "receiver_phone": "0912345678",
+            "address": "高雄市",
+            "items": [{"product": product.id, "quantity": quantity}],
+        }, format="json")
+        ids.append(Order.objects.get(order_number=res.data["order_number"]).id)
+    assert Product.objects.get(pk=product.pk).stock == 5
+
+    api_client.force_authenticate(user=merchant.user)
+    res = api_client.post(URL, {"action": "cancel", "order_ids": ids}, format="json")
+
+    assert res.data["updated"] == 2
+    assert Product.objects.get(pk=product.pk).stock == 10
+
+
+@pytest.mark.django_db
+def test_bulk_transition_query_count_does_not_grow_with_orders(merchant_client, merchant):
+    def run(count):
+        orders = seed_orders(merchant, count, created_at=datetime(2026, 1, 1, 10))
+        with CaptureQueriesContext(connection) as ctx:
+            res = merchant_client.post(URL, {"action": "ship", "order_ids": [o.id for o in orders]}, format="json")
+        assert res.data["updated"] == count
+        return len(ctx.captured_queries)
+
+    assert run(3) == run(60)
+
+
+@pytest.mark.django_db
+def test_bulk_transition_validation_and_permissions(api_client, merchant):
+    api_client.force_authenticate(user=MemberFactory().user)
+    assert api_client.post(URL, {"action": "ship", "order_ids": [1]}, format="json").status_code == 403
+
+    api_client.force_authenticate(user=merchant.user)
+    assert api_client.post(URL, {"action": "pay", "order_ids": [1]}, format="json").status_code == 400
+    assert api_client.post(URL, {"action": "ship", "order_ids": []}, format="json").status_code == 400
+    assert api_client.post(URL, {"action": "ship", "order_ids": list(range(1, 1002))}, format="json").status_code == 400
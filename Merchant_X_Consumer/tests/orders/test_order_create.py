@@ -56,3 +56,93 @@ def test_member_can_create_order(api_client):
     product2.refresh_from_db()
     assert product1.stock == 8
     assert product2.stock == 4
+
+
+def _create_order_with_items(member, products, quantity=1):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from store.serializers import OrderCreateSerializer
+
+    serializer = OrderCreateSerializer(data={
+        "receiver_name": "王小明",
+        "receiver_phone": "0912345678",
+        "address": "高雄市哪裡哪裡",
+        "items": [{"product": p.id, "quantity": quantity} for p in products],
+    })
+    assert serializer.is_valid(), serializer.errors
+
+    with CaptureQueriesContext(connection) as ctx:
+        order = serializer.save(member=member)
+    return order, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_order_create_query_count_does_not_grow_with_cart_size():
+    """
+    建立訂單的查詢數不應隨購物車項目數增加：
+    - 1 項與 30 項商品的訂單，寫入流程的查詢數相同
+    """
+
+    merchant = MerchantFactory()
+    store = Store.objects.get(merchant=merchant)
+    products = [ProductFactory(store=store, stock=10) for _ in range(30)]
+    member = MemberFactory()
+
+    _, small_cart_queries = _create_order_with_items(member, products[:1])
+    order, large_cart_queries = _create_order_with_items(member, products)
+
+    assert large_cart_queries == small_cart_queries
+    assert order.items.count() == 30
+
+
+@pytest.mark.django_db
+def test_order_create_merges_duplicate_product_lines():
+    """
+    同一商品出現在多個項目時，庫存要以合計數量扣除
+    """
+
+    merchant = MerchantFactory()
+    store = Store.objects.get(merchant=merchant)
+    product = ProductFactory(store=store, price=Decimal("10.00"), stock=5)
+    member = MemberFactory()
+
+    order, _ = _create_order_with_items(member, [product, product], quantity=2)
+
+    product.refresh_from_db()
+    assert product.stock == 1
+    assert order.total_amount == Decimal("40.00")
+    assert order.items.count() == 2
+
+
+@pytest.mark.django_db
+def test_order_create_rejects_insufficient_stock(api_client):
+    """
+    任何一項商品庫存不足時，整筆訂單都不應建立，其他商品庫存也不變
+    """
+
+    merchant = MerchantFactory()
+    store = Store.objects.get(merchant=merchant)
+    product1 = ProductFactory(store=store, stock=10)
+    product2 = ProductFactory(store=store, stock=1)
+
+    member = MemberFactory()
+    api_client.force_authenticate(user=member.user)
+
+    res = api_client.post("/store/orders/", {
+        "receiver_name": "王小明",
+        "receiver_phone": "0912345678",
+        "address": "高雄市哪裡哪裡",
+        "items": [
+            {"product": product1.id, "quantity": 2},
+            {"product": product2.id, "quantity": 3},
+        ]
+    }, format="json")
+
+    assert res.status_code == 400
+    assert "庫存不足" in str(res.data)
+    assert not Order.objects.filter(member=member).exists()
+
+    product1.refresh_from_db()
+    product2.refresh_from_db()
+    assert product1.stock == 10
+    assert product2.stock == 1
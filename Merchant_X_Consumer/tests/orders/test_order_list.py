@@ -0,0 +1,204 @@
+import csv
+import io
+import pytest
+from datetime import datetime
+
+from django.utils import timezone
+
+from store.models import Order, Store
+from store.views import OrderListCreateAPIView
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+@pytest.mark.django_db
+def test_merchant_order_list_contains_each_order_once(api_client):
+    """
+    商家訂單列表：
+    - 只看得到包含自己商品的訂單
+    - 一筆訂單有多個自己的商品，也只出現一次
+    - 依建立時間新到舊排序
+    """
+
+    merchant = MerchantFactory()
+    store = Store.objects.get(merchant=merchant)
+    product_a = ProductFactory(store=store)
+    product_b = ProductFactory(store=store)
+    other_product = ProductFactory(store=MerchantFactory().store)
+
+    member = MemberFactory()
+    older = OrderFactory(member=member, set_created_at=datetime(2026, 1, 1, 10))
+    newer = OrderFactory(member=member, set_created_at=datetime(2026, 1, 2, 10))
+    foreign = OrderFactory(member=member, set_created_at=datetime(2026, 1, 3, 10))
+
+    OrderItemFactory(order=older, product=product_a)
+    OrderItemFactory(order=newer, product=product_a)
+    OrderItemFactory(order=newer, product=product_b)
+    OrderItemFactory(order=newer, product=other_product)
+    OrderItemFactory(order=foreign, product=other_product)
+
+    api_client.force_authenticate(user=merchant.user)
+    res = api_client.get("/store/orders/")
+
+    assert res.status_code == 200
+    assert res.data["count"] == 2
+    assert [row["id"] for row in res.data["results"]] == [newer.id, older.id]
+
+
+@pytest.mark.django_db
+def test_order_list_tie_breaks_on_id(api_client):
+    """
+    建立時間相同時以 id 排序，分頁結果才會穩定
+    """
+
+    member = MemberFactory()
+    same_time = datetime(2026, 1, 1, 10)
+    orders = [OrderFactory(member=member, set_created_at=same_time) for _ in range(3)]
+
+    api_client.force_authenticate(user=member.user)
+    res = api_client.get("/store/orders/")
+
+    assert [row["id"] for row in res.data["results"]] == [o.id for o in reversed(orders)]
+
+
+@pytest.mark.django_db
+def test_merchant_cannot_view_order_without_own_product(api_client):
+    merchant = MerchantFactory()
+    order = OrderFactory()
+    OrderItemFactory(order=order, product=ProductFactory(store=MerchantFactory().store))
+
+    api_client.force_authenticate(user=merchant.user)
+    res = api_client.get(f"/store/orders/{order.id}/")
+
+    assert res.status_code == 404
+
+
+@pytest.mark.django_db
+def test_order_list_keyset_pagination_walks_all_pages(api_client):
+    """
+    ?pagination=cursor：
+    - 依 (created_at, id) 新到舊逐頁往下，不重複也不遺漏
+    - 不回傳 count
+    """
+
+    member = MemberFactory()
+    same_time = datetime(2026, 1, 1, 10)
+    orders = [OrderFactory(member=member, set_created_at=same_time) for _ in range(3)]
+    orders += [OrderFactory(member=member, set_created_at=datetime(2026, 1, 2 + i)) for i in range(4)]
+    expected = [o.id for o in sorted(orders, key=lambda o: (o.created_at, o.id), reverse=True)]
+
+    api_client.force_authenticate(user=member.user)
+
+    seen = []
+    url = "/store/orders/?pagination=cursor&page_size=2"
+    while url:
+        res = api_client.get(url)
+        assert res.status_code == 200
+        assert "count" not in res.data
+        seen += [row["id"] for row in res.data["results"]]
+        url = res.data["next"]
+
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_order_list_page_size_is_capped(api_client):
+    member = MemberFactory()
+    for _ in range(3):
+        OrderFactory(member=member)
+
+    api_client.force_authenticate(user=member.user)
+
+    from store.pagination import OrderPagination
+    res = api_client.get(f"/store/orders/?page_size={OrderPagination.max_page_size + 50}&pagination=cursor")
+
+    assert res.status_code == 200
+    assert len(res.data["results"]) == 3
+
+
+@pytest.mark.django_db
+def test_order_list_rejects_invalid_cursor(api_client):
+    member = MemberFactory()
+    api_client.force_authenticate(user=member.user)
+
+    res = api_client.get("/store/orders/?cursor=not-a-cursor")
+
+    assert res.status_code == 404
+
+
+def read_csv(response):
+    content = b"".join(response.streaming_content).decode("utf-8-sig")
+    return list(csv.reader(io.StringIO(content)))
+
+
+@pytest.mark.django_db
+def test_order_list_csv_streams_all_visible_orders(api_client):
+    """
+    ?format=csv：
+    - 不分頁，一次輸出所有看得到的訂單（與列表相同的角色篩選與排序）
+    - created_at 為當地時間
+    """
+
+    merchant = MerchantFactory()
+    product = ProductFactory(store=merchant.store)
+    member = MemberFactory()
+    orders = [OrderFactory(member=member, set_created_at=datetime(2026, 1, 1 + i, 10)) for i in range(7)]
+    for order in orders[:6]:
+        OrderItemFactory(order=order, product=product)
+    OrderItemFactory(order=orders[6], product=ProductFactory(store=MerchantFactory().store))
+
+    api_client.force_authenticate(user=member.user)
+    res = api_client.get("/store/orders/?format=csv")
+
+    assert res.status_code == 200
+    assert res["Content-Type"].startswith("text/csv")
+    assert res.streaming
+    rows = read_csv(res)
+    assert rows[0][:3] == ["order_number", "created_at", "status"]
+    assert [row[0] for row in rows[1:]] == [o.order_number for o in reversed(orders)]
+    assert rows[1][1] == "2026-01-07T10:00:00+08:00"
+
+    api_client.force_authenticate(user=merchant.user)
+    rows = read_csv(api_client.get("/store/orders/", HTTP_ACCEPT="text/csv"))
+    assert [row[0] for row in rows[1:]] == [o.order_number for o in reversed(orders[:6])]
+
+
+@pytest.mark.django_db
+def test_order_list_csv_converts_datetimes_by_column_name(api_client, monkeypatch):
+    member = MemberFactory()
+    order = OrderFactory(member=member, set_created_at=datetime(2026, 1, 1, 10))
+    OrderItemFactory(order=order, product=ProductFactory(store=MerchantFactory().store))
+    Order.objects.filter(pk=order.pk).update(paid_at=timezone.make_aware(datetime(2026, 1, 1, 11)))
+
+    # 欄位順序改變時時間欄位仍以當地時間輸出
+    columns = OrderListCreateAPIView.csv_columns
+    monkeypatch.setattr(OrderListCreateAPIView, "csv_columns", [columns[9], *columns[2:9], columns[0], columns[1]])
+    api_client.force_authenticate(user=member.user)
+    header, row = read_csv(api_client.get("/store/orders/?format=csv"))
+
+    values = dict(zip(header, row))
+    assert values["paid_at"] == "2026-01-01T11:00:00+08:00"
+    assert values["created_at"] == "2026-01-01T10:00:00+08:00"
+    assert values["order_number"] == order.order_number
+
+
+@pytest.mark.django_db
+def test_order_list_csv_query_count_does_not_grow(api_client, django_assert_max_num_queries):
+    member = MemberFactory()
+    product = ProductFactory(store=MerchantFactory().store)
+    for _ in range(20):
+        OrderItemFactory(order=OrderFactory(member=member), product=product)
+
+    api_client.force_authenticate(user=member.user)
+    with django_assert_max_num_queries(2): # 會員資料 + 訂單串流
+        rows = read_csv(api_client.get("/store/orders/?format=csv"))
+
+    assert len(rows) == 21
+
+
+@pytest.mark.django_db
+def test_order_list_csv_requires_login(api_client):
+    res = api_client.get("/store/orders/?format=csv")
+
+    assert res.status_code == 401
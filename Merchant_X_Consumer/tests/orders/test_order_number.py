@@ -0,0 +1,99 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from store.checks import check_order_number_node_id
+from store.models import Order
+from store.services.order_numbers import (
+    SnowflakeOrderNumberAllocator, get_order_number_allocator)
+from tests.benchmarks.helpers import allocate_in_processes
+from tests.factories.order_factory import OrderFactory
+
+ORDER_NUMBER_PATTERN = re.compile(r"^ORD\d{8}-\d{20}$")
+
+
+def test_order_number_keeps_prefix_format():
+    number = SnowflakeOrderNumberAllocator().allocate()
+
+    assert ORDER_NUMBER_PATTERN.match(number)
+    assert len(number) <= Order._meta.get_field("order_number").max_length
+
+
+def test_order_numbers_are_unique_and_time_ordered_within_process():
+    allocator = SnowflakeOrderNumberAllocator()
+
+    numbers = [allocator.allocate() for _ in range(20_000)]
+
+    assert len(set(numbers)) == len(numbers)
+    assert numbers == sorted(numbers)
+
+
+def test_sequence_overflow_borrows_next_millisecond(monkeypatch):
+    """
+    同一毫秒內超過 1000 筆，或時鐘倒退時，都不能產生重複編號
+    """
+    allocator = SnowflakeOrderNumberAllocator()
+    clock = iter([(allocator._now()[0], 5_000)] * 2500 + [(allocator._now()[0], 4_000)] * 10)
+    monkeypatch.setattr(allocator, "_now", lambda: next(clock))
+
+    numbers = [allocator.allocate() for _ in range(2510)]
+
+    assert len(set(numbers)) == len(numbers)
+
+
+def test_node_id_is_part_of_order_number():
+    with override_settings(ORDER_NUMBER_NODE_ID=7):
+        number = get_order_number_allocator().allocate()
+
+    assert number.split("-")[1][8:10] == "07"
+
+
+def test_node_id_must_be_configured():
+    with override_settings(ORDER_NUMBER_NODE_ID=None):
+        with pytest.raises(ImproperlyConfigured):
+            SnowflakeOrderNumberAllocator()
+        assert [error.id for error in check_order_number_node_id(None)] == ["store.E001"]
+
+    with override_settings(ORDER_NUMBER_NODE_ID="100"):
+        assert [error.id for error in check_order_number_node_id(None)] == ["store.E002"]
+    with override_settings(ORDER_NUMBER_NODE_ID="3"):
+        assert check_order_number_node_id(None) == []
+
+
+@override_settings(TIME_ZONE="America/New_York")
+def test_order_numbers_use_utc_across_dst_fall_back(monkeypatch):
+    """
+    2026-11-01 美東夏令時間結束：01:00~02:00 出現兩次，以本地時間計算的毫秒數會倒退；UTC 不會
+    """
+    allocator = SnowflakeOrderNumberAllocator()
+    start = datetime(2026, 11, 1, 5, 30, tzinfo=timezone.utc) # 01:30 EDT
+    instants = iter([start + timedelta(minutes=10 * i) for i in range(12)]) # 到 07:20 UTC（02:20 EST）
+    monkeypatch.setattr(allocator, "_utcnow", lambda: next(instants))
+
+    numbers = [allocator.allocate() for _ in range(12)]
+
+    assert numbers == sorted(numbers)
+    assert all(number.startswith("ORD20261101-") for number in numbers)
+    assert [int(number.split("-")[1][:8]) for number in numbers] == [
+        (5 * 3600 + 30 * 60 + 600 * i) * 1000 for i in range(12)
+    ]
+
+
+def test_order_numbers_are_unique_across_processes():
+    numbers = allocate_in_processes(processes=4, per_process=5_000)
+
+    assert len(numbers) == 20_000
+    assert len(set(numbers)) == len(numbers)
+
+
+@pytest.mark.django_db
+def test_order_save_does_not_query_for_existing_numbers(django_assert_num_queries):
+    order = OrderFactory.build(member=OrderFactory().member)
+
+    with django_assert_num_queries(1):  # 只有 INSERT
+        order.save()
+
+    assert ORDER_NUMBER_PATTERN.match(order.order_number)
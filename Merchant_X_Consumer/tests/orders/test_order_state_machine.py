@@ -0,0 +1,178 @@
+import threading
+import time
+import warnings
+from contextlib import nullcontext
+from decimal import Decimal
+
+import pytest
+from django.db import OperationalError, connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from store.models import Order, Product, StockReservation
+from store.serializers import OrderCreateSerializer
+from store.services.order_transitions import OrderConflict, transition
+from tests.factories.order_factory import OrderFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+def update_sql(queries):
+    return [q["sql"] for q in queries.captured_queries if q["sql"].startswith('UPDATE "store_order"')]
+
+
+@pytest.mark.django_db
+def test_stale_order_gets_conflict_instead_of_overwriting(api_client):
+    member = MemberFactory()
+    order = OrderFactory(member=member, status=Order.StatusChoices.PENDING)
+    stale = Order.objects.get(pk=order.pk)
+
+    transition(order, Order.StatusChoices.CANCELED)
+
+    with pytest.raises(OrderConflict):
+        transition(stale, Order.StatusChoices.PAID, payment_method=Order.PaymentMethodChoices.CASH)
+    order.refresh_from_db()
+    assert order.status == Order.StatusChoices.CANCELED
+    assert order.payment_method == Order.PaymentMethodChoices.UNPAID
+
+    # 不允許的轉換仍是 400
+    api_client.force_authenticate(user=member.user)
+    res = api_client.post(f"/store/orders/{order.id}/pay/", {"payment_method": "cash"}, format="json")
+    assert res.status_code == 400
+
+
+@pytest.mark.django_db
+def test_expected_status_is_checked_before_writing(django_assert_num_queries):
+    order = OrderFactory(status=Order.StatusChoices.PAID)
+
+    with django_assert_num_queries(0), pytest.raises(OrderConflict):
+        transition(order, Order.StatusChoices.CANCELED, expected=Order.StatusChoices.PENDING)
+    order.refresh_from_db()
+    assert order.status == Order.StatusChoices.PAID
+
+
+@pytest.mark.django_db
+def test_conflict_is_returned_as_409(api_client, monkeypatch):
+    member = MemberFactory()
+    order = OrderFactory(member=member, status=Order.StatusChoices.PENDING)
+    api_client.force_authenticate(user=member.user)
+
+    # 模擬：view 讀到 pending 之後，另一個請求先把訂單取消
+    original_can_transition = Order.can_transition
+
+    def can_transition_then_lose_race(self, new_status):
+        allowed = original_can_transition(self, new_status)
+        Order.objects.filter(pk=self.pk).update(status=Order.StatusChoices.CANCELED)
+        return allowed
+
+    monkeypatch.setattr(Order, "can_transition", can_transition_then_lose_race)
+    res = api_client.post(f"/store/orders/{order.id}/pay/", {"payment_method": "cash"}, format="json")
+
+    assert res.status_code == 409
+    order.refresh_from_db()
+    assert order.status == Order.StatusChoices.CANCELED
+    assert order.paid_at is None
+
+
+@pytest.mark.django_db
+def test_transitions_write_only_changed_columns(api_client):
+    member = MemberFactory()
+    order = OrderFactory(member=member, status=Order.StatusChoices.PENDING)
+    api_client.force_authenticate(user=member.user)
+
+    with CaptureQueriesContext(connection) as queries:
+        res = api_client.post(f"/store/orders/{order.id}/pay/", {"payment_method": "cash"}, format="json")
+    assert res.status_code == 200
+    [sql] = update_sql(queries)
+    assert '"status"' in sql and '"payment_method"' in sql and '"paid_at"' in sql
+    assert '"receiver_name"' not in sql and '"address"' not in sql and '"total_amount"' not in sql
+    assert "WHERE" in sql and "\"status\" = 'pending'" in sql
+
+    with CaptureQueriesContext(connection) as queries:
+        res = api_client.patch(f"/store/orders/{order.id}/", {"note": "放管理室"}, format="json")
+    assert res.status_code == 200
+    [sql] = update_sql(queries)
+    assert '"note"' in sql and '"status"' not in sql and '"address"' not in sql
+
+    order.refresh_from_db()
+    assert (order.status, order.payment_method, order.note) == ("paid", "cash", "放管理室")
+
+
+@pytest.mark.django_db
+def test_paid_at_is_timezone_aware(api_client):
+    member = MemberFactory()
+    order = OrderFactory(member=member, status=Order.StatusChoices.PENDING)
+    api_client.force_authenticate(user=member.user)
+
+    before = timezone.now()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning) # naive datetime 寫入 DateTimeField 會發出 RuntimeWarning
+        res = api_client.post(f"/store/orders/{order.id}/pay/", {"payment_method": "cash"}, format="json")
+    assert res.status_code == 200
+
+    order.refresh_from_db()
+    assert timezone.is_aware(order.paid_at)
+    assert before <= order.paid_at <= timezone.now()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_pay_and_cancel_only_one_wins():
+    """
+    8 個執行緒拿著同一份讀取結果（pending）同時付款 / 取消：只有一個成功，其餘得到 OrderConflict，
+    庫存保留只會被確認或釋放其中一種
+    SQLite 同時只允許一個寫入者，寫入以 lock 排隊；每個執行緒的訂單都在排隊之前讀取，競爭條件不變
+    """
+    product = ProductFactory(store=MerchantFactory().store, price=Decimal("10.00"), stock=10)
+    serializer = OrderCreateSerializer(data={
+        "receiver_name": "王小明",
+        "receiver_phone": "0912345678",
+        "address": "高雄市",
+        "items": [{"product": product.id, "quantity": 3}],
+    })
+    serializer.is_valid(raise_exception=True)
+    order = serializer.save(member=MemberFactory())
+
+    targets = [Order.StatusChoices.PAID, Order.StatusChoices.CANCELED] * 4
+    barrier = threading.Barrier(len(targets))
+    write_lock = threading.Lock() if connection.vendor == "sqlite" else nullcontext()
+    outcomes = []
+    lock = threading.Lock()
+
+    def attempt(target):
+        try:
+            stale = Order.objects.get(pk=order.pk)
+            barrier.wait()
+            while True:
+                try:
+                    with write_lock:
+                        transition(stale, target)
+                    outcome = target
+                except OrderConflict:
+                    outcome = "conflict"
+                except OperationalError:
+                    time.sleep(0.001)
+                    continue
+                break
+        finally:
+            connections.close_all()
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=attempt, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == len(targets), "有執行緒發生錯誤"
+    winners = [outcome for outcome in outcomes if outcome != "conflict"]
+    assert len(winners) == 1
+
+    order.refresh_from_db()
+    assert order.status == winners[0]
+    reservation = StockReservation.objects.get(order=order)
+    stock = Product.objects.values_list("stock", flat=True).get(pk=product.pk)
+    if winners[0] == Order.StatusChoices.PAID:
+        assert (reservation.status, stock) == (StockReservation.StatusChoices.COMMITTED, 7)
+    else:
+        assert (reservation.status, stock) == (StockReservation.StatusChoices.RELEASED, 10)
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from store.models import Order, OrderEventCursor, OrderStatusEvent
+from store.services.order_events import consume_events, record_events, shipping_sla
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+def timeline(order):
+    return list(order.status_events.order_by("at", "id").values_list("old_status", "new_status"))
+
+
+def paid_order(merchant, count=1):
+    orders = []
+    for _ in range(count):
+        order = OrderFactory(status=Order.StatusChoices.PAID)
+        OrderItemFactory(order=order, product=ProductFactory(store=merchant.store))
+        orders.append(order)
+    return orders
+
+
+@pytest.mark.django_db
+def test_endpoints_append_events_per_store(api_client):
+    member = MemberFactory()
+    first, second = MerchantFactory(), MerchantFactory()
+    products = [ProductFactory(store=m.store, price=Decimal("10.00"), stock=5) for m in (first, second)]
+
+    api_client.force_authenticate(user=member.user)
+    res = api_client.post("/store/orders/", {
+        "receiver_name": "王小明",
+        "receiver_phone": "0912345678",
+        "address": "高雄市",
+        "items": [{"product": p.id, "quantity": 1} for p in products],
+    }, format="json")
+    assert res.status_code == 201
+    order = Order.objects.get(order_number=res.data["order_number"])
+    assert api_client.post(f"/store/orders/{order.id}/pay/", {"payment_method": "cash"}, format="json").status_code == 200
+
+    api_client.force_authenticate(user=first.user)
+    assert api_client.post(f"/store/orders/{order.id}/ship/").status_code == 200
+
+    # 每個商店各一筆，狀態本身仍只有一個
+    assert timeline(order) == [
+        ("", "pending"), ("", "pending"), ("pending", "paid"), ("pending", "paid"), ("paid", "shipped"), ("paid", "shipped"),
+    ]
+    for merchant in (first, second):
+        events = OrderStatusEvent.objects.filter(store=merchant.store).order_by("id")
+        assert [e.new_status for e in events] == ["pending", "paid", "shipped"]
+
+    # 不允許 / 失敗的轉換不留下事件
+    api_client.force_authenticate(user=member.user)
+    assert api_client.post(f"/store/orders/{order.id}/cancel/").status_code == 400
+    assert order.status_events.count() == 6
+
+
+@pytest.mark.django_db
+def test_bulk_transition_inserts_events_in_one_query(api_client):
+    merchant = MerchantFactory()
+    orders = paid_order(merchant, 20)
+    api_client.force_authenticate(user=merchant.user)
+
+    with CaptureQueriesContext(connection) as queries:
+        res = api_client.post(
+            "/store/merchant/orders/transition/",
+            {"action": "ship", "order_ids": [o.id for o in orders]},
+            format="json",
+        )
+    assert res.status_code == 200
+    inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "store_orderstatusevent"')]
+    assert len(inserts) == 1
+    assert OrderStatusEvent.objects.filter(
+        store=merchant.store, old_status="paid", new_status="shipped",
+    ).count() == 20
+
+
+@pytest.mark.django_db
+def test_consume_events_advances_cursor_only_after_handler_succeeds():
+    merchant = MerchantFactory()
+    orders = paid_order(merchant, 5)
+    record_events(orders, "paid", "shipped")
+
+    seen = []
+    assert consume_events("rollup", lambda events: seen.extend(e.order_id for e in events), batch_size=2) == 5
+    assert seen == [o.id for o in orders]
+    assert consume_events("rollup", seen.extend) == 0
+
+    def broken(events):
+        raise RuntimeError("boom")
+
+    record_events(orders[:1], "shipped", "completed")
+    with pytest.raises(RuntimeError):
+        consume_events("rollup", broken)
+    assert OrderEventCursor.objects.get(name="rollup").position == OrderStatusEvent.objects.order_by("id")[4].id
+
+    # 不同名稱的 cursor 各自從頭處理
+    assert consume_events("cache", lambda events: None) == 6
+    assert consume_events("rollup", lambda events: None) == 1
+
+
+@pytest.mark.django_db
+def test_consume_events_picks_up_lower_id_committed_later(settings):
+    merchant = MerchantFactory()
+    first, late, third = record_events(paid_order(merchant, 3), "paid", "shipped")
+    # 模擬 id 較小的交易較晚 commit：consume 時還看不到 late
+    late_row = {f.attname: getattr(late, f.attname) for f in OrderStatusEvent._meta.concrete_fields}
+    late.delete()
+
+    seen = []
+    assert consume_events("rollup", lambda events: seen.extend(e.id for e in events)) == 2
+    assert seen == [first.id, third.id]
+    assert list(OrderEventCursor.objects.get(name="rollup").gaps) == [str(late_row["id"])]
+
+    OrderStatusEvent.objects.create(**late_row)
+    assert consume_events("rollup", lambda events: seen.extend(e.id for e in events)) == 1
+    assert seen == [first.id, third.id, late_row["id"]]
+    assert OrderEventCursor.objects.get(name="rollup").gaps == {}
+    assert consume_events("rollup", seen.extend) == 0
+
+    # 一直沒出現的 id（交易已回滾）超過 ORDER_EVENT_GAP_SECONDS 就不再等待
+    record_events(Order.objects.all()[:2], "shipped", "completed")
+    OrderStatusEvent.objects.order_by("-id")[1].delete()
+    assert consume_events("rollup", lambda events: None) == 1
+    assert len(OrderEventCursor.objects.get(name="rollup").gaps) == 1
+    settings.ORDER_EVENT_GAP_SECONDS = 0
+    assert consume_events("rollup", lambda events: None) == 0
+    assert OrderEventCursor.objects.get(name="rollup").gaps == {}
+
+
+@pytest.mark.django_db
+def test_shipping_sla_from_events():
+    merchant = MerchantFactory()
+    orders = paid_order(merchant, 3)
+    paid_at = datetime(2026, 3, 1, 9, tzinfo=timezone.get_current_timezone())
+    for order, shipped_after in zip(orders, (2, 23, 30)):
+        OrderStatusEvent.objects.create(order=order, store=merchant.store, old_status="pending", new_status="paid", at=paid_at)
+        OrderStatusEvent.objects.create(
+            order=order, store=merchant.store, old_status="paid", new_status="shipped",
+            at=paid_at + timedelta(hours=shipped_after),
+        )
+    other = MerchantFactory()
+    OrderStatusEvent.objects.create(order=orders[0], store=other.store, old_status="paid", new_status="shipped", at=paid_at)
+
+    assert shipping_sla(merchant.store, start=paid_at, end=paid_at + timedelta(days=7)) == {"shipped": 3, "within": 2}
+    assert shipping_sla(merchant.store, start=paid_at, end=paid_at + timedelta(days=7), hours=1) == {"shipped": 3, "within": 0}
+    assert shipping_sla(merchant.store, start=paid_at + timedelta(days=1), end=paid_at + timedelta(days=7)) == {"shipped": 1, "within": 0}
@@ -0,0 +1,159 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from store.models import Order, Product, StockReservation
+from store.services import inventory
+from store.services.inventory import release_expired_reservations
+from tests.benchmarks.helpers import hammer_product
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+def order_payload(*items):
+    return {
+        "receiver_name": "王小明",
+        "receiver_phone": "0912345678",
+        "address": "高雄市",
+        "items": [{"product": product.id, "quantity": quantity} for product, quantity in items],
+    }
+
+
+@pytest.fixture
+def product():
+    return ProductFactory(store=MerchantFactory().store, price=Decimal("10.00"), stock=10)
+
+
+@pytest.fixture
+def member_client(api_client):
+    member = MemberFactory()
+    api_client.force_authenticate(user=member.user)
+    return api_client
+
+
+def create_order(client, *items):
+    res = client.post("/store/orders/", order_payload(*items), format="json")
+    assert res.status_code == 201, res.data
+    return Order.objects.get(order_number=res.data["order_number"])
+
+
+def stock_of(product):
+    return Product.objects.values_list("stock", flat=True).get(pk=product.pk)
+
+
+@pytest.mark.django_db
+def test_order_reserves_stock_until_expiry(member_client, product, settings):
+    settings.STOCK_RESERVATION_MINUTES = 15
+
+    # 同一商品出現兩次，合併成一筆保留
+    order = create_order(member_client, (product, 2), (product, 1))
+
+    reservation = StockReservation.objects.get(order=order)
+    assert reservation.product_id == product.id
+    assert reservation.quantity == 3
+    assert reservation.status == StockReservation.StatusChoices.ACTIVE
+    assert timedelta(minutes=14) < reservation.expires_at - timezone.now() <= timedelta(minutes=15)
+    assert stock_of(product) == 7
+
+
+@pytest.mark.django_db
+def test_insufficient_stock_is_rejected_without_side_effects(member_client, product):
+    other = ProductFactory(store=product.store, stock=1)
+
+    res = member_client.post("/store/orders/", order_payload((product, 3), (other, 2)), format="json")
+
+    assert res.status_code == 400
+    assert f"{other.name} 庫存不足" in str(res.data)
+    assert stock_of(product) == 10
+    assert not Order.objects.exists()
+    assert not StockReservation.objects.exists()
+
+
+@pytest.mark.django_db
+def test_cancel_releases_stock_once(member_client, product):
+    order = create_order(member_client, (product, 4))
+
+    res = member_client.post(f"/store/orders/{order.id}/cancel/")
+    assert res.status_code == 200
+    assert stock_of(product) == 10
+    assert StockReservation.objects.get(order=order).status == StockReservation.StatusChoices.RELEASED
+
+    assert member_client.post(f"/store/orders/{order.id}/cancel/").status_code == 400
+    assert stock_of(product) == 10
+
+
+@pytest.mark.django_db
+def test_paid_order_keeps_its_stock(member_client, product):
+    order = create_order(member_client, (product, 4))
+
+    assert member_client.post(f"/store/orders/{order.id}/pay/").status_code == 200
+
+    assert StockReservation.objects.get(order=order).status == StockReservation.StatusChoices.COMMITTED
+    assert stock_of(product) == 6
+
+
+@pytest.mark.django_db
+def test_deleting_pending_order_releases_stock(member_client, product):
+    order = create_order(member_client, (product, 4))
+
+    assert member_client.delete(f"/store/orders/{order.id}/").status_code == 204
+
+    assert stock_of(product) == 10
+
+
+@pytest.mark.django_db
+def test_expired_reservations_cancel_pending_orders(member_client, product):
+    expired = create_order(member_client, (product, 1))
+    paid = create_order(member_client, (product, 2))
+    fresh = create_order(member_client, (product, 3))
+    member_client.post(f"/store/orders/{paid.id}/pay/")
+    StockReservation.objects.filter(order__in=[expired, paid]).update(
+        expires_at=timezone.now() - timedelta(minutes=1),
+    )
+
+    call_command("release_expired_reservations")
+
+    assert Order.objects.get(pk=expired.pk).status == Order.StatusChoices.CANCELED
+    assert Order.objects.get(pk=paid.pk).status == Order.StatusChoices.PAID
+    assert Order.objects.get(pk=fresh.pk).status == Order.StatusChoices.PENDING
+    assert stock_of(product) == 10 - 2 - 3
+
+
+@pytest.mark.django_db
+def test_expired_order_paid_after_read_is_not_canceled(member_client, product, monkeypatch):
+    order = create_order(member_client, (product, 2))
+    StockReservation.objects.filter(order=order).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+    # 模擬：逾期清除讀到 pending 之後，會員先完成付款
+    original_transition = inventory.transition
+
+    def pay_first(order, new_status, **kwargs):
+        Order.objects.filter(pk=order.pk).update(status=Order.StatusChoices.PAID)
+        return original_transition(order, new_status, **kwargs)
+
+    monkeypatch.setattr(inventory, "transition", pay_first)
+
+    assert release_expired_reservations() == 0
+    assert Order.objects.get(pk=order.pk).status == Order.StatusChoices.PAID
+    assert StockReservation.objects.get(order=order).status == StockReservation.StatusChoices.ACTIVE
+    assert stock_of(product) == 8
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_checkout_never_oversells(product):
+    """
+    8 個執行緒同時搶購庫存 10 的商品，每個執行緒下單 5 次：
+    剛好 10 筆成功，其餘都因庫存不足被拒絕，庫存歸零而不是負數
+    """
+    members = [MemberFactory() for _ in range(8)]
+
+    sold, rejected, _ = hammer_product(product, members, attempts_per_member=5)
+
+    assert sold == 10
+    assert rejected == 8 * 5 - 10
+    assert stock_of(product) == 0
+    assert Order.objects.count() == 10
+    assert sum(StockReservation.objects.values_list("quantity", flat=True)) == 10
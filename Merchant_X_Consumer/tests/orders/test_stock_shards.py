@@ -0,0 +1,130 @@
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from store.filter import InStockFilterBackend
+from store.models import Order, Product, StockShard
+from store.serializers import ProductSerializer
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+@pytest.fixture
+def merchant():
+    return MerchantFactory()
+
+
+@pytest.fixture
+def sharded_product(merchant):
+    product = ProductFactory(store=merchant.store, price=Decimal("10.00"), stock=10)
+    call_command("shard_stock", product.id, shards=4)
+    return Product.objects.get(pk=product.pk)
+
+
+@pytest.fixture
+def member_client(api_client):
+    api_client.force_authenticate(user=MemberFactory().user)
+    return api_client
+
+
+def shard_stocks(product):
+    return list(StockShard.objects.filter(product=product).order_by("index").values_list("stock", flat=True))
+
+
+def place_order(client, product, quantity, capture):
+    with capture(execute=True):
+        return client.post("/store/orders/", {
+            "receiver_name": "王小明",
+            "receiver_phone": "0912345678",
+            "address": "高雄市",
+            "items": [{"product": product.id, "quantity": quantity}],
+        }, format="json")
+
+
+@pytest.mark.django_db
+def test_shard_stock_command_splits_and_merges(sharded_product):
+    assert sharded_product.stock_shards == 4
+    assert sharded_product.stock == 10
+    assert shard_stocks(sharded_product) == [3, 3, 2, 2]
+
+    call_command("shard_stock", sharded_product.id, shards=0)
+
+    sharded_product.refresh_from_db()
+    assert sharded_product.stock_shards == 0
+    assert sharded_product.stock == 10
+    assert not StockShard.objects.exists()
+
+
+@pytest.mark.django_db
+def test_order_takes_from_one_shard_and_refreshes_snapshot(
+    member_client, sharded_product, django_capture_on_commit_callbacks
+):
+    res = place_order(member_client, sharded_product, 2, django_capture_on_commit_callbacks)
+
+    assert res.status_code == 201
+    stocks = shard_stocks(sharded_product)
+    assert sum(stocks) == 8
+    assert sorted(stocks) in ([0, 2, 3, 3], [1, 2, 2, 3]) # 只扣其中一個 shard
+    assert Product.objects.get(pk=sharded_product.pk).stock == 8
+
+
+@pytest.mark.django_db
+def test_order_larger_than_any_shard_spans_shards(member_client, sharded_product, django_capture_on_commit_callbacks):
+    assert place_order(member_client, sharded_product, 7, django_capture_on_commit_callbacks).status_code == 201
+
+    assert sum(shard_stocks(sharded_product)) == 3
+    assert Product.objects.get(pk=sharded_product.pk).stock == 3
+
+
+@pytest.mark.django_db
+def test_sold_out_sharded_product(member_client, sharded_product, django_capture_on_commit_callbacks):
+    assert place_order(member_client, sharded_product, 10, django_capture_on_commit_callbacks).status_code == 201
+
+    product = Product.objects.get(pk=sharded_product.pk)
+    assert product.stock == 0
+    assert not product.in_stock
+    assert not InStockFilterBackend().filter_queryset(None, Product.objects.all(), None).exists()
+    assert ProductSerializer(product).data["stock"] == 0
+
+    res = place_order(member_client, sharded_product, 1, django_capture_on_commit_callbacks)
+    assert res.status_code == 400
+    assert Order.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_stale_snapshot_cannot_oversell(member_client, sharded_product, django_capture_on_commit_callbacks):
+    # 快照還沒更新時，真正的判斷仍以 shard 為準
+    StockShard.objects.filter(product=sharded_product).update(stock=0)
+
+    res = place_order(member_client, sharded_product, 1, django_capture_on_commit_callbacks)
+
+    assert res.status_code == 400
+    assert "剩餘 0" in str(res.data)
+
+
+@pytest.mark.django_db
+def test_cancel_returns_stock_to_shards(member_client, sharded_product, django_capture_on_commit_callbacks):
+    res = place_order(member_client, sharded_product, 6, django_capture_on_commit_callbacks)
+    order = Order.objects.get(order_number=res.data["order_number"])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert member_client.post(f"/store/orders/{order.id}/cancel/").status_code == 200
+
+    assert sum(shard_stocks(sharded_product)) == 10
+    assert Product.objects.get(pk=sharded_product.pk).stock == 10
+
+
+@pytest.mark.django_db
+def test_merchant_stock_update_is_redistributed(api_client, merchant, sharded_product):
+    api_client.force_authenticate(user=merchant.user)
+
+    res = api_client.patch(f"/store/products/{sharded_product.id}/", {"stock": 40}, format="json")
+    assert res.status_code == 200
+    assert res.data["stock"] == 40
+    assert shard_stocks(sharded_product) == [10, 10, 10, 10]
+
+    # 沒有改庫存的修改不會重新分配
+    StockShard.objects.filter(product=sharded_product, index=0).update(stock=9)
+    api_client.patch(f"/store/products/{sharded_product.id}/", {"name": "新名稱"}, format="json")
+    assert shard_stocks(sharded_product) == [9, 10, 10, 10]
@@ -0,0 +1,45 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from Merchant_X_Consumer import cache_config as cache_config_module
+from Merchant_X_Consumer.cache_config import cache_config
+from store.checks import check_shared_cache
+
+
+def test_cache_backend_from_url(monkeypatch, tmp_path):
+    assert cache_config("locmem://")["BACKEND"] == "django.core.cache.backends.locmem.LocMemCache"
+    assert cache_config(f"file://{tmp_path}") == {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path),
+    }
+
+    monkeypatch.setattr(cache_config_module, "redis_available", lambda: True)
+    assert cache_config("redis://redis:6379/1") == {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://redis:6379/1",
+    }
+
+
+def test_cache_url_errors(monkeypatch):
+    with pytest.raises(ImproperlyConfigured):
+        cache_config("memcached://localhost")
+    with pytest.raises(ImproperlyConfigured):
+        cache_config("file://")
+
+    monkeypatch.setattr(cache_config_module, "redis_available", lambda: False)
+    with pytest.raises(ImproperlyConfigured):
+        cache_config("redis://redis:6379/0")
+
+
+def test_production_requires_shared_cache(tmp_path):
+    local = {"default": cache_config("locmem://")}
+    shared = {"default": cache_config(f"file://{tmp_path}")}
+
+    with override_settings(DEBUG=False, CACHES=local):
+        assert [error.id for error in check_shared_cache(None)] == ["store.E003"]
+    with override_settings(DEBUG=True, CACHES=local):
+        assert check_shared_cache(None) == []
+    with override_settings(DEBUG=False, CACHES=shared):
+        assert check_shared_cache(None) == []
+    # 分析快取另外指定 alias 時兩個都要共用
+    with override_settings(DEBUG=False, CACHES={**shared, "analytics": local["default"]}, ANALYTICS_CACHE_ALIAS="analytics"):
+        assert [error.msg.split("'")[1] for error in check_shared_cache(None)] == ["analytics"]
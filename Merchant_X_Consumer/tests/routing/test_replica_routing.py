@@ -0,0 +1,218 @@
+import os
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test import override_settings
+
+from Merchant_X_Consumer.cache_config import cache_config
+from Merchant_X_Consumer.db_router import (
+    ReplicaRouter, is_pinned, pin_to_primary, replica_reads, replica_reads_enabled)
+from store.models import Order, Product
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+@pytest.fixture
+def recorded_reads():
+    """記錄每個查詢執行時是否允許讀 replica"""
+    flags = []
+
+    def wrapper(execute, sql, params, many, context):
+        flags.append(replica_reads_enabled())
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield flags
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0", "replica_1"])
+def test_router_reads_from_replica_only_when_enabled():
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Order) is None
+    with replica_reads():
+        assert router.db_for_read(Order) in {"replica_0", "replica_1"}
+        assert router.db_for_write(Order) == "default"
+    assert router.db_for_read(Order) is None
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+def test_select_for_update_stays_on_primary():
+    with replica_reads():
+        assert Order.objects.select_for_update().db == "default"
+        assert Order.objects.all().db == "replica_0"
+
+
+@override_settings(DATABASE_REPLICAS=[])
+def test_router_without_replicas_uses_default():
+    with replica_reads():
+        assert ReplicaRouter().db_for_read(Order) is None
+        assert Order.objects.all().db == "default"
+
+
+@pytest.mark.django_db
+def test_reads_inside_transaction_stay_on_primary():
+    # 測試本身就在交易中
+    with override_settings(DATABASE_REPLICAS=["replica_0"]), replica_reads():
+        assert ReplicaRouter().db_for_read(Order) is None
+
+
+@pytest.fixture
+def sqlite_replica(tmp_path, django_db_setup, django_db_blocker):
+    """
+    另一個 SQLite 檔當作 replica（跑完 migrate、內容另外寫入）
+    django_db 標記只允許測試開始前就存在的別名，因此自行開放資料庫，結束時清空 primary
+    """
+    alias = "replica_test"
+    with django_db_blocker.unblock():
+        connections.settings[alias] = {**connections.settings[DEFAULT_DB_ALIAS], "NAME": str(tmp_path / "replica.sqlite3")}
+        call_command("migrate", database=alias, verbosity=0)
+        try:
+            with override_settings(DATABASE_REPLICAS=[alias]):
+                yield alias
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+            call_command("flush", database=DEFAULT_DB_ALIAS, interactive=False, verbosity=0)
+
+
+def copy_to(alias, *objs):
+    for obj in objs:
+        obj.save(using=alias, force_insert=True)
+
+
+def test_replica_database_answers_reads_and_primary_takes_writes(api_client, sqlite_replica):
+    if connection.vendor != "sqlite":
+        pytest.skip("以 SQLite 檔模擬 replica")
+    merchant = MerchantFactory()
+    product = ProductFactory(store=merchant.store, name="primary 的商品")
+    copy_to(sqlite_replica, merchant.user, merchant, merchant.store, product)
+    Product.objects.using(sqlite_replica).filter(pk=product.pk).update(name="replica 的商品")
+
+    # 列表由 replica 回答
+    res = api_client.get("/store/products/")
+    assert res.status_code == 200
+    assert [item["name"] for item in res.data["results"]] == ["replica 的商品"]
+
+    # 寫入只進 primary
+    api_client.force_authenticate(user=merchant.user)
+    res = api_client.post("/store/products/", {
+        "name": "新商品", "description": "新品", "price": "10.00", "stock": 1,
+    }, format="json")
+    assert res.status_code == 201
+    assert Product.objects.using(DEFAULT_DB_ALIAS).filter(name="新商品").exists()
+    assert not Product.objects.using(sqlite_replica).filter(name="新商品").exists()
+
+    # select_for_update 鎖的是 primary 的資料列
+    with replica_reads():
+        assert Product.objects.get(pk=product.pk).name == "replica 的商品"
+        with transaction.atomic():
+            assert Product.objects.select_for_update().get(pk=product.pk).name == "primary 的商品"
+
+
+@pytest.mark.django_db
+@override_settings(DATABASE_REPLICAS=[])
+def test_views_skip_replica_reads_without_replicas(api_client, recorded_reads):
+    ProductFactory(store=MerchantFactory().store)
+
+    api_client.get("/store/products/")
+    assert recorded_reads and not any(recorded_reads)
+
+
+@pytest.mark.django_db
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+def test_list_endpoints_read_from_replica_and_writes_do_not(api_client, recorded_reads):
+    merchant = MerchantFactory()
+    ProductFactory(store=merchant.store)
+
+    recorded_reads.clear()
+    api_client.get("/store/products/")
+    api_client.get("/store/stores/")
+    assert recorded_reads and all(recorded_reads)
+
+    recorded_reads.clear()
+    api_client.force_authenticate(user=merchant.user)
+    res = api_client.post("/store/products/", {
+        "name": "新商品", "description": "新品", "price": "10.00", "stock": 1,
+    }, format="json")
+    assert res.status_code == 201
+    assert recorded_reads and not any(recorded_reads)
+
+
+@pytest.mark.django_db
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+def test_user_is_pinned_to_primary_after_write(api_client, recorded_reads):
+    merchant = MerchantFactory()
+    api_client.force_authenticate(user=merchant.user)
+
+    bad = api_client.post("/store/products/", {"name": "", "price": "-1"}, format="json")
+    assert bad.status_code == 400
+    assert not is_pinned(merchant.user)
+
+    res = api_client.post("/store/products/", {
+        "name": "新商品", "description": "新品", "price": "10.00", "stock": 1,
+    }, format="json")
+    assert res.status_code == 201
+    assert is_pinned(merchant.user)
+
+    recorded_reads.clear()
+    api_client.get("/store/products/")
+    assert recorded_reads and not any(recorded_reads)
+
+    # 其他使用者不受影響
+    api_client.force_authenticate(user=MemberFactory().user)
+    recorded_reads.clear()
+    api_client.get("/store/products/")
+    assert recorded_reads and all(recorded_reads)
+
+
+@pytest.mark.django_db
+def test_pin_expires(settings):
+    settings.REPLICA_PIN_SECONDS = 0.01
+    user = MemberFactory().user
+    pin_to_primary(user)
+
+    time.sleep(0.05)
+
+    assert not is_pinned(user)
+    assert Product.objects.count() == 0
+
+
+CHECK_PIN_IN_OTHER_PROCESS = """
+import sys
+from types import SimpleNamespace
+
+import django
+django.setup()
+from Merchant_X_Consumer.db_router import is_pinned
+
+print(is_pinned(SimpleNamespace(pk=int(sys.argv[1]), is_authenticated=True)))
+"""
+
+
+def pinned_in_other_process(user_id, cache_url):
+    """另一個行程（相當於另一個 worker）讀到的固定標記"""
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "Merchant_X_Consumer.settings", "CACHE_URL": cache_url}
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_PIN_IN_OTHER_PROCESS, str(user_id)],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return result.stdout.strip() == "True"
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_pin_is_visible_to_other_workers_only_with_shared_cache(tmp_path, shared):
+    cache_url = f"file://{tmp_path}" if shared else "locmem://"
+    user = SimpleNamespace(pk=4242, is_authenticated=True)
+
+    with override_settings(CACHES={"default": cache_config(cache_url)}):
+        pin_to_primary(user)
+        assert is_pinned(user)
+        assert pinned_in_other_process(user.pk, cache_url) is shared
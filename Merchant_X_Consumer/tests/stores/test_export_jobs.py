@@ -0,0 +1,219 @@
+import csv
+import gzip
+import io
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from store.models import ExportJob, Order
+from store.services import exports
+from store.services.exports import run_export
+from tests.factories.order_factory import OrderFactory, OrderItemFactory
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MemberFactory, MerchantFactory
+
+
+@pytest.fixture
+def export_settings(settings):
+    settings.EXPORT_WORKERS = 0 # 測試中直接執行，不開背景執行緒
+    settings.EXPORT_CHUNK_SIZE = 2
+    return settings
+
+
+@pytest.fixture
+def merchant_with_orders():
+    merchant = MerchantFactory()
+    other_merchant = MerchantFactory()
+    member = MemberFactory()
+    product = ProductFactory(store=merchant.store, name="咖啡豆", price=Decimal("100.00"))
+    other_product = ProductFactory(store=other_merchant.store, price=Decimal("1.00"))
+
+    for day, quantity in [(datetime(2026, 1, 5, 10), 1), (datetime(2026, 1, 6, 10), 2), (datetime(2026, 1, 7, 10), 3)]:
+        order = OrderFactory(member=member, status=Order.StatusChoices.PAID, set_created_at=day)
+        OrderItemFactory(order=order, product=product, quantity=quantity)
+        OrderItemFactory(order=order, product=other_product, quantity=9) # 其他商家的商品不能出現在匯出中
+
+    OrderItemFactory(
+        order=OrderFactory(member=member, set_created_at=datetime(2026, 2, 1)), product=product,
+    ) # 區間外
+    return merchant
+
+
+def create_export(api_client, django_capture_on_commit_callbacks, **data):
+    payload = {"dataset": "orders", "format": "csv", "start": "2026-01-01", "end": "2026-01-31", **data}
+    with django_capture_on_commit_callbacks(execute=True):
+        return api_client.post("/store/merchant/exports/", payload, format="json")
+
+
+def read_csv(response):
+    content = b"".join(response.streaming_content)
+    return list(csv.reader(io.StringIO(gzip.decompress(content).decode("utf-8"))))
+
+
+@pytest.mark.django_db
+def test_export_orders_csv(api_client, export_settings, merchant_with_orders, django_capture_on_commit_callbacks):
+    api_client.force_authenticate(user=merchant_with_orders.user)
+
+    res = create_export(api_client, django_capture_on_commit_callbacks)
+    assert res.status_code == 202
+    job_id = res.data["id"]
+
+    status_res = api_client.get(f"/store/merchant/exports/{job_id}/")
+    assert status_res.data["status"] == "done"
+    assert status_res.data["total_rows"] == 3
+    assert status_res.data["rows_written"] == 3
+    assert status_res.data["progress"] == 1.0
+    assert status_res.data["download_url"].endswith(f"/store/merchant/exports/{job_id}/download/")
+
+    download = api_client.get(f"/store/merchant/exports/{job_id}/download/")
+    assert download.status_code == 200
+    assert download["Accept-Ranges"] == "bytes"
+
+    rows = read_csv(download)
+    assert rows[0] == ["order_number", "created_at", "status", "member", "receiver_name", "item_count", "quantity", "gmv"]
+    assert [row[6:] for row in rows[1:]] == [["1", "100.00"], ["2", "200.00"], ["3", "300.00"]]
+    assert rows[1][1].startswith("2026-01-05T10:00:00+08:00")
+
+
+@pytest.mark.django_db
+def test_export_items_csv(api_client, export_settings, merchant_with_orders, django_capture_on_commit_callbacks):
+    api_client.force_authenticate(user=merchant_with_orders.user)
+
+    job_id = create_export(api_client, django_capture_on_commit_callbacks, dataset="items").data["id"]
+    rows = read_csv(api_client.get(f"/store/merchant/exports/{job_id}/download/"))
+
+    assert len(rows) == 4
+    assert {row[4] for row in rows[1:]} == {"咖啡豆"}
+    assert [row[7] for row in rows[1:]] == ["100.00", "200.00", "300.00"]
+
+
+@pytest.mark.django_db
+def test_export_formats_columns_by_name(
+        monkeypatch, api_client, export_settings, merchant_with_orders, django_capture_on_commit_callbacks):
+    columns = exports.DATASET_COLUMNS["orders"]
+    monkeypatch.setitem(exports.DATASET_COLUMNS, "orders", [columns[7], *columns[2:7], columns[0], columns[1]])
+    api_client.force_authenticate(user=merchant_with_orders.user)
+
+    job_id = create_export(api_client, django_capture_on_commit_callbacks).data["id"]
+    header, *rows = read_csv(api_client.get(f"/store/merchant/exports/{job_id}/download/"))
+
+    values = dict(zip(header, rows[0]))
+    assert header[-1] == "created_at"
+    assert values["created_at"].startswith("2026-01-05T10:00:00+08:00")
+    assert values["gmv"] == "100.00"
+    assert values["quantity"] == "1"
+
+
+@pytest.mark.django_db
+def test_export_download_supports_range_requests(
+    api_client, export_settings, merchant_with_orders, django_capture_on_commit_callbacks
+):
+    api_client.force_authenticate(user=merchant_with_orders.user)
+    job_id = create_export(api_client, django_capture_on_commit_callbacks).data["id"]
+    url = f"/store/merchant/exports/{job_id}/download/"
+
+    full = b"".join(api_client.get(url).streaming_content)
+    size = len(full)
+
+    partial = api_client.get(url, HTTP_RANGE="bytes=10-19")
+    assert partial.status_code == 206
+    assert partial["Content-Range"] == f"bytes 10-19/{size}"
+    assert b"".join(partial.streaming_content) == full[10:20]
+
+    tail = api_client.get(url, HTTP_RANGE="bytes=-5")
+    assert b"".join(tail.streaming_content) == full[-5:]
+
+    rest = api_client.get(url, HTTP_RANGE="bytes=20-")
+    assert b"".join(rest.streaming_content) == full[20:]
+
+    unsatisfiable = api_client.get(url, HTTP_RANGE=f"bytes={size}-")
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable["Content-Range"] == f"bytes */{size}"
+
+
+@pytest.mark.django_db
+def test_export_download_before_done_is_conflict(api_client, export_settings, merchant_with_orders):
+    api_client.force_authenticate(user=merchant_with_orders.user)
+
+    # 沒有執行 on_commit callback，工作仍在 pending
+    res = api_client.post("/store/merchant/exports/", {
+        "dataset": "orders", "start": "2026-01-01", "end": "2026-01-31",
+    }, format="json")
+    assert res.data["status"] == "pending"
+    assert res.data["download_url"] is None
+
+    assert api_client.get(f"/store/merchant/exports/{res.data['id']}/download/").status_code == 409
+
+
+@pytest.mark.django_db
+def test_export_validation(api_client, export_settings, merchant_with_orders):
+    api_client.force_authenticate(user=merchant_with_orders.user)
+    url = "/store/merchant/exports/"
+
+    assert api_client.post(url, {"dataset": "orders", "start": "2026-02-01", "end": "2026-01-01"}, format="json").status_code == 400
+    assert api_client.post(url, {"dataset": "orders", "start": "2024-01-01", "end": "2026-01-01"}, format="json").status_code == 400
+    assert api_client.post(url, {"dataset": "nope", "start": "2026-01-01", "end": "2026-01-02"}, format="json").status_code == 400
+    assert not ExportJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_merchant_cannot_see_other_merchants_exports(
+    api_client, export_settings, merchant_with_orders, django_capture_on_commit_callbacks
+):
+    api_client.force_authenticate(user=merchant_with_orders.user)
+    job_id = create_export(api_client, django_capture_on_commit_callbacks).data["id"]
+
+    api_client.force_authenticate(user=MerchantFactory().user)
+    assert api_client.get(f"/store/merchant/exports/{job_id}/").status_code == 404
+    assert api_client.get(f"/store/merchant/exports/{job_id}/download/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_export_job_failure_is_recorded(export_settings, merchant_with_orders):
+    blocker = export_settings.EXPORT_ROOT / "blocker"
+    blocker.write_text("")
+    export_settings.EXPORT_ROOT = blocker # 是檔案而不是資料夾，無法建立匯出檔
+    job = ExportJob.objects.create(
+        merchant=merchant_with_orders, dataset="orders", start=date(2026, 1, 1), end=date(2026, 1, 31),
+    )
+
+    run_export(job.id)
+
+    job.refresh_from_db()
+    assert job.status == "failed"
+    assert job.error
+
+
+@pytest.mark.django_db
+def test_recover_exports_after_restart(export_settings, merchant_with_orders):
+    """
+    模擬重啟：排隊中的工作留在 pending、執行中的停在 running（留下 .part 檔）
+    """
+    def job(**fields):
+        return ExportJob.objects.create(
+            merchant=merchant_with_orders, dataset="orders", start=date(2026, 1, 1), end=date(2026, 1, 31), **fields,
+        )
+
+    pending = job()
+    stale = job(status="running", heartbeat_at=timezone.now() - timedelta(hours=1))
+    running = job(status="running", heartbeat_at=timezone.now())
+    partial = export_settings.EXPORT_ROOT / str(merchant_with_orders.id) / f"export-{stale.id}-orders.csv.gz.part"
+    partial.parent.mkdir(parents=True, exist_ok=True)
+    partial.write_bytes(b"half")
+
+    call_command("recover_exports", stdout=io.StringIO())
+
+    for item in (pending, stale, running):
+        item.refresh_from_db()
+    assert (pending.status, pending.rows_written) == ("done", 3)
+    assert stale.status == "failed" and stale.error and stale.finished_at
+    assert not partial.exists()
+    assert running.status == "running" # 仍有進度的工作不動
+
+    # 再執行一次不會重做已完成的工作
+    call_command("recover_exports", stdout=io.StringIO())
+    pending.refresh_from_db()
+    assert pending.status == "done"
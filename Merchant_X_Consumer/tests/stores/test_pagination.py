@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import pytest
+
+from store.models import Store
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MerchantFactory
+
+
+@pytest.mark.django_db
+def test_product_list_keyset_pagination_by_id(api_client):
+    store = Store.objects.get(merchant=MerchantFactory())
+    products = [ProductFactory(store=store) for _ in range(7)]
+
+    seen = []
+    url = "/store/products/?pagination=cursor&page_size=3"
+    while url:
+        res = api_client.get(url)
+        assert res.status_code == 200
+        assert "count" not in res.data
+        seen += [row["id"] for row in res.data["results"]]
+        url = res.data["next"]
+
+    assert seen == [p.id for p in products]
+
+
+@pytest.mark.django_db
+def test_product_list_keyset_pagination_follows_requested_ordering(api_client):
+    store = Store.objects.get(merchant=MerchantFactory())
+    for price in ["30.00", "10.00", "20.00", "10.00", "30.00", "20.00", "10.00"]:
+        ProductFactory(store=store, price=Decimal(price))
+
+    seen = []
+    url = "/store/products/?pagination=cursor&page_size=2&ordering=-price"
+    while url:
+        res = api_client.get(url)
+        assert res.status_code == 200
+        seen += [(Decimal(row["price"]), row["id"]) for row in res.data["results"]]
+        url = res.data["next"]
+
+    # 同價格以 id 排序，翻頁不重複也不遺漏
+    assert seen == sorted(seen, key=lambda row: (-row[0], -row[1]))
+    assert len(seen) == 7
+
+
+@pytest.mark.django_db
+def test_product_list_keyset_pagination_rejects_unsupported_ordering(api_client):
+    ProductFactory(store=Store.objects.get(merchant=MerchantFactory()))
+
+    res = api_client.get("/store/products/?pagination=cursor&ordering=store__name")
+
+    assert res.status_code == 400
+    assert "ordering" in res.data
+    assert api_client.get("/store/products/?ordering=store__name").status_code == 200
+
+
+@pytest.mark.django_db
+def test_product_list_page_number_mode_is_default(api_client):
+    store = Store.objects.get(merchant=MerchantFactory())
+    for _ in range(3):
+        ProductFactory(store=store)
+
+    res = api_client.get("/store/products/?page_size=2")
+
+    assert res.status_code == 200
+    assert res.data["count"] == 3
+    assert len(res.data["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_store_list_keyset_pagination(api_client):
+    stores = [Store.objects.get(merchant=MerchantFactory()) for _ in range(3)]
+
+    res = api_client.get("/store/stores/?pagination=cursor&page_size=2")
+
+    assert res.status_code == 200
+    assert len(res.data["results"]) == 2
+    assert res.data["next"] is not None
+
+    res = api_client.get(res.data["next"])
+    assert len(res.data["results"]) == 1
+    assert res.data["next"] is None
+    assert res.data["results"][0]["name"] == stores[-1].name
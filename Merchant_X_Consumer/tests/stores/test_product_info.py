@@ -0,0 +1,48 @@
+import pytest
+from decimal import Decimal
+
+from store.models import Store
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MerchantFactory
+
+
+@pytest.mark.django_db
+def test_product_info_returns_stats_and_first_page(api_client, django_assert_max_num_queries):
+    """
+    商品統計：
+    - count / max_price 是全部商品的統計
+    - products 只回傳一頁，另有 next 可往下翻
+    """
+
+    store = Store.objects.get(merchant=MerchantFactory())
+    products = [ProductFactory(store=store, price=Decimal(f"{i}.50")) for i in range(1, 8)]
+
+    with django_assert_max_num_queries(2):  # 聚合一次 + 一頁商品（含商店名稱）
+        res = api_client.get("/store/products/info/?page_size=3")
+
+    assert res.status_code == 200
+    assert res.data["count"] == 7
+    assert res.data["max_price"] == 7.5
+    assert [row["id"] for row in res.data["products"]] == [p.id for p in products[:3]]
+    assert res.data["products"][0]["store_name"] == store.name
+
+    seen = [row["id"] for row in res.data["products"]]
+    url = res.data["next"]
+    while url:
+        res = api_client.get(url)
+        assert res.data["count"] == 7
+        seen += [row["id"] for row in res.data["products"]]
+        url = res.data["next"]
+
+    assert seen == [p.id for p in products]
+
+
+@pytest.mark.django_db
+def test_product_info_without_products(api_client):
+    res = api_client.get("/store/products/info/")
+
+    assert res.status_code == 200
+    assert res.data["count"] == 0
+    assert res.data["max_price"] is None
+    assert res.data["products"] == []
+    assert res.data["next"] is None
@@ -0,0 +1,86 @@
+import pytest
+
+from store.models import Store
+from store.serializers import StoreSerializer
+from tests.factories.product_factory import ProductFactory
+from tests.factories.user_factory import MerchantFactory
+
+
+def create_stores(store_count, products_per_store):
+    stores = []
+    for _ in range(store_count):
+        store = Store.objects.get(merchant=MerchantFactory())
+        for _ in range(products_per_store):
+            ProductFactory(store=store)
+        stores.append(store)
+    return stores
+
+
+@pytest.mark.django_db
+def test_store_list_query_count_does_not_grow_with_stores(api_client, django_assert_num_queries):
+    """
+    商店列表：COUNT + 商店 + 商品（prefetch）共 3 個查詢，與商店數、商品數無關
+    """
+    create_stores(2, 2)
+    with django_assert_num_queries(3):
+        res = api_client.get("/store/stores/")
+    assert res.status_code == 200
+
+    create_stores(3, 8)
+    with django_assert_num_queries(3):
+        res = api_client.get("/store/stores/")
+    assert res.status_code == 200
+    assert res.data["count"] == 5
+
+
+@pytest.mark.django_db
+def test_store_list_caps_nested_products(api_client):
+    limit = StoreSerializer.nested_products_limit
+    store = create_stores(1, limit + 3)[0]
+
+    res = api_client.get("/store/stores/")
+
+    products = res.data["results"][0]["products"]
+    assert len(products) == limit
+    assert [p["id"] for p in products] == list(
+        store.products.order_by("id").values_list("id", flat=True)[:limit]
+    )
+    assert products[0]["store_name"] == store.name
+
+
+@pytest.mark.django_db
+def test_store_detail_query_count(api_client, django_assert_num_queries):
+    store = create_stores(1, 8)[0]
+
+    with django_assert_num_queries(2):  # 商店 + 商品（prefetch）
+        res = api_client.get(f"/store/stores/{store.id}/")
+
+    assert res.status_code == 200
+    assert len(res.data["products"]) == StoreSerializer.nested_products_limit
+
+
+@pytest.mark.django_db
+def test_store_products_sub_resource_is_paginated(api_client, django_assert_num_queries):
+    store, other = create_stores(2, 7)
+
+    with django_assert_num_queries(3):  # 商店 + COUNT + 一頁商品
+        res = api_client.get(f"/store/stores/{store.id}/products/?page_size=4")
+
+    assert res.status_code == 200
+    assert res.data["count"] == 7
+    assert len(res.data["results"]) == 4
+    assert all(p["store_name"] == store.name for p in res.data["results"])
+
+    seen = []
+    url = f"/store/stores/{store.id}/products/?pagination=cursor&page_size=3"
+    while url:
+        res = api_client.get(url)
+        seen += [p["id"] for p in res.data["results"]]
+        url = res.data["next"]
+    assert seen == list(store.products.order_by("id").values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+def test_store_products_sub_resource_unknown_store(api_client):
+    res = api_client.get("/store/stores/999999/products/")
+    assert res.status_code == 404